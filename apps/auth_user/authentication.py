@@ -0,0 +1,130 @@
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+
+from .signed_tokens import ACCESS, SignedToken
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+        Token authentication that keeps the id and the state of the user of the token in the
+        cache, so only the first request of a token reads the database until the entry expires.
+        The other fields of the user, like the password, are never cached.
+
+        The entry of a token is discarded when the token is deleted and when his user is
+        saved, so a logout or a deactivation take effect in the next request. When the cache
+        is not shared by all the processes (CACHE_SHARED) the other processes do not discard
+        their entries, so they are kept only AUTH_TOKEN_CACHE_LOCAL_TIMEOUT seconds
+    """
+
+    @staticmethod
+    def get_cache():
+        return caches[settings.AUTH_TOKEN_CACHE_ALIAS]
+
+    @staticmethod
+    def get_cache_key(key: str) -> str:
+        return f'auth-token:{key}'
+
+    @staticmethod
+    def invalidate(key: str) -> None:
+        """ Discard the cached entry of the token with the key received """
+        CachedTokenAuthentication.get_cache().delete(CachedTokenAuthentication.get_cache_key(key))
+
+    @staticmethod
+    def invalidate_user(user_id: int) -> None:
+        """ Discard the cached entry of the token of the user, if he has one """
+        for key in Token.objects.filter(user_id=user_id).values_list('key', flat=True):
+            CachedTokenAuthentication.invalidate(key)
+
+    @staticmethod
+    def build_token(key: str, user_id: int, is_active: bool) -> Token:
+        """ Return the token with his user built from the values of the cache """
+        User = get_user_model()
+        values = {'id': user_id, 'is_active': is_active}
+        field_names = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+        # The other fields are deferred and loaded from the database if they are used
+        user = User.from_db(None, field_names, [values[name] for name in field_names])
+
+        token = Token.from_db(None, ['key', 'user_id'], [key, user_id])
+        token.user = user
+        return token
+
+    def get_token(self, key: str) -> Optional[Token]:
+        cache = self.get_cache()
+        cache_key = self.get_cache_key(key)
+
+        cached_user = cache.get(cache_key)
+        if cached_user is not None:
+            return self.build_token(key, *cached_user)
+
+        token = self.get_model().objects.select_related('user').filter(key=key).first()
+        if token is not None:
+            timeout = settings.AUTH_TOKEN_CACHE_TIMEOUT if settings.CACHE_SHARED else settings.AUTH_TOKEN_CACHE_LOCAL_TIMEOUT
+            cache.set(cache_key, (token.user_id, token.user.is_active), timeout=timeout)
+
+        return token
+
+    def authenticate_credentials(self, key: str) -> Tuple:
+        token = self.get_token(key)
+        if token is None:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        return (token.user, token)
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+        Authentication with the signed access tokens, enabled when AUTH_TOKEN_MODE is 'signed'.
+        The token is verified with the SECRET_KEY and the denylist of the cache, and the user
+        is built from the claims, so the request does not read the database until a view
+        uses a field of the user that is not in the token
+
+        Authorization: Bearer <access token>
+    """
+    keyword = 'Bearer'
+
+    @staticmethod
+    def get_user(claims):
+        User = get_user_model()
+        values = {
+            'id': claims['uid'],
+            'email': claims['email'],
+            'username': claims['username'],
+            'is_staff': claims['staff'],
+            'is_active': True,
+        }
+        field_names = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+        # The other fields are deferred and loaded from the database if they are used
+        return User.from_db(None, field_names, [values[name] for name in field_names])
+
+    def authenticate(self, request) -> Optional[Tuple]:
+        auth = get_authorization_header(request).split()
+
+        if not auth or auth[0].lower() != self.keyword.lower().encode() or not SignedToken.is_enabled():
+            return None
+
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        try:
+            token = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        claims = SignedToken.verify(token, ACCESS)
+        if claims is None:
+            raise exceptions.AuthenticationFailed('Invalid or expired token.')
+
+        return (self.get_user(claims), claims)
+
+    def authenticate_header(self, request) -> str:
+        return self.keyword
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from .authentication import CachedTokenAuthentication
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, *args, **kwargs):
+    CachedTokenAuthentication.invalidate(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_tokens_of_saved_user(sender, instance, created, *args, **kwargs):
+    # The cached user could be deactivated or changed
+    if not created:
+        CachedTokenAuthentication.invalidate_user(instance.pk)
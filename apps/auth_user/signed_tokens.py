@@ -0,0 +1,102 @@
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+
+import time
+import uuid
+
+ACCESS = 'access'
+REFRESH = 'refresh'
+SIGNED_MODE = 'signed'
+
+
+class SignedToken():
+    """
+        Tokens signed with the SECRET_KEY that carry the id of the user and their expiration.
+        Any node with the same secret verifies them without reading the database.
+
+        A token is revoked writing his id in a denylist of the cache until the token expires,
+        so the list only keeps the tokens revoked that are still valid. The cache must be shared
+        by all the nodes (CACHE_SHARED), so a token revoked in a node is rejected by the others
+    """
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return settings.AUTH_TOKEN_MODE == SIGNED_MODE
+
+    @staticmethod
+    def get_salt(token_type: str) -> str:
+        return f'apps.auth_user.signed_tokens.{token_type}'
+
+    @staticmethod
+    def get_denylist_key(token_id: str) -> str:
+        return f'auth-denylist:{token_id}'
+
+    @staticmethod
+    def create(user, token_type: str) -> str:
+        """
+            Return a new token of the user
+
+            Parameters:
+                user(User): owner of the token
+                token_type(str): ACCESS or REFRESH
+
+            Return:
+                token(str): token signed
+        """
+        lifetime = settings.AUTH_ACCESS_TOKEN_LIFETIME if token_type == ACCESS else settings.AUTH_REFRESH_TOKEN_LIFETIME
+        claims = {
+            'jti': uuid.uuid4().hex,
+            'uid': user.pk,
+            'exp': int(time.time() + lifetime.total_seconds()),
+        }
+        if token_type == ACCESS:
+            # Fields of the user available without reading the database
+            claims.update({'email': user.email, 'username': user.username, 'staff': user.is_staff})
+        return signing.dumps(claims, salt=SignedToken.get_salt(token_type), compress=True)
+
+    @staticmethod
+    def create_pair(user) -> Dict[str, str]:
+        return {ACCESS: SignedToken.create(user, ACCESS), REFRESH: SignedToken.create(user, REFRESH)}
+
+    @staticmethod
+    def verify(token: str, token_type: str) -> Optional[Dict[str, Any]]:
+        """
+            Return the claims of the token, or None if the signature is not valid, the token
+            expired or it was revoked
+
+            Parameters:
+                token(str): token received
+                token_type(str): ACCESS or REFRESH
+        """
+        try:
+            claims = signing.loads(token, salt=SignedToken.get_salt(token_type))
+        except signing.BadSignature:
+            return None
+
+        if claims['exp'] <= time.time():
+            return None
+
+        if caches[settings.AUTH_TOKEN_CACHE_ALIAS].get(SignedToken.get_denylist_key(claims['jti'])):
+            return None
+
+        return claims
+
+    @staticmethod
+    def revoke(claims: Dict[str, Any]) -> bool:
+        """
+            Add the token to the denylist until his expiration. The cache adds the key only if
+            it is not in the denylist, so two requests with the same token can not both revoke it
+
+            Parameters:
+                claims(Dict[str, Any]): claims of the token verified
+
+            Return:
+                revoked(bool): True if this call revoked the token, False if it was already revoked or expired
+        """
+        timeout = claims['exp'] - int(time.time())
+        if timeout <= 0:
+            return False
+        return caches[settings.AUTH_TOKEN_CACHE_ALIAS].add(SignedToken.get_denylist_key(claims['jti']), True, timeout=timeout)
@@ -0,0 +1,190 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework.authtoken.models import Token
+
+from apps.auth_user.authentication import CachedTokenAuthentication, SignedTokenAuthentication
+from apps.auth_user.signed_tokens import REFRESH, SignedToken
+from apps.users.models import User
+
+URL_LOGIN = reverse('auth:login')
+URL_REFRESH = reverse('auth:refresh')
+URL_LOGOUT = reverse('auth:logout')
+URL_FOLDERS = reverse('directories:folders-list')
+
+
+@override_settings(CACHE_SHARED=True)
+class CachedTokenAuthenticationTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        user_register = {
+            "first_name": "Test",
+            "last_name": "Testing",
+            "username": "TT",
+            "email": "Test@xyz.com",
+            "password": "_:Tolomeo:_"
+        }
+
+        self.user = User.objects.create_user(**user_register)
+        self.token, _ = Token.objects.get_or_create(user=self.user)
+
+    def test_01_token_resolved_from_cache(self):
+        """ Testing that only the first authentication of a token reads the database """
+
+        authentication = CachedTokenAuthentication()
+
+        with self.assertNumQueries(1):
+            user, token = authentication.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, token = authentication.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(token.key, self.token.key)
+        self.assertEqual(cache.get(CachedTokenAuthentication.get_cache_key(self.token.key)), (self.user.pk, True))
+
+    def test_02_logout_invalidates_cached_token(self):
+        """ Testing that a token cached is rejected after the logout """
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+        response = self.client.get(URL_FOLDERS)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post(URL_LOGOUT)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(URL_FOLDERS)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_03_deactivation_invalidates_cached_token(self):
+        """ Testing that a token cached is rejected after the deactivation of his user """
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+        response = self.client.get(URL_FOLDERS)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(URL_FOLDERS)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(CACHE_SHARED=False)
+    def test_04_token_kept_by_the_process_without_shared_cache(self):
+        """ Testing that without a shared cache the token is kept by the process a short time """
+
+        authentication = CachedTokenAuthentication()
+
+        with self.assertNumQueries(1):
+            authentication.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, token = authentication.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(cache.get(CachedTokenAuthentication.get_cache_key(self.token.key)), (self.user.pk, True))
+
+    @override_settings(CACHE_SHARED=False)
+    def test_05_requests_without_shared_cache(self):
+        """ Testing that the requests after the first one of a token make less queries with the default cache """
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        queries = []
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(URL_FOLDERS)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            queries.append(len(context.captured_queries))
+
+        self.assertLess(queries[1], queries[0])
+
+
+@override_settings(AUTH_TOKEN_MODE='signed', CACHE_SHARED=True)
+class SignedTokenAuthenticationTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        user_register = {
+            "first_name": "Test",
+            "last_name": "Testing",
+            "username": "TT",
+            "email": "Test@xyz.com",
+            "password": "_:Tolomeo:_"
+        }
+
+        self.user = User.objects.create_user(**user_register)
+
+    def login(self):
+        response = self.client.post(URL_LOGIN, {'username': self.user.email, 'password': '_:Tolomeo:_'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_01_access_token_verified_without_database(self):
+        """ Testing that a signed access token authenticates the user without queries """
+
+        tokens = self.login()
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+
+        request = APIRequestFactory().get(URL_FOLDERS, HTTP_AUTHORIZATION='Bearer ' + tokens['access'])
+        with self.assertNumQueries(0):
+            user, claims = SignedTokenAuthentication().authenticate(request)
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.email, self.user.email)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + tokens['access'])
+        response = self.client.get(URL_FOLDERS)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + tokens['access'][:-1] + 'x')
+        response = self.client.get(URL_FOLDERS)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_02_refresh_token_used_once(self):
+        """ Testing that a refresh token gives a new pair of tokens only one time """
+
+        tokens = self.login()
+
+        response = self.client.post(URL_REFRESH, {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access', response.data)
+
+        response = self.client.post(URL_REFRESH, {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.post(URL_REFRESH, {'refresh': tokens['access']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_04_refresh_token_revoked_once(self):
+        """ Testing that only the first revocation of a token succeeds, like two refresh at the same time """
+
+        tokens = self.login()
+        claims = SignedToken.verify(tokens['refresh'], REFRESH)
+
+        self.assertTrue(SignedToken.revoke(claims))
+        self.assertFalse(SignedToken.revoke(claims))
+        self.assertIsNone(SignedToken.verify(tokens['refresh'], REFRESH))
+
+    def test_03_logout_revokes_tokens(self):
+        """ Testing that the access and refresh tokens are rejected after the logout """
+
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + tokens['access'])
+
+        response = self.client.post(URL_LOGOUT, {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(URL_FOLDERS)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials()
+        response = self.client.post(URL_REFRESH, {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,15 +1,16 @@
 from django.urls import path
 
-from rest_framework.authtoken.views import obtain_auth_token
-
-from .views import (logout_view,
+from .views import (login_view,
+                    logout_view,
+                    refresh_view,
                     register_view)
 
 
 app_name = "auth_user"
 
 urlpatterns = [
-    path('api/login/', obtain_auth_token, name='login'),
+    path('api/login/', login_view, name='login'),
+    path('api/refresh/', refresh_view, name='refresh'),
     path('api/register/', register_view, name='register'),
     path('api/logout/', logout_view, name='logout'),
 ]
@@ -3,9 +3,51 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authtoken.models import Token
+from rest_framework.authtoken.serializers import AuthTokenSerializer
 
+from apps.users.models import User
 from apps.users.serializers import RegisterSerializer
 
+from .authentication import CachedTokenAuthentication
+from .signed_tokens import REFRESH, SignedToken
+
+
+def get_credentials(user: User) -> dict:
+    """ Return the signed tokens of the user in the signed mode, or his token of the database """
+    if SignedToken.is_enabled():
+        return SignedToken.create_pair(user)
+
+    token, _ = Token.objects.get_or_create(user=user)
+    return {'token': token.key}
+
+
+@api_view(('POST', ))
+def login_view(request):
+    if request.method == 'POST':
+        serializer = AuthTokenSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        return Response(get_credentials(serializer.validated_data['user']))
+
+
+@api_view(('POST', ))
+def refresh_view(request):
+    if request.method == 'POST':
+        claims = SignedToken.verify(request.data.get(REFRESH, ''), REFRESH) if SignedToken.is_enabled() else None
+        if claims is None:
+            return Response({'message': 'Invalid or expired refresh token'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        # Every refresh token is used once, only the request that revokes it gets new tokens
+        if not SignedToken.revoke(claims):
+            return Response({'message': 'Invalid or expired refresh token'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        # The refresh is the only moment where the user is read, so a deactivation
+        # takes effect when the access token expires
+        user = User.objects.filter(pk=claims['uid'], is_active=True).first()
+        if user is None:
+            return Response({'message': 'User inactive or deleted'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        return Response(SignedToken.create_pair(user))
+
 
 @api_view(('POST', ))
 def register_view(request):
@@ -21,9 +63,8 @@ def register_view(request):
 
             user = serializer.save()
 
-            token, _ = Token.objects.get_or_create(user=user)
             pay_load['value'].update(serializer.data)
-            pay_load['value'].update({'token': token.key})
+            pay_load['value'].update(get_credentials(user))
 
             return Response(pay_load, status=status.HTTP_201_CREATED)
         else:
@@ -38,5 +79,15 @@ def register_view(request):
 def logout_view(request):
 
     if request.method == 'POST':
-        request.user.auth_token.delete()
+        if isinstance(request.auth, dict):
+            # Signed access token, revoked with the refresh token received
+            SignedToken.revoke(request.auth)
+            claims = SignedToken.verify(request.data.get(REFRESH, ''), REFRESH)
+            if claims is not None and claims['uid'] == request.user.pk:
+                SignedToken.revoke(claims)
+            return Response()
+
+        token = request.user.auth_token
+        CachedTokenAuthentication.invalidate(token.key)
+        token.delete()
         return Response()
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, Iterable, List, Optional, Tuple
 from django.db import models
 from django.db.models import QuerySet
 
@@ -8,9 +8,43 @@ class BaseProjectModel(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    # Fields whose loaded values are kept to know if they changed before save
+    tracked_fields: Tuple[str, ...] = ()
+
     class Meta:
         abstract = True
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._take_snapshot()
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._take_snapshot(kwargs.get('update_fields'))
+
+    def _take_snapshot(self, fields: Optional[Iterable[str]] = None) -> None:
+        """ Keep the values of the tracked fields loaded or saved, the deferred fields are not kept """
+        if not hasattr(self, '_loaded_values'):
+            self._loaded_values = {}
+
+        if fields is not None:
+            fields = {self._meta.get_field(field).attname for field in fields}
+
+        for field in self.tracked_fields:
+            if field in self.__dict__ and (fields is None or field in fields):
+                self._loaded_values[field] = self.__dict__[field]
+
+    def get_loaded_value(self, field: str) -> Any:
+        """ Return the value of a tracked field when it was loaded or saved, KeyError if it was not kept """
+        return getattr(self, '_loaded_values', {})[field]
+
+    def has_changed(self, *fields: str) -> bool:
+        """ Return if any of the tracked fields changed since it was loaded or saved, a new instance always changed """
+        loaded_values = getattr(self, '_loaded_values', {})
+        return any(field not in loaded_values or loaded_values[field] != getattr(self, field) for field in fields)
+
     @classmethod
     def get_all(cls) -> QuerySet['BaseProjectModel']:
         return cls.objects.all()
@@ -0,0 +1,16 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+# The details keep the format of the responses of the views
+
+
+class LengthRequired(APIException):
+    status_code = status.HTTP_411_LENGTH_REQUIRED
+    default_detail = {'message': 'The Content-Length header is required.'}
+    default_code = 'length_required'
+
+
+class StorageQuotaExceeded(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = {'message': 'The storage quota does not have space for the file.'}
+    default_code = 'storage_quota_exceeded'
@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from rest_framework.renderers import JSONRenderer
+
+from apps.directories.models import Detail, File, Folder
+from apps.directories.projections import get_files_rows, project_files
+from apps.directories.renderers import FastJSONRenderer
+from apps.directories.serializers import FileSerializer
+
+import time
+
+
+class Command(BaseCommand):
+    help = 'Compare the cost of list the files of a folder with the serializers and with the projections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                            help='Number of files of the folder listed in each round')
+
+    def _measure(self, function):
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            started_at = time.process_time()
+            function()
+            elapsed = time.process_time() - started_at
+        return queries, elapsed
+
+    def _create_files(self, parent_folder: Folder, size: int) -> None:
+        details = Detail.objects.bulk_create([Detail(type='pdf', size=1024) for _ in range(size)], batch_size=1000)
+        File.objects.bulk_create([
+            File(
+                parent_folder=parent_folder,
+                details=detail,
+                name=f'file_{number}.pdf',
+                file=f'{parent_folder.get_path_folder()}/file_{number}.pdf'
+            )
+            for number, detail in enumerate(details)
+        ], batch_size=1000)
+
+    def handle(self, *args, **options):
+
+        self.stdout.write(f'{"rows":>8} {"path":>12} {"queries":>8} {"seconds":>9} {"us/row":>8}')
+
+        for size in options['sizes']:
+            # Nothing of the round is kept in the database
+            with transaction.atomic():
+                user = get_user_model().objects.create(username=f'benchmark_{size}', email=f'benchmark_{size}@xyz.com')
+                parent_folder = Folder.get_root_folder_by_user(user)
+                self._create_files(parent_folder, size)
+
+                measures = {
+                    'serializer': self._measure(lambda: JSONRenderer().render(
+                        FileSerializer(parent_folder.get_all_files(), many=True).data
+                    )),
+                    'joined': self._measure(lambda: JSONRenderer().render(
+                        FileSerializer(parent_folder.get_all_files().select_related('details'), many=True).data
+                    )),
+                    'projection': self._measure(lambda: FastJSONRenderer().render(
+                        get_files_rows(project_files(parent_folder.get_all_files()))
+                    )),
+                }
+
+                for path, (queries, elapsed) in measures.items():
+                    self.stdout.write(f'{size:>8} {path:>12} {queries:>8} {elapsed:>9.3f} {elapsed / size * 1e6:>8.1f}')
+
+                transaction.set_rollback(True)
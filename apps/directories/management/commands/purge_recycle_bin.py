@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from apps.directories.models import UploadSession
+from apps.directories.utils.recycle_bin import RecycleBinPurger
+
+import time
+
+
+class Command(BaseCommand):
+    help = 'Delete the folders and files of the recycle bin and the upload sessions that are expired'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run one purge and exit')
+        parser.add_argument('--interval', type=float, default=60, help='Seconds between each purge')
+        parser.add_argument('--batch-size', type=int, default=500, help='Files deleted in each transaction')
+        parser.add_argument('--unlinks-per-second', type=float, default=None,
+                            help='Maximum of files removed from disk by second')
+        parser.add_argument('--quota-bytes', type=int, default=None,
+                            help='Evict the oldest trash of the users that use more bytes than this quota')
+
+    def handle(self, *args, **options):
+
+        purger = RecycleBinPurger(
+            batch_size=options['batch_size'],
+            unlinks_per_second=options['unlinks_per_second']
+        )
+
+        while True:
+            purger.reset_stats()
+            purger.purge_expired()
+
+            if options['quota_bytes'] is not None:
+                purger.evict_over_quota(options['quota_bytes'])
+
+            expired_sessions = UploadSession.delete_expired_sessions()
+
+            stats = purger.get_stats()
+            self.stdout.write(self.style.SUCCESS(
+                f"Purged {stats['files']} files, {stats['folders']} folders and {stats['bytes']} bytes "
+                f"in {stats['seconds']:.2f}s ({stats['files_per_second']:.1f} files/s, "
+                f"{stats['bytes_per_second']:.0f} bytes/s) and {expired_sessions} expired upload sessions"
+            ))
+
+            if options['once']:
+                break
+
+            time.sleep(options['interval'])
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.directories.utils.folder_aggregates import FolderAggregates
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the recursive totals of bytes, files and folders stored in every folder'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, default=None, help='Id of the user whose folders are rebuilt')
+
+    def handle(self, *args, **options):
+
+        with transaction.atomic():
+            rebuilt = FolderAggregates.rebuild(options['user'])
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully rebuilt the totals of {rebuilt} folders'))
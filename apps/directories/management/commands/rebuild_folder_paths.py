@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.directories.models import Folder
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the physical path and the route stored in every folder'
+
+    def handle(self, *args, **options):
+
+        paths_by_tree_path = {}
+        folders_to_update = []
+
+        with transaction.atomic():
+            for folder in Folder.objects.order_by('path').only('pk', 'path', 'depth', 'name', 'owner_user_id'):
+                if folder.is_root():
+                    folder.physical_path = f'{folder.owner_user_id}'
+                else:
+                    parent_path = folder.path[:-Folder.steplen]
+                    folder.physical_path = f'{paths_by_tree_path[parent_path]}/{folder.name}'
+
+                folder.route = f'{folder.get_path_parent_folder()}/'
+                paths_by_tree_path[folder.path] = folder.physical_path
+                folders_to_update.append(folder)
+
+            Folder.objects.bulk_update(folders_to_update, ['physical_path', 'route'], batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully rebuilt {len(folders_to_update)} folder paths'))
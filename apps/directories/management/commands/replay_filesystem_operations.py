@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.directories.models import FilesystemOperation
+from apps.directories.utils.filesystem_queue import filesystem_queue
+
+
+class Command(BaseCommand):
+    help = 'Apply the operations over the media folder that are pending in the journal'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--failed', action='store_true', help='Retry also the operations that failed')
+
+    def handle(self, *args, **options):
+
+        if options['failed']:
+            FilesystemOperation.objects.filter(status=FilesystemOperation.FAILED).update(
+                status=FilesystemOperation.PENDING,
+                error=''
+            )
+
+        total = filesystem_queue.replay_pending()
+        filesystem_queue.join()
+
+        failed = FilesystemOperation.objects.filter(status=FilesystemOperation.FAILED).count()
+        self.stdout.write(self.style.SUCCESS(f'Replayed {total} operations, {failed} failed'))
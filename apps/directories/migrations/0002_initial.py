@@ -0,0 +1,53 @@
+# Generated by Django 4.0.4 on 2026-10-18 13:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('directories', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='folder',
+            name='collaboration_users',
+            field=models.ManyToManyField(related_name='shared_entity_directories', through='directories.Collaboration', to=settings.AUTH_USER_MODEL, verbose_name='Collaborators'),
+        ),
+        migrations.AddField(
+            model_name='folder',
+            name='owner_user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='own_entity_directories', to=settings.AUTH_USER_MODEL, verbose_name='Owner user'),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='details',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='file_details', to='directories.detail', verbose_name='Details file'),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='parent_folder',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='files', to='directories.folder', verbose_name='Parent folder'),
+        ),
+        migrations.AddField(
+            model_name='collaboration',
+            name='folder',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='collaboration_folder', to='directories.folder', verbose_name='Folder'),
+        ),
+        migrations.AddField(
+            model_name='collaboration',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='collaboration_users', to=settings.AUTH_USER_MODEL, verbose_name='Collaborator user'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='folder',
+            unique_together={('path', 'name')},
+        ),
+    ]
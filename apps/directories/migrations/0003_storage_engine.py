@@ -0,0 +1,169 @@
+# Generated by Django 4.0.4 on 2026-10-18 13:08
+
+import apps.directories.models.blob
+from django.conf import settings
+from django.core.management import call_command
+from django.db import migrations, models
+import django.db.models.deletion
+import io
+
+
+def rebuild_folders(apps, schema_editor):
+    # The physical paths and the totals of the folders created before this migration
+    call_command('rebuild_folder_paths', stdout=io.StringIO())
+    call_command('rebuild_folder_aggregates', stdout=io.StringIO())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('directories', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256 of the content')),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('references', models.PositiveIntegerField(default=0, verbose_name='Files that use the blob')),
+                ('file', models.FileField(upload_to=apps.directories.models.blob.get_blob_path)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='FilesystemLane',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('key', models.CharField(max_length=255, unique=True, verbose_name='Key')),
+                ('claimed_until', models.DateTimeField(blank=True, null=True, verbose_name='Claimed until')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='FilesystemOperation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('operation', models.CharField(choices=[('create_folder', 'Create folder'), ('move', 'Move or rename'), ('remove_file', 'Remove file'), ('remove_tree', 'Remove folder tree'), ('write_file', 'Write an uploaded content')], max_length=20, verbose_name='Operation')),
+                ('source', models.TextField(verbose_name='Source path')),
+                ('destination', models.TextField(blank=True, default='', verbose_name='Destination path')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10, verbose_name='Status')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Error')),
+                ('lane', models.CharField(blank=True, db_index=True, default='', max_length=255, verbose_name='Lane')),
+                ('batch', models.UUIDField(blank=True, null=True, verbose_name='Batch')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='UploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offset', models.PositiveBigIntegerField(verbose_name='Offset of the chunk')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Size of the chunk')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('name', models.CharField(max_length=255, verbose_name='Name of the file')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Size of the file')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='trashed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Trashed at'),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='trashed_root',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trashed_files', to='directories.folder', verbose_name='Trashed root folder'),
+        ),
+        migrations.AddField(
+            model_name='folder',
+            name='physical_path',
+            field=models.TextField(blank=True, default='', verbose_name='Physical path'),
+        ),
+        migrations.AddField(
+            model_name='folder',
+            name='total_files',
+            field=models.BigIntegerField(default=0, verbose_name='Files inside'),
+        ),
+        migrations.AddField(
+            model_name='folder',
+            name='total_folders',
+            field=models.BigIntegerField(default=0, verbose_name='Descendant folders'),
+        ),
+        migrations.AddField(
+            model_name='folder',
+            name='total_size',
+            field=models.BigIntegerField(default=0, verbose_name='Bytes of the files inside'),
+        ),
+        migrations.AddField(
+            model_name='folder',
+            name='trashed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Trashed at'),
+        ),
+        migrations.AddField(
+            model_name='folder',
+            name='trashed_root',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trashed_folders', to='directories.folder', verbose_name='Trashed root folder'),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['parent_folder', 'name', 'id'], name='file_parent_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='folder',
+            index=models.Index(fields=['path'], name='folder_path_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddField(
+            model_name='uploadsession',
+            name='owner_user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL, verbose_name='Owner user'),
+        ),
+        migrations.AddField(
+            model_name='uploadsession',
+            name='parent_folder',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='directories.folder', verbose_name='Parent folder'),
+        ),
+        migrations.AddField(
+            model_name='uploadchunk',
+            name='session',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='directories.uploadsession'),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='files', to='directories.blob', verbose_name='Content of the file'),
+        ),
+        migrations.AddConstraint(
+            model_name='uploadchunk',
+            constraint=models.UniqueConstraint(fields=('session', 'offset'), name='upload_chunk_session_offset_unique'),
+        ),
+        migrations.RunPython(rebuild_folders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# The lookups icontains and istartswith compare UPPER(name::text), the indexes use the same expression
+INDEXES = (
+    ('folder_name_trgm_idx', 'directories_folder'),
+    ('file_name_trgm_idx', 'directories_file'),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # The other databases search the names with the index in memory of the processes
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table in INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING gin ((UPPER(name::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for name, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    # The indexes are created without locking the writes of the tables, outside of a transaction
+    atomic = False
+
+    dependencies = [
+        ('directories', '0003_storage_engine'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -1,2 +1,5 @@
 from .folder import Folder, Collaboration
-from .file import File, Detail
\ No newline at end of file
+from .blob import Blob
+from .file import File, Detail
+from .filesystem_operation import FilesystemOperation, FilesystemLane
+from .upload_session import UploadSession, UploadChunk
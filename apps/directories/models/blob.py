@@ -0,0 +1,222 @@
+from django.conf import settings
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
+
+from apps.core.models import BaseProjectModel
+
+from ..utils.filesystem_queue import filesystem_queue
+from ..utils.storage_backends import get_storage_backend
+
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import hashlib
+import os
+
+
+def get_blob_path(instance, filename):
+    return os.path.join(
+        settings.CONTENT_ADDRESSED_STORAGE_FOLDER,
+        instance.sha256[:2],
+        instance.sha256[2:4],
+        instance.sha256
+    )
+
+
+class Blob(BaseProjectModel):
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name='SHA-256 of the content')
+    size = models.PositiveBigIntegerField(default=0)
+    references = models.PositiveIntegerField(default=0, verbose_name='Files that use the blob')
+    file = models.FileField(upload_to=get_blob_path)
+
+    # Path where the upload that created the blob wrote his content, in the staging folder
+    # if the filesystem queue is enabled. It is not stored in the database
+    written_path: Optional[str] = None
+
+    @staticmethod
+    def get_hash_content(content) -> str:
+        """ Return the SHA-256 of an uploaded content reading it by chunks
+
+            Parameter:
+                content(File): content to get the hash
+
+            Return
+                hash(str): hexadecimal SHA-256 of the content
+        """
+        sha256 = hashlib.sha256()
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        content.seek(0)
+        return sha256.hexdigest()
+
+    @staticmethod
+    def get_blob_by_user_and_hash(user_id: int, sha256: str) -> Optional['Blob']:
+        """ Return the blob with the hash received only if is used by a file of the user
+
+            Parameter:
+                user_id(int): id of the user that must own a file with the blob
+                sha256(str): hash of the content
+
+            Return
+                blob(Blob): The blob or None if the user does not have that content
+        """
+        return Blob.objects.filter(
+            sha256=sha256.lower(),
+            references__gt=0,
+            files__parent_folder__owner_user_id=user_id
+        ).first()
+
+    @staticmethod
+    def store_content(content) -> 'Blob':
+        """ Return the blob of the content received adding it a reference. The content
+            is only written if there is not another blob with the same hash
+
+            Parameter:
+                content(File): content uploaded
+
+            Return
+                blob(Blob): blob that stores the content
+        """
+        sha256 = Blob.get_hash_content(content)
+
+        with transaction.atomic():
+            blob = Blob.objects.select_for_update().filter(sha256=sha256).first()
+            if blob is None:
+                try:
+                    with transaction.atomic():
+                        blob = Blob(sha256=sha256, size=content.size, references=1)
+                        blob.file = get_blob_path(blob, sha256)
+                        blob.save(force_insert=True)
+                    # Only the upload that inserts the blob writes his content, after the removal
+                    # of the content of a blob with the same hash collected before
+                    blob.written_path = filesystem_queue.write(os.path.join(settings.MEDIA_ROOT, blob.file.name), content)
+                    return blob
+                except IntegrityError:
+                    # Other upload stored the same content at the same time
+                    blob = Blob.objects.select_for_update().get(sha256=sha256)
+
+            Blob.add_references([blob.pk])
+            blob.references += 1
+
+        return blob
+
+    @staticmethod
+    def store_many_contents(contents: List) -> List['Blob']:
+        """ Return the blobs of many contents adding them a reference for each content. The
+            hashes are calculated and the new contents are written in parallel, and the blobs
+            are read and created with one statement
+
+            Parameter:
+                contents(List[File]): contents uploaded
+
+            Return
+                blobs(List[Blob]): blob that stores every content, in the same order
+        """
+        with ThreadPoolExecutor(max_workers=settings.UPLOAD_MANY_PARALLEL_WRITES) as executor:
+            hashes = list(executor.map(Blob.get_hash_content, contents))
+
+        with transaction.atomic():
+            blobs = {blob.sha256: blob for blob in Blob.objects.select_for_update().filter(sha256__in=set(hashes))}
+
+            new_contents = {}
+            for sha256, content in zip(hashes, contents):
+                if sha256 not in blobs:
+                    new_contents.setdefault(sha256, content)
+
+            if new_contents:
+                new_blobs = []
+                for sha256, content in new_contents.items():
+                    blob = Blob(sha256=sha256, size=content.size)
+                    blob.file = get_blob_path(blob, sha256)
+                    new_blobs.append(blob)
+
+                # Only the upload that inserts a blob writes his content, after the removal of the
+                # content of a blob with the same hash collected before
+                created_blobs = Blob._create_many(new_blobs)
+                written_paths = filesystem_queue.write_many([
+                    (os.path.join(settings.MEDIA_ROOT, blob.file.name), new_contents[blob.sha256])
+                    for blob in created_blobs
+                ])
+                blobs = {blob.sha256: blob for blob in Blob.objects.select_for_update().filter(sha256__in=set(hashes))}
+                for blob, path in zip(created_blobs, written_paths):
+                    blobs[blob.sha256].written_path = path
+
+            Blob.add_references([blobs[sha256].pk for sha256 in hashes])
+
+        return [blobs[sha256] for sha256 in hashes]
+
+    @staticmethod
+    def _create_many(blobs: List['Blob']) -> List['Blob']:
+        """ Insert the blobs with one statement, or one by one if other upload inserted some
+            of them at the same time. Return the blobs inserted """
+        try:
+            with transaction.atomic():
+                return Blob.objects.bulk_create(blobs)
+        except IntegrityError:
+            created_blobs = []
+            for blob in blobs:
+                try:
+                    with transaction.atomic():
+                        blob.save(force_insert=True)
+                    created_blobs.append(blob)
+                except IntegrityError:
+                    pass
+            return created_blobs
+
+    @staticmethod
+    def remove_unsaved_contents(blobs: List['Blob']) -> None:
+        """ Remove the contents written for the blobs received that are not in the database,
+            because the statements of the upload that wrote them were rolled back
+
+            Parameter:
+                blobs(List[Blob]): blobs of the contents written by the upload
+        """
+        saved_hashes = set(
+            Blob.objects.filter(sha256__in=[blob.sha256 for blob in blobs]).values_list('sha256', flat=True)
+        )
+        for blob in blobs:
+            if blob.written_path and blob.sha256 not in saved_hashes:
+                get_storage_backend().remove_file(blob.written_path)
+
+    @staticmethod
+    def add_references(blobs_id: List[int]) -> None:
+        """ Add one reference to the blobs for each time that the id is in the list """
+        for references, ids in Blob._group_ids_by_count(blobs_id).items():
+            Blob.objects.filter(pk__in=ids).update(references=F('references') + references)
+
+    @staticmethod
+    def release_many(blobs_id: List[int]) -> None:
+        """ Remove one reference to the blobs for each time that the id is in the list
+            and delete the blobs that are not used anymore """
+        if not blobs_id:
+            return
+
+        with transaction.atomic():
+            for references, ids in Blob._group_ids_by_count(blobs_id).items():
+                Blob.objects.filter(pk__in=ids).update(references=F('references') - references)
+            Blob.collect_garbage(set(blobs_id))
+
+    @staticmethod
+    def collect_garbage(blobs_id: Optional[set] = None) -> int:
+        """ Delete the blobs without references and his content. Return the number of blobs deleted """
+        from ..models import FilesystemOperation
+
+        unused_blobs = Blob.objects.select_for_update().filter(references=0)
+        if blobs_id is not None:
+            unused_blobs = unused_blobs.filter(pk__in=blobs_id)
+
+        with transaction.atomic():
+            paths = list(unused_blobs.values_list('pk', 'file'))
+            for _, path in paths:
+                filesystem_queue.enqueue(FilesystemOperation.REMOVE_FILE, os.path.join(settings.MEDIA_ROOT, path))
+            Blob.objects.filter(pk__in=[pk for pk, _ in paths]).delete()
+
+        return len(paths)
+
+    @staticmethod
+    def _group_ids_by_count(blobs_id: List[int]) -> dict:
+        ids_by_count = defaultdict(list)
+        for blob_id, references in Counter(blobs_id).items():
+            ids_by_count[references].append(blob_id)
+        return ids_by_count
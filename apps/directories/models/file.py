@@ -1,14 +1,23 @@
-from django.db import models
-from django.db.models import QuerySet
-from django.db.models.signals import pre_save
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Q, QuerySet, Sum, Value, When
+from django.db.models.functions import Coalesce, Concat
+from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.text import get_valid_filename
 
 from apps.core.models import BaseProjectModel
 
 from typing import TYPE_CHECKING, List, Set
 
-from ..models import Folder
+from ..models import Folder, Blob
 from ..utils.file_manager import FileManager
+from ..utils.filesystem_queue import filesystem_queue
+from ..utils.folder_aggregates import FolderAggregates
+from ..utils.name_index import NameIndex
+from ..utils.previews import preview_cache
+from ..utils.storage_backends import get_storage_backend
 
 import os
 
@@ -40,6 +49,31 @@ class File(BaseProjectModel):
     )
     name = models.CharField(max_length=255, verbose_name='Name of the file', blank=True)
     file = models.FileField(upload_to=get_upload_path)
+    blob = models.ForeignKey(
+        Blob,
+        verbose_name='Content of the file',
+        related_name='files',
+        null=True,
+        blank=True,
+        on_delete=models.PROTECT
+    )
+    trashed_root = models.ForeignKey(
+        Folder,
+        verbose_name='Trashed root folder',
+        related_name='trashed_files',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL
+    )
+    trashed_at = models.DateTimeField(verbose_name='Trashed at', null=True, blank=True)
+
+    tracked_fields = ('name', 'parent_folder_id')
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the files of a folder
+            models.Index(fields=['parent_folder', 'name', 'id'], name='file_parent_name_idx'),
+        ]
 
     @staticmethod
     def get_all_files_by_user(user: 'User') -> QuerySet['File']:
@@ -68,6 +102,103 @@ class File(BaseProjectModel):
 
         return File.objects.filter(parent_folder__owner_user__pk=user.pk, name=name)
 
+    @staticmethod
+    def create_file_from_blob(parent_folder: 'Folder', name: str, blob: 'Blob') -> 'File':
+        """ Create a file in the folder received using a content already stored
+
+            Parameter:
+                parent_folder(Folder): folder where the file will be created
+                name(str): name of the file with his extension
+                blob(Blob): content of the file
+
+            Return
+                file(File): The new file created
+        """
+
+        with transaction.atomic():
+            Blob.add_references([blob.pk])
+            return File.objects.create(parent_folder=parent_folder, name=name, blob=blob, file=blob.file.name)
+
+    @staticmethod
+    def get_upload_name(content) -> str:
+        """ Return the name of the file of an uploaded content, valid to be used in his path """
+
+        return get_valid_filename(os.path.basename(content.name))
+
+    @staticmethod
+    def create_many_files(parent_folder: 'Folder', contents: List) -> List['File']:
+        """ Create many files in the folder received. The contents are written in parallel
+            and the details and files are inserted with one statement by table. If other upload
+            already created a file with the same path, FileExistsError or, with the filesystem
+            queue, the write of the content fails in the lane without replacing that file
+
+            Parameter:
+                parent_folder(Folder): folder where the files will be created
+                contents(List[File]): contents uploaded, with different names of the files of the folder
+
+            Return
+                files(List[File]): The new files created
+        """
+        names = [File.get_upload_name(content) for content in contents]
+        written_paths = []
+        blobs = []
+
+        try:
+            with transaction.atomic():
+                if settings.CONTENT_ADDRESSED_STORAGE:
+                    blobs = Blob.store_many_contents(contents)
+                    paths = [blob.file.name for blob in blobs]
+                else:
+                    # The path of the folder is resolved once for all the files. The contents are
+                    # only created if the paths do not exist, other upload could use the same names
+                    folder_path = parent_folder.get_path_folder()
+                    paths = [f'{folder_path}/{name}' for name in names]
+                    written_paths = filesystem_queue.write_many(
+                        [(os.path.join(settings.MEDIA_ROOT, path), content) for path, content in zip(paths, contents)]
+                    )
+                    blobs = [None] * len(contents)
+
+                details = Detail.objects.bulk_create([
+                    Detail(type=os.path.splitext(name)[1].replace('.', ''), size=content.size)
+                    for name, content in zip(names, contents)
+                ])
+                files = File.objects.bulk_create([
+                    File(parent_folder=parent_folder, details=detail, name=name, file=path, blob=blob)
+                    for name, path, blob, detail in zip(names, paths, blobs, details)
+                ])
+                # The signals of the files are not sent by bulk_create
+                FolderAggregates.add_files_rows(rows_added=[
+                    (parent_folder.path, True, None, sum(detail.size for detail in details), len(files))
+                ])
+        except Exception:
+            for path in written_paths:
+                get_storage_backend().remove_file(path)
+            if settings.CONTENT_ADDRESSED_STORAGE:
+                Blob.remove_unsaved_contents(blobs)
+            raise
+
+        NameIndex.invalidate(parent_folder.owner_user_id)
+        for file in files:
+            preview_cache.generate_after_upload(file)
+        return files
+
+    @staticmethod
+    def get_trashed_files_by_user(user: 'User') -> QuerySet['File']:
+        """ Return the files moved to the recycle bin by the user, without the files
+            that were disabled together with a folder
+
+            Parameter:
+                user(User): user used to make the search
+
+            Return
+                files(QuerySet['File']): Files in the top level of the recycle bin
+        """
+
+        return File.get_all_files_by_user(user).filter(
+            is_active=False,
+            trashed_at__isnull=False
+        ).select_related('details')
+
     @staticmethod
     def get_all_files_by_user_and_list_ids(user: 'User', list_ids: List['int']) -> QuerySet['File']:
         """ Return all the files in all folders of a user received and a list of ids
@@ -121,10 +252,31 @@ class File(BaseProjectModel):
         """
         return set(File.get_elements_by_list_id(list_ids).values_list('parent_folder__pk', flat=True))
 
+    @staticmethod
+    def get_conflicting_names(files_ids: List[int], folder: 'Folder') -> Set[str]:
+        """ Return the names that the files would repeat if they are moved to the folder, between
+            them or with the files of the folder, with one query
+
+            Parameter:
+                files_ids(List[int]): list of ids of the files to move
+                folder(Folder): destination folder
+
+            Return
+                names(Set[str]): names repeated
+        """
+
+        return set(
+            File.objects.filter(Q(pk__in=files_ids) | Q(parent_folder=folder)).order_by().values('name').annotate(
+                total=Count('pk')
+            ).filter(total__gt=1).values_list('name', flat=True)
+        )
+
     @staticmethod
     def move_many_files_into_another_folder(files_ids: List[int], new_parent_folder: 'Folder') -> bool:
         """
-            Move a files into another folder and return if the result of the action.
+            Move a files into another folder and return if the result of the action. The parent
+            folder and the paths of all the files are changed with one UPDATE, and the files are
+            moved in the media in parallel after the commit
 
             Parameters:
                 files_ids(List[int]): The list of ids files to be moved
@@ -133,12 +285,35 @@ class File(BaseProjectModel):
             Return:
                 result(bool): True if success or False otherwise
         """
+        from ..models import FilesystemOperation
+
         try:
             files_to_move = File.get_elements_by_list_id(files_ids)
-            for file in files_to_move:
-                file_manager = FileManager(file)
-                file_manager._update_file_paths_by_parent_folders(file.parent_folder)
-                file.save()
+            new_prefix = f'{new_parent_folder.get_path_folder()}/'
+
+            with transaction.atomic():
+                if File.get_conflicting_names(files_ids, new_parent_folder):
+                    return False
+
+                # The content addressed files keep the path of his blob
+                moved_paths = [
+                    (os.path.join(settings.MEDIA_ROOT, path), os.path.join(settings.MEDIA_ROOT, f'{new_prefix}{name}'))
+                    for path, name in files_to_move.filter(blob__isnull=True).values_list('file', 'name')
+                    if path != f'{new_prefix}{name}'
+                ]
+                rows_removed = FolderAggregates.get_files_rows(files_to_move)
+
+                files_to_move.update(
+                    parent_folder=new_parent_folder,
+                    file=Case(
+                        When(blob__isnull=True, then=Concat(Value(new_prefix), F('name'))),
+                        default=F('file'),
+                        output_field=models.CharField()
+                    )
+                )
+
+                FolderAggregates.add_files_rows(rows_removed, FolderAggregates.get_files_rows(files_to_move))
+                filesystem_queue.enqueue_many(FilesystemOperation.MOVE, moved_paths)
             return True
         except Exception:
             return False
@@ -157,11 +332,27 @@ class File(BaseProjectModel):
         """
         try:
             files_to_disable = File.get_elements_by_list_id(files_id)
-            files_to_disable.update(is_active=False)
+            with transaction.atomic():
+                rows_removed = FolderAggregates.get_files_rows(files_to_disable)
+                files_to_disable.update(is_active=False, trashed_at=timezone.now())
+                FolderAggregates.add_files_rows(rows_removed, FolderAggregates.get_files_rows(files_to_disable))
             return True
         except Exception:
             return False
 
+    @staticmethod
+    def get_trashed_size(files_id: List[int]) -> int:
+        """
+            Return the bytes of the files of the list that are in the recycle bin, they are
+            counted again in the storage quota when they are recovered
+
+            Parameters:
+                files_id(List[int]): The list of ids files to be recovered
+        """
+        return File.objects.filter(pk__in=files_id, is_active=False).aggregate(
+            size=Coalesce(Sum('details__size'), 0)
+        )['size']
+
     @staticmethod
     def recover_many_files(files_id: List[int]) -> bool:
         """
@@ -176,7 +367,10 @@ class File(BaseProjectModel):
         """
         try:
             files_to_disable = File.get_elements_by_list_id(files_id)
-            files_to_disable.update(is_active=True)
+            with transaction.atomic():
+                rows_removed = FolderAggregates.get_files_rows(files_to_disable)
+                files_to_disable.update(is_active=True, trashed_root=None, trashed_at=None)
+                FolderAggregates.add_files_rows(rows_removed, FolderAggregates.get_files_rows(files_to_disable))
             return True
         except Exception:
             return False
@@ -211,19 +405,52 @@ class File(BaseProjectModel):
     def get_full_path(self) -> str:
         """ Return the full path of the file """
 
+        if self.is_content_addressed():
+            return os.path.join(settings.MEDIA_ROOT, self.file.name)
+
         return f'{self.parent_folder.get_absolute_path_folder()}/{self.get_full_name()}'
 
+    def is_content_addressed(self) -> bool:
+        """ Return if the content of the file is stored in a blob shared by hash """
+
+        return self.blob_id is not None
+
+    def get_loaded_file(self) -> 'File':
+        """ Return the file with the name and the parent folder that it had when it was loaded """
+        try:
+            old_file = File(
+                pk=self.pk,
+                name=self.get_loaded_value('name'),
+                parent_folder_id=self.get_loaded_value('parent_folder_id'),
+                details_id=self.details_id,
+                blob_id=self.blob_id
+            )
+        except KeyError:
+            return File.get_by_id(self.pk)
+
+        if old_file.parent_folder_id == self.parent_folder_id:
+            old_file.parent_folder = self.parent_folder
+        return old_file
+
     def save(self, **kwargs):
-        # here we use os.rename then change the name of the file
-        # add condition to do this, I suggest requerying the model
-        # and checking if label is different
-        if self.pk:  # Need this to mitigate error using self.pk
+        # The paths only change when the name or the parent folder changed since
+        # the file was loaded, the other changes are saved with a plain UPDATE
+        if self.pk and self.has_changed('name', 'parent_folder_id'):
 
-            old_file = File.get_by_id(self.pk)
+            old_file = self.get_loaded_file()
 
             file_manager = FileManager(self, old_file)
             file_manager._process_save()
 
+            if old_file.parent_folder_id != self.parent_folder_id:
+                # The file is counted by the folders of his new parent folder
+                file_row = File.objects.filter(pk=self.pk)
+                with transaction.atomic():
+                    rows_removed = FolderAggregates.get_files_rows(file_row)
+                    super(File, self).save(**kwargs)
+                    FolderAggregates.add_files_rows(rows_removed, FolderAggregates.get_files_rows(file_row))
+                return
+
         return super(File, self).save(**kwargs)
 
 
@@ -231,12 +458,39 @@ class File(BaseProjectModel):
 def pre_save_assign_root_folder(sender, instance, update_fields, *args, **kwargs):
 
     if instance.pk is None:
-        name_file, extension = os.path.splitext(instance.file.name)
-        instance.name = f'{name_file}{extension}'
+        if not instance.name:
+            instance.name = instance.file.name
+        _, extension = os.path.splitext(instance.name)
+
+        if instance.blob_id is None and settings.CONTENT_ADDRESSED_STORAGE:
+            instance.blob = Blob.store_content(instance.file)
+            instance.file = instance.blob.file.name
+
         detail = Detail.objects.create(
             type=extension.replace('.', ''),
-            size=instance.file.size
+            size=instance.blob.size if instance.is_content_addressed() else instance.file.size
         )
         instance.details = detail
     else:
         instance.name = instance.get_full_name()
+
+
+@receiver(post_save, sender=File)
+def post_save_count_file_in_folders(sender, instance, created, *args, **kwargs):
+    if created:
+        FolderAggregates.add_files_rows(rows_added=[
+            (instance.parent_folder.path, instance.is_active, None, instance.details.size, 1)
+        ])
+
+
+@receiver(post_save, sender=File)
+def post_save_generate_thumbnail(sender, instance, created, *args, **kwargs):
+    if created:
+        preview_cache.generate_after_upload(instance)
+
+
+@receiver(post_save, sender=File)
+def invalidate_name_index_of_file(sender, instance, created, *args, **kwargs):
+    # The deleted files are discarded when the matches are read from the database
+    if created or instance.has_changed('name', 'parent_folder_id'):
+        NameIndex.invalidate(instance.parent_folder.owner_user_id)
@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.models import BaseProjectModel
+
+
+class FilesystemOperation(BaseProjectModel):
+    CREATE_FOLDER = 'create_folder'
+    MOVE = 'move'
+    REMOVE_FILE = 'remove_file'
+    REMOVE_TREE = 'remove_tree'
+    WRITE_FILE = 'write_file'
+
+    OPERATIONS = (
+        (CREATE_FOLDER, 'Create folder'),
+        (MOVE, 'Move or rename'),
+        (REMOVE_FILE, 'Remove file'),
+        (REMOVE_TREE, 'Remove folder tree'),
+        (WRITE_FILE, 'Write an uploaded content'),
+    )
+
+    PENDING = 'pending'
+    FAILED = 'failed'
+
+    STATUSES = (
+        (PENDING, 'Pending'),
+        (FAILED, 'Failed'),
+    )
+
+    operation = models.CharField(max_length=20, choices=OPERATIONS, verbose_name='Operation')
+    source = models.TextField(verbose_name='Source path')
+    destination = models.TextField(verbose_name='Destination path', blank=True, default='')
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING, db_index=True, verbose_name='Status')
+    error = models.TextField(verbose_name='Error', blank=True, default='')
+    # Folder of the user inside the media, the operations of a lane are applied in order
+    lane = models.CharField(max_length=255, db_index=True, blank=True, default='', verbose_name='Lane')
+    # Operations registered together that do not depend between them
+    batch = models.UUIDField(null=True, blank=True, verbose_name='Batch')
+
+    def __str__(self):
+        return f'{self.operation}: {self.source} {self.destination}'.strip()
+
+
+class FilesystemLane(BaseProjectModel):
+    """ Lease of a lane of the journal, only the process that holds it applies the operations of the lane """
+
+    key = models.CharField(max_length=255, unique=True, verbose_name='Key')
+    claimed_until = models.DateTimeField(null=True, blank=True, verbose_name='Claimed until')
+
+    def __str__(self):
+        return self.key
+
+    @classmethod
+    def claim(cls, key: str) -> bool:
+        """
+            Take the lease of a lane if nobody holds it or it expired
+
+            Parameters:
+                key(str): key of the lane
+            Return:
+                bool: if the lease was taken
+        """
+        if not cls.objects.filter(key=key).exists():
+            try:
+                with transaction.atomic():
+                    cls.objects.create(key=key)
+            except IntegrityError:
+                pass
+
+        now = timezone.now()
+        return cls.objects.filter(Q(claimed_until__isnull=True) | Q(claimed_until__lt=now), key=key).update(
+            claimed_until=now + timedelta(seconds=settings.FILESYSTEM_QUEUE_LEASE_SECONDS)
+        ) == 1
+
+    @classmethod
+    def renew(cls, key: str) -> None:
+        cls.objects.filter(key=key).update(
+            claimed_until=timezone.now() + timedelta(seconds=settings.FILESYSTEM_QUEUE_LEASE_SECONDS)
+        )
+
+    @classmethod
+    def release(cls, key: str) -> None:
+        cls.objects.filter(key=key).update(claimed_until=None)
@@ -1,18 +1,26 @@
 from django.db import models
-from django.db.models import QuerySet
-from django.db.models.signals import pre_save
+from django.db import connection, transaction
+from django.db.models import Case, F, Q, QuerySet, Sum, Value, When
+from django.db.models.functions import Coalesce, Concat, Substr
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.conf import settings
+from django.utils import timezone
 
 
 from apps.core.models import BaseProjectModel
 
+from ..utils.folder_aggregates import FolderAggregates
 from ..utils.folder_manager import (FolderManager,
                                     move_folders_in_media)
+from ..utils.name_index import NameIndex
+from ..utils.ownership_index import OwnershipIndex
 
 from treebeard.mp_tree import MP_Node
 
-from typing import List, Optional, TYPE_CHECKING, Set
+from typing import Dict, List, Optional, TYPE_CHECKING, Set
+
+import os
 
 
 if TYPE_CHECKING:
@@ -35,12 +43,29 @@ class Folder(MP_Node, BaseProjectModel):
     )
     name = models.CharField(max_length=255, verbose_name='Name')
     route = models.CharField(max_length=255, verbose_name='Path of entity')
+    physical_path = models.TextField(verbose_name='Physical path', blank=True, default='')
     old_name = models.CharField(max_length=255, verbose_name='Old name', default='')
+    trashed_root = models.ForeignKey(
+        'self',
+        verbose_name='Trashed root folder',
+        related_name='trashed_folders',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL
+    )
+    trashed_at = models.DateTimeField(verbose_name='Trashed at', null=True, blank=True)
+    total_size = models.BigIntegerField(verbose_name='Bytes of the files inside', default=0)
+    total_files = models.BigIntegerField(verbose_name='Files inside', default=0)
+    total_folders = models.BigIntegerField(verbose_name='Descendant folders', default=0)
 
     node_order_by = ['name']
+    tracked_fields = ('name',)
 
     class Meta:
         unique_together = ('path', 'name')
+        indexes = [
+            models.Index(fields=['path'], name='folder_path_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ]
 
     def __str__(self):
         return 'Category: {}'.format(self.name)
@@ -59,7 +84,11 @@ class Folder(MP_Node, BaseProjectModel):
                 root(Folder): The new folder created
         """
 
-        return parent_folder.add_child(owner_user=owner_user, name=name)
+        return parent_folder.add_child(
+            owner_user=owner_user,
+            name=name,
+            physical_path=parent_folder.get_child_path_folder(name)
+        )
 
     @staticmethod
     def create_root_folder_to_created_user(user: 'User') -> 'Folder':
@@ -73,7 +102,12 @@ class Folder(MP_Node, BaseProjectModel):
                 root(Folder): The root folder created
         """
 
-        return Folder.add_root(owner_user=user, name=settings.ROOT_NAME_FOLDER, route=settings.ROOT_NAME_FOLDER)
+        return Folder.add_root(
+            owner_user=user,
+            name=settings.ROOT_NAME_FOLDER,
+            route=f'{user.pk}/',
+            physical_path=f'{user.pk}'
+        )
 
     @staticmethod
     def get_root_folder_by_user(user: 'User') -> Optional['Folder']:
@@ -101,23 +135,15 @@ class Folder(MP_Node, BaseProjectModel):
                 folder(Folder): The folder to be moved
                 new_parent_folder(Folder): The new parent folder where it will be moved
         """
-        try:
-            folder.move(new_parent_folder, pos='sorted-child')
-            old_path = folder.get_path_folder()
-
-            folder_update = Folder.objects.filter(pk=folder.pk)
-            folder_update.update(route=f'{new_parent_folder.route}{new_parent_folder.name}/')
-
-            folder_update.first().update_route_parent_folder_and_children()
-            move_folders_in_media(old_path, folder_update.first().get_path_folder())
-            return True
-        except Exception:
-            return False
+        return Folder.move_many_folder_into_another([folder.pk], new_parent_folder)
 
     @staticmethod
     def move_many_folder_into_another(folders_id: List[int], new_parent_folder: 'Folder') -> bool:
         """
-            Move a Folder with all its contents into another and return if the result of the action.
+            Move many folders with all its contents into another in one transaction, if any
+            folder can not be moved none of them is moved. The folders inside other moved
+            folder are moved with it, so every folder moved is renamed once in the media
+            and the files inside them are not changed one by one
 
             Parameters:
                 folders_id(List[int]): The list of ids folder to be moved
@@ -126,18 +152,88 @@ class Folder(MP_Node, BaseProjectModel):
             Return:
                 result(bool): True if success or False otherwise
         """
-        from apps.directories.models import File
-
         try:
-            folders_to_move = Folder.get_elements_by_list_id(folders_id)
-            for folder in folders_to_move:
-                Folder.move_folder_into_another(folder, new_parent_folder)
-                id_files_in_folder = list(folder.get_all_files().values_list('pk', flat=True))
-                File.move_many_files_into_another_folder(id_files_in_folder, new_parent_folder)
+            with transaction.atomic():
+                roots = []
+                for folder in Folder.get_elements_by_list_id(folders_id).order_by('path'):
+                    if not any(folder.path.startswith(root.path) for root in roots):
+                        roots.append(folder)
+
+                names = [folder.name for folder in roots]
+                if len(names) != len(set(names)):
+                    raise ValueError('The folders to be moved must have different names')
+
+                roots_ids = [folder.pk for folder in roots]
+                FolderAggregates.add_folders_rows(
+                    rows_removed=FolderAggregates.get_folders_rows(Folder.objects.filter(pk__in=roots_ids))
+                )
+
+                old_paths = {}
+                for folder in roots:
+                    # The moves change the paths of the tree, every move reads them again
+                    folder = Folder.objects.get(pk=folder.pk)
+                    old_paths[folder.pk] = folder.get_path_folder()
+                    folder.move(Folder.objects.get(pk=new_parent_folder.pk), pos='sorted-child')
+
+                moved_folders = list(Folder.objects.filter(pk__in=roots_ids))
+                FolderAggregates.add_folders_rows(
+                    rows_added=FolderAggregates.get_folders_rows(Folder.objects.filter(pk__in=roots_ids))
+                )
+                Folder._update_paths_moved_subtrees(moved_folders, old_paths, new_parent_folder.get_path_folder())
+
+                move_folders_in_media([
+                    (old_paths[folder.pk], new_parent_folder.get_child_path_folder(folder.name))
+                    for folder in moved_folders
+                ])
+
+            OwnershipIndex.invalidate(new_parent_folder.owner_user_id)
             return True
         except Exception:
             return False
 
+    @staticmethod
+    def _update_paths_moved_subtrees(folders: List['Folder'], old_paths: Dict[int, str], new_parent_path: str) -> None:
+        """
+            Rewrite the paths of many moved folders, their descendants and the files inside
+            them with one UPDATE by table
+
+            Parameters:
+                folders(List[Folder]): The moved folders, already in the new parent folder
+                old_paths(Dict[int, str]): path of every folder before be moved, by id
+                new_parent_path(str): path of the new parent folder
+        """
+        from ..models import File
+
+        folders_routes, folders_physical_paths, files_paths = [], [], []
+        folders_filter, files_filter = Q(), Q()
+
+        for folder in folders:
+            new_path = f'{new_parent_path}/{folder.name}'
+            new_prefix = Value(f'{new_path}/')
+            old_prefix = f'{old_paths[folder.pk]}/'
+            start_suffix = len(old_prefix) + 1
+
+            folders_routes.append(When(pk=folder.pk, then=Value(f'{new_parent_path}/')))
+            folders_physical_paths.append(When(pk=folder.pk, then=Value(new_path)))
+            folders_routes.append(
+                When(path__startswith=folder.path, then=Concat(new_prefix, Substr('route', start_suffix)))
+            )
+            folders_physical_paths.append(
+                When(path__startswith=folder.path, then=Concat(new_prefix, Substr('physical_path', start_suffix)))
+            )
+            files_paths.append(When(file__startswith=old_prefix, then=Concat(new_prefix, Substr('file', start_suffix))))
+
+            folders_filter |= Q(path__startswith=folder.path)
+            files_filter |= Q(parent_folder__path__startswith=folder.path, file__startswith=old_prefix)
+
+        Folder.objects.filter(folders_filter).update(
+            route=Case(*folders_routes, default=F('route'), output_field=models.CharField()),
+            physical_path=Case(*folders_physical_paths, default=F('physical_path'), output_field=models.TextField())
+        )
+        File.objects.filter(files_filter).update(
+            file=Case(*files_paths, default=F('file'), output_field=models.CharField())
+        )
+
     @staticmethod
     def delete_many_folder_and_children(folders_id: List[int]) -> bool:
         """
@@ -149,15 +245,26 @@ class Folder(MP_Node, BaseProjectModel):
             Return:
                 result(bool): True if success or False otherwise
         """
-        from apps.directories.models import File
+        from apps.directories.models import Blob, File
 
         try:
-            folders_to_disable = Folder.get_elements_by_list_id(folders_id)
-            for folder in folders_to_disable:
-                folder_manager = FolderManager(folder)
-                folder_manager._delete_folder()
-                id_files_in_folder = list(folder.get_all_files().values_list('pk', flat=True))
-                File.delete_many_files(id_files_in_folder)
+            with transaction.atomic():
+                blobs_id = []
+                folders_to_disable = Folder.get_elements_by_list_id(folders_id)
+                for folder in folders_to_disable:
+                    blobs_id += File.objects.filter(
+                        parent_folder__path__startswith=folder.path,
+                        blob__isnull=False
+                    ).values_list('blob_id', flat=True)
+                    FolderAggregates.remove_folder(folder.pk)
+
+                    folder_manager = FolderManager(folder)
+                    folder_manager._delete_folder()
+                    id_files_in_folder = list(folder.get_all_files().values_list('pk', flat=True))
+                    File.delete_many_files(id_files_in_folder)
+
+                # The blobs are protected while a file uses them
+                Blob.release_many(blobs_id)
             return True
         except Exception:
             return False
@@ -203,6 +310,26 @@ class Folder(MP_Node, BaseProjectModel):
             print(e)
             return False
 
+    @staticmethod
+    def get_trashed_size(folders_id: List[int]) -> int:
+        """
+            Return the bytes of the files that the recovery of the folders activates, they are
+            counted again in the storage quota when they are recovered
+
+            Parameters:
+                folders_id(List[int]): The list of ids folder to be recovered from the recycle bin
+        """
+        from ..models import File
+
+        trashed_content = Q(pk__in=[])
+        for folder in Folder.get_elements_by_list_id(folders_id).filter(is_active=False):
+            trashed_content |= Q(
+                parent_folder__path__startswith=folder.path,
+                trashed_root_id=folder.trashed_root_id or folder.pk
+            )
+
+        return File.objects.filter(trashed_content).aggregate(size=Coalesce(Sum('details__size'), 0))['size']
+
     @staticmethod
     def recover_many_folder_and_children(folders_id: List[int]) -> bool:
         """
@@ -217,13 +344,30 @@ class Folder(MP_Node, BaseProjectModel):
         """
 
         try:
-            folders_to_disable = Folder.get_elements_by_list_id(folders_id)
-            for folder in folders_to_disable:
-                folder.activate_folder_and_children()
+            with transaction.atomic():
+                # The ancestors are recovered before, so their descendants can be recovered after them
+                folders_to_recover = Folder.get_elements_by_list_id(folders_id).order_by('path')
+                for folder in folders_to_recover:
+                    folder.activate_folder_and_children()
             return True
         except Exception:
             return False
 
+    @staticmethod
+    def get_trashed_folders_by_user(user: 'User') -> QuerySet['Folder']:
+        """
+            Return the folders moved to the recycle bin by the user, without the
+            descendants that were disabled together with them
+
+            Parameters:
+                user(User): user used to make the search
+
+            Return:
+                folders(QuerySet['Folder']): Folders in the top level of the recycle bin
+        """
+
+        return Folder.objects.filter(owner_user=user, is_active=False, trashed_at__isnull=False)
+
     @staticmethod
     def get_all_name_files_in_folder_group(list_ids: List[int]) -> List[str]:
         """
@@ -280,17 +424,10 @@ class Folder(MP_Node, BaseProjectModel):
             Return:
                 path(str): path of the parent folder
         """
-        user_path = f'{self.owner_user.pk}'
-        ancestors = self.get_ancestors_folder()
-
-        list_path = [user_path]
-
-        if ancestors:
-            list_path = list_path + ancestors[1::]
-
-        path_folder = "/".join(list_path)
+        if self.is_root():
+            return self.physical_path
 
-        return path_folder
+        return self.physical_path.rsplit('/', 1)[0]
 
     def get_path_folder(self) -> str:
         """
@@ -299,10 +436,19 @@ class Folder(MP_Node, BaseProjectModel):
             Return:
                 path(str): path of the folder
         """
-        path = self.get_path_parent_folder()
-        if self.is_root() is False:
-            return f'{path}/{self.name}'
-        return path
+        return self.physical_path
+
+    def get_child_path_folder(self, name: str) -> str:
+        """
+            Return the path that a child folder with the name received would have
+
+            Parameters:
+                name(str): name of the child folder
+
+            Return:
+                path(str): path of the child folder
+        """
+        return f'{self.physical_path}/{name}'
 
     def get_absolute_path_folder(self) -> str:
         """
@@ -311,45 +457,121 @@ class Folder(MP_Node, BaseProjectModel):
             Return:
                 path(str): absolute path of the folder
         """
-        media = settings.MEDIA_ROOT
-        path = f'{media}{self.get_path_folder()}'
+        return os.path.join(settings.MEDIA_ROOT, self.get_path_folder())
 
-        return path
-
-    def update_route_parent_folder_and_children(self) -> None:
+    def update_route_parent_folder_and_children(self, old_path_folder: str) -> None:
         """
-            Update the path of the actual folder and his children. This method
-            is used when the folder change his name or is moved
+            Update the paths of the descendants folders and the files inside the actual
+            folder and his descendants. This method is used when the folder change his
+            name or is moved, all the subtree is rewritten with a fixed number of statements
+
+            Parameters:
+                old_path_folder(str): path of the folder before change his name or be moved
         """
 
-        children_folders = self.get_children()
-        children_folders.update(route=f'{self.route}{self.name}/')
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                self._update_paths_subtree_postgresql(old_path_folder)
+            else:
+                self._update_paths_subtree(old_path_folder)
+
+    def _update_paths_subtree(self, old_path_folder: str) -> None:
+        """ Rewrite the prefix of the paths of the subtree with one UPDATE by table """
+        from ..models import File
 
-        if self.get_children_count() > 0:
-            for children in children_folders:
-                children.update_route_parent_folder_and_children()
+        new_prefix = f'{self.get_path_folder()}/'
+        start_suffix = len(old_path_folder) + 2
+
+        Folder.objects.filter(path__startswith=self.path, depth__gt=self.depth).update(
+            route=Concat(Value(new_prefix), Substr('route', start_suffix)),
+            physical_path=Concat(Value(new_prefix), Substr('physical_path', start_suffix))
+        )
+        File.objects.filter(
+            parent_folder__path__startswith=self.path,
+            file__startswith=f'{old_path_folder}/'
+        ).update(file=Concat(Value(new_prefix), Substr('file', start_suffix)))
+
+    def _update_paths_subtree_postgresql(self, old_path_folder: str) -> None:
+        """ Rewrite the prefix of the paths of the subtree folders and files in one statement """
+        from ..models import File
+
+        new_prefix = f'{self.get_path_folder()}/'
+        old_prefix = f'{old_path_folder}/'
+        start_suffix = len(old_path_folder) + 2
+
+        query = f"""
+            WITH updated_folders AS (
+                UPDATE {Folder._meta.db_table}
+                SET route = %(new_prefix)s || substr(route, %(start_suffix)s),
+                    physical_path = %(new_prefix)s || substr(physical_path, %(start_suffix)s)
+                WHERE path LIKE %(tree_prefix)s AND depth > %(depth)s
+            )
+            UPDATE {File._meta.db_table} AS file
+            SET file = %(new_prefix)s || substr(file.file, %(start_suffix)s)
+            FROM {Folder._meta.db_table} AS folder
+            WHERE file.parent_folder_id = folder.id
+                AND folder.path LIKE %(tree_prefix)s
+                AND left(file.file, %(length_old_prefix)s) = %(old_prefix)s
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute(query, {
+                'new_prefix': new_prefix,
+                'old_prefix': old_prefix,
+                'length_old_prefix': len(old_prefix),
+                'start_suffix': start_suffix,
+                'tree_prefix': f'{self.path}%',
+                'depth': self.depth,
+            })
 
     def disable_folder_and_children(self) -> None:
-        """ Disable the actual folder an his children"""
+        """ Disable the actual folder, his children and the files inside them. All the elements
+            disabled are marked with the actual folder as the root of the trash """
         from ..models import File
 
-        folder = Folder.get_element_by_id_like_queryset(self.pk)
-        folder.update(is_active=False)
-        self.get_descendants().update(is_active=False)
-        for folder in self.get_descendants():
-            id_files_in_folder = list(folder.get_all_files().values_list('pk', flat=True))
-            File.disabled_many_files(id_files_in_folder)
+        with transaction.atomic():
+            FolderAggregates.add_folder_contribution(self.pk, -1)
+            Folder.objects.filter(path__startswith=self.path, is_active=True).update(
+                is_active=False,
+                trashed_root=self
+            )
+            Folder.get_element_by_id_like_queryset(self.pk).update(trashed_at=timezone.now())
+            File.objects.filter(parent_folder__path__startswith=self.path, is_active=True).update(
+                is_active=False,
+                trashed_root=self
+            )
+            FolderAggregates.add_folder_contribution(self.pk)
+
+    def is_recoverable(self) -> bool:
+        """ Return if the folder can be recovered from the recycle bin. The folders moved to the
+            recycle bin inside another folder are only recovered with it, so an active folder is
+            never inside a trashed one """
+        if self.trashed_root_id not in (None, self.pk):
+            return False
+        return self.is_root() or self.get_parent(update=True).is_active
 
     def activate_folder_and_children(self) -> None:
-        """ Activate the actual folder an his children"""
+        """ Activate the actual folder, his children and the files inside them that were
+            disabled together with the actual folder """
         from ..models import File
 
-        folder = Folder.get_element_by_id_like_queryset(self.pk)
-        folder.update(is_active=True)
-        self.get_descendants().update(is_active=True)
-        for folder in self.get_descendants():
-            id_files_in_folder = list(folder.get_all_files().values_list('pk', flat=True))
-            File.recover_many_files(id_files_in_folder)
+        if not self.is_recoverable():
+            raise ValueError('The folder is inside a folder of the recycle bin')
+
+        trashed_root_id = self.trashed_root_id or self.pk
+        trashed_root_path = self.trashed_root.path if self.trashed_root_id else self.path
+
+        with transaction.atomic():
+            FolderAggregates.recover_folder(self.path, trashed_root_id, trashed_root_path)
+            Folder.objects.filter(path__startswith=self.path, trashed_root_id=trashed_root_id).update(
+                is_active=True,
+                trashed_root=None,
+                trashed_at=None
+            )
+            File.objects.filter(parent_folder__path__startswith=self.path, trashed_root_id=trashed_root_id).update(
+                is_active=True,
+                trashed_root=None
+            )
 
     def get_all_files(self) -> QuerySet['File']:
         """ Return all files associated to the actual folder """
@@ -382,6 +604,32 @@ def pre_save_assign_root_folder(sender, instance, update_fields, *args, **kwargs
     folder_manager._execute_pre_save_function()
 
 
+@receiver(post_save, sender=Folder)
+def post_save_invalidate_ownership_index(sender, instance, created, *args, **kwargs):
+    if created:
+        OwnershipIndex.invalidate(instance.owner_user_id)
+
+
+@receiver(post_save, sender=Folder)
+def post_save_count_folder_in_ancestors(sender, instance, created, *args, **kwargs):
+    if created:
+        FolderAggregates.add(FolderAggregates.get_counting_paths(
+            FolderAggregates.get_parent_path(instance.path), instance.is_active
+        ), folders=1)
+
+
+@receiver(post_delete, sender=Folder)
+def post_delete_invalidate_ownership_index(sender, instance, *args, **kwargs):
+    OwnershipIndex.invalidate(instance.owner_user_id)
+
+
+@receiver(post_save, sender=Folder)
+def invalidate_name_index_of_folder(sender, instance, created, *args, **kwargs):
+    # The deleted folders are discarded when the matches are read from the database
+    if created or instance.has_changed('name'):
+        NameIndex.invalidate(instance.owner_user_id)
+
+
 class Collaboration(BaseProjectModel):
     user = models.ForeignKey('users.User',
         verbose_name='Collaborator user',
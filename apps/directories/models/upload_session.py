@@ -0,0 +1,190 @@
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import models, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from apps.core.models import BaseProjectModel
+
+from datetime import timedelta
+from typing import IO, TYPE_CHECKING, List, Optional, Tuple
+
+from ..models import Folder
+from ..utils.storage_quota import StorageQuota
+
+import os
+
+if TYPE_CHECKING:
+    from apps.users.models import User
+    from ..models import File
+
+
+class SessionUploadedFile(UploadedFile):
+    """ Content of a finished upload session, assembled in a temporary file """
+
+    def __init__(self, path: str, name: str, size: int) -> None:
+        super().__init__(open(path, 'rb'), name, 'application/octet-stream', size)
+        self.path = path
+
+    def temporary_file_path(self) -> str:
+        return self.path
+
+
+class UploadSession(BaseProjectModel):
+    owner_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name='Owner user',
+        related_name='upload_sessions',
+        on_delete=models.CASCADE
+    )
+    parent_folder = models.ForeignKey(
+        Folder,
+        verbose_name='Parent folder',
+        related_name='upload_sessions',
+        on_delete=models.CASCADE
+    )
+    name = models.CharField(max_length=255, verbose_name='Name of the file')
+    size = models.PositiveBigIntegerField(verbose_name='Size of the file')
+
+    @staticmethod
+    def get_by_user_and_id(user: 'User', session_id: int) -> Optional['UploadSession']:
+        """ Return the upload session of the user
+
+            Parameter:
+                user(User): owner of the session
+                session_id(int): id of the session
+
+            Return
+                session(UploadSession): The session or None if the user does not have it
+        """
+        return UploadSession.objects.filter(owner_user_id=user.pk, pk=session_id).first()
+
+    @staticmethod
+    def create_session(user: 'User', parent_folder: Folder, name: str, size: int) -> 'UploadSession':
+        """ Create a session and reserve in disk the space of the file that will be uploaded. The
+            space in the quota of the user must be already reserved, it is released by the session """
+        try:
+            session = UploadSession.objects.create(owner_user=user, parent_folder=parent_folder, name=name, size=size)
+        except Exception:
+            StorageQuota.release(user.pk, size)
+            raise
+
+        os.makedirs(os.path.dirname(session.get_temporary_path()), exist_ok=True)
+        with open(session.get_temporary_path(), 'wb') as temporary_file:
+            temporary_file.truncate(size)
+
+        return session
+
+    @staticmethod
+    def get_expired_sessions() -> QuerySet['UploadSession']:
+        expiration_date = timezone.now() - timedelta(hours=settings.UPLOAD_SESSIONS_EXPIRATION_HOURS)
+        return UploadSession.objects.filter(updated_at__lte=expiration_date)
+
+    @staticmethod
+    def delete_expired_sessions() -> int:
+        """ Delete the sessions not updated in the expiration time. Return the number of sessions deleted """
+        total = 0
+        for session in UploadSession.get_expired_sessions():
+            session.cancel()
+            total += 1
+        return total
+
+    def get_temporary_path(self) -> str:
+        return os.path.join(settings.MEDIA_ROOT, settings.UPLOAD_SESSIONS_FOLDER, f'{self.pk}')
+
+    def write_chunk(self, offset: int, stream: IO[bytes], length: int) -> int:
+        """
+            Write a chunk of the file in his offset reading the stream by blocks, so the memory
+            used does not depend on the size of the chunk. The chunks can arrive in any order
+            and at the same time because every chunk writes only his own bytes
+
+            Parameters:
+                offset(int): position of the first byte of the chunk in the file
+                stream(IO[bytes]): body of the request with the bytes of the chunk
+                length(int): number of bytes of the chunk
+
+            Return:
+                written(int): number of bytes written
+        """
+        written = self.write_bytes(offset, stream, length)
+        self.register_chunk(offset, written)
+        return written
+
+    def write_bytes(self, offset: int, stream: IO[bytes], length: int) -> int:
+        """ Write the bytes of a chunk in the temporary file without register it in the database """
+        if offset < 0 or length <= 0 or offset + length > self.size:
+            raise ValueError('The chunk is outside of the file')
+
+        written = 0
+        descriptor = os.open(self.get_temporary_path(), os.O_WRONLY)
+        try:
+            while written < length:
+                block = stream.read(min(settings.UPLOAD_SESSIONS_BLOCK_SIZE, length - written))
+                if not block:
+                    break
+                os.pwrite(descriptor, block, offset + written)
+                written += len(block)
+        finally:
+            os.close(descriptor)
+
+        return written
+
+    def register_chunk(self, offset: int, written: int) -> None:
+        """ Register the bytes written in the offset of the file """
+        if written:
+            UploadChunk.objects.update_or_create(session=self, offset=offset, defaults={'size': written})
+            UploadSession.get_element_by_id_like_queryset(self.pk).update(updated_at=timezone.now())
+
+    def get_received_ranges(self) -> List[Tuple[int, int]]:
+        """ Return the ranges of bytes received joined like a list of (start, end) with the end excluded """
+        ranges: List[Tuple[int, int]] = []
+        for offset, size in self.chunks.order_by('offset').values_list('offset', 'size'):
+            if ranges and offset <= ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], offset + size))
+            else:
+                ranges.append((offset, offset + size))
+        return ranges
+
+    def is_complete(self) -> bool:
+        return self.get_received_ranges() == [(0, self.size)] or self.size == 0
+
+    def finalize(self) -> 'File':
+        """ Create the file in the folder of the session moving the content already assembled """
+        from ..models import File
+
+        temporary_path = self.get_temporary_path()
+        content = SessionUploadedFile(temporary_path, self.name, self.size)
+        try:
+            with transaction.atomic():
+                new_file = File.objects.create(parent_folder=self.parent_folder, file=content)
+                self.delete()
+                StorageQuota.release(self.owner_user_id, self.size)
+        finally:
+            content.close()
+
+        # The storage copied the content
+        self.remove_temporary_file(temporary_path)
+        return new_file
+
+    def remove_temporary_file(self, temporary_path: Optional[str] = None) -> None:
+        try:
+            os.remove(temporary_path or self.get_temporary_path())
+        except FileNotFoundError:
+            pass
+
+    def cancel(self) -> None:
+        self.remove_temporary_file()
+        with transaction.atomic():
+            self.delete()
+            StorageQuota.release(self.owner_user_id, self.size)
+
+
+class UploadChunk(models.Model):
+    session = models.ForeignKey(UploadSession, related_name='chunks', on_delete=models.CASCADE)
+    offset = models.PositiveBigIntegerField(verbose_name='Offset of the chunk')
+    size = models.PositiveBigIntegerField(verbose_name='Size of the chunk')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'offset'], name='upload_chunk_session_offset_unique')
+        ]
@@ -0,0 +1,120 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+import base64
+import json
+
+FOLDERS = 'folders'
+FILES = 'files'
+
+
+class KeysetPagination(BasePagination):
+    """
+        Pagination by the position of the last element of the page over the ordering (name, pk).
+        Every page is read with an index range scan, so the time to get a page does not depend
+        on how deep the client pages. The body is the same list of elements without pagination
+        and the cursor of the next page is sent in the Link header
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return settings.DIRECTORIES_PAGE_SIZE
+        return min(max(page_size, 1), settings.DIRECTORIES_MAX_PAGE_SIZE)
+
+    def decode_cursor(self, request) -> Optional[Dict[str, Any]]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            return {'kind': str(position['kind']), 'name': str(position['name']), 'pk': int(position['pk'])}
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, kind: str, element) -> str:
+        # The elements can be model instances or rows of a projection
+        if isinstance(element, dict):
+            name, pk = element['name'], element['pk']
+        else:
+            name, pk = element.name, element.pk
+        position = json.dumps({'kind': kind, 'name': name, 'pk': pk})
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    def get_page(self, queryset: QuerySet, position: Optional[Dict[str, Any]], page_size: int) -> Tuple[List, bool]:
+        """
+            Return the elements after the position received and if there are more elements
+
+            Parameters:
+                queryset(QuerySet): elements to paginate
+                position(Dict[str, Any]): name and pk of the last element of the previous page
+                page_size(int): number of elements of the page
+        """
+        if page_size <= 0:
+            return [], queryset.exists()
+
+        if position is not None:
+            queryset = queryset.filter(
+                Q(name__gt=position['name']) | Q(name=position['name'], pk__gt=position['pk'])
+            )
+        elements = list(queryset.order_by('name', 'pk')[:page_size + 1])
+        return elements[:page_size], len(elements) > page_size
+
+    def get_next_link(self, kind: str, element) -> str:
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(kind, element))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.next_link = None
+
+        position = self.decode_cursor(request)
+        elements, has_next = self.get_page(queryset, position, self.get_page_size(request))
+        if has_next:
+            self.next_link = self.get_next_link(FILES, elements[-1])
+
+        return elements
+
+    def paginate_folder_contents(self, folders: QuerySet, files: QuerySet, request) -> Tuple[List, List]:
+        """
+            Return a page with the children folders first and then the files of a folder.
+            The cursor keeps the kind of the last element to continue from it
+        """
+        self.request = request
+        self.next_link = None
+
+        position = self.decode_cursor(request)
+        page_size = self.get_page_size(request)
+
+        page_folders: List = []
+        if position is None or position['kind'] == FOLDERS:
+            page_folders, has_next = self.get_page(folders, position, page_size)
+            if has_next:
+                self.next_link = self.get_next_link(FOLDERS, page_folders[-1])
+                return page_folders, []
+            position = None
+
+        page_files, has_next = self.get_page(files, position, page_size - len(page_folders))
+        if has_next:
+            if page_files:
+                self.next_link = self.get_next_link(FILES, page_files[-1])
+            else:
+                self.next_link = self.get_next_link(FOLDERS, page_folders[-1])
+
+        return page_folders, page_files
+
+    def get_paginated_response(self, data):
+        headers = {'Link': f'<{self.next_link}>; rel="next"'} if self.next_link else None
+        return Response(data, headers=headers)
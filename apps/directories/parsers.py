@@ -0,0 +1,12 @@
+from rest_framework.parsers import BaseParser
+
+
+class ChunkParser(BaseParser):
+    """
+        Parser of the chunks of the resumable uploads. The body is left in the stream of the
+        request so the view reads it by blocks instead of load it in memory
+    """
+    media_type = 'application/offset+octet-stream'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return {}
@@ -30,17 +30,15 @@ class IsAuthenticatedOwnerFolderFileUser(permissions.IsAuthenticated):
     def has_permission(self, request, view) -> bool:
 
         if super().has_permission(request, view):
-            user_folders = request.user.get_all_folders().values_list('pk', flat=True)
-
             actual_folder = request.POST.get('parent_folder', None)
             if actual_folder is not None:
-                return int(actual_folder) in user_folders
+                return request.user.is_owner_folder(actual_folder)
 
         return super().has_permission(request, view)
 
     def has_object_permission(self, request, view, obj):
 
-        if not request.user.is_owner_file(obj.pk):
+        if not request.user.get_ownership_index().owns_file(obj):
             return False
 
         if request.method in permissions.SAFE_METHODS:
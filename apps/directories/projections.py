@@ -0,0 +1,49 @@
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+from django.db.models import QuerySet
+
+if TYPE_CHECKING:
+    from django.http import HttpRequest
+
+FOLDER_LISTING_FIELDS = ('pk', 'name', 'is_active', 'total_size', 'total_files', 'total_folders')
+FILE_LISTING_FIELDS = ('pk', 'name', 'file', 'parent_folder', 'details__type', 'details__size')
+
+
+def project_folders(folders: QuerySet) -> QuerySet:
+    """ Return the projection of the columns used in the listings of folders, the rows are already final """
+    return folders.values(*FOLDER_LISTING_FIELDS)
+
+
+def project_files(files: QuerySet) -> QuerySet:
+    """ Return the projection of the columns used in the listings of files with the details joined """
+    return files.values(*FILE_LISTING_FIELDS)
+
+
+def get_files_rows(files: Iterable[Dict[str, Any]], request: Optional['HttpRequest'] = None) -> List[Dict[str, Any]]:
+    """
+        Return the rows of a listing of files with the same format of the FileSerializer, built
+        from the projection of the files without create the model instances. The urls are built
+        from a prefix calculated once for the whole listing
+
+        Parameters:
+            files(Iterable[Dict[str, Any]]): projection of the files returned by project_files
+            request(HttpRequest): request used to build the absolute urls of the files
+
+        Return:
+            rows(List[Dict[str, Any]]): files like the FileSerializer returns them
+    """
+    from .models import File
+
+    storage = File._meta.get_field('file').storage
+    host = request.build_absolute_uri('/')[:-1] if request is not None else ''
+
+    return [
+        {
+            'pk': file['pk'],
+            'name': file['name'],
+            'file': f'{host}{storage.url(file["file"])}' if file['file'] else None,
+            'parent_folder': file['parent_folder'],
+            'details': {'type': file['details__type'], 'size': file['details__size']},
+        }
+        for file in files
+    ]
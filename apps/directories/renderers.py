@@ -0,0 +1,29 @@
+from django.core.serializers.json import DjangoJSONEncoder
+
+from rest_framework.renderers import BaseRenderer
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(BaseRenderer):
+    """
+        Renderer of JSON that uses orjson when it is installed. The listings are rendered
+        without indentation and without the checks of the JSONRenderer of rest framework
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if orjson is not None:
+            return orjson.dumps(data, default=str, option=orjson.OPT_PASSTHROUGH_DATACLASS)
+
+        return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
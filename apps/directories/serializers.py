@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
-from .models import Folder, File, Detail
+from .models import Folder, File, Detail, UploadSession
 
 
 class FolderCreateSerializer(serializers.ModelSerializer):
@@ -34,6 +34,13 @@ class FolderCreateSerializer(serializers.ModelSerializer):
         return data
 
 
+class TrashedFolderSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Folder
+        fields = ('pk', 'name', 'trashed_at')
+
+
 class DetailSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -69,3 +76,22 @@ class FileSerializer(serializers.ModelSerializer):
     class Meta:
         model = File
         fields = ['pk', 'name', 'file', 'parent_folder', 'details']
+
+
+class TrashedFileSerializer(FileSerializer):
+
+    class Meta:
+        model = File
+        fields = ['pk', 'name', 'file', 'parent_folder', 'details', 'trashed_at']
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+
+    received_ranges = serializers.SerializerMethodField()
+
+    def get_received_ranges(self, instance):
+        return instance.get_received_ranges()
+
+    class Meta:
+        model = UploadSession
+        fields = ['pk', 'name', 'size', 'parent_folder', 'received_ranges']
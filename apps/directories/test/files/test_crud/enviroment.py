@@ -22,7 +22,7 @@ def upload_file_temporally(name_file):
     return upload_file
 
 
-@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST)
+@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST, FILESYSTEM_QUEUE_ENABLED=False)
 class FileCRUDAPITest(APITestCase):
 
     @classmethod
@@ -0,0 +1,130 @@
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+from rest_framework.authtoken.models import Token
+
+from apps.directories.models import File, Folder, UploadSession
+from apps.directories.utils.async_executor import StreamingASGIHandler
+
+from asgiref.sync import async_to_sync
+
+import json
+import threading
+
+URL_ASYNC_DOWNLOAD_FILE = 'directories:async-download-file'
+URL_ASYNC_UPLOAD_FILE = 'directories:async-upload-file'
+URL_ASYNC_UPLOAD_CHUNK = 'directories:async-upload-chunk'
+
+
+@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST, FILESYSTEM_QUEUE_ENABLED=False)
+class AsyncTransfersTest(APITransactionTestCase):
+    """ The async views run the queries in other threads, so the data must be committed """
+
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create(
+            first_name='async test',
+            last_name='testing',
+            username='ATT',
+            email='testing_async@xyz.com',
+            password='contrasenia@123456'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.root_folder = Folder.get_root_folder_by_user(self.user)
+        self.documents = Folder.create_folder_and_assign_to_parent(self.user, 'Documents', self.root_folder)
+        self.notes = File.objects.create(parent_folder=self.documents, file=SimpleUploadedFile('notes.txt', b'async notes'))
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_01_download_file(self):
+        """ Testing the download of a file of the user through the async view """
+
+        url_download = reverse(URL_ASYNC_DOWNLOAD_FILE, kwargs={'pk': self.notes.pk})
+
+        response = self.client.get(url_download)
+        response_range = self.client.get(url_download, HTTP_RANGE='bytes=6-10')
+        response_not_found = self.client.get(reverse(URL_ASYNC_DOWNLOAD_FILE, kwargs={'pk': self.notes.pk + 100}))
+        response_not_allowed = self.client.post(url_download)
+        self.client.credentials()
+        response_unauthorized = self.client.get(url_download)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), b'async notes')
+        self.assertEqual(response_range.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response_range.streaming_content), b'notes')
+        self.assertEqual(response_not_found.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response_not_allowed.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertEqual(response_unauthorized.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_02_upload_file(self):
+        """ Testing the upload of a file in a folder of the user through the async view """
+
+        response = self.client.post(
+            reverse(URL_ASYNC_UPLOAD_FILE),
+            {'parent_folder': self.documents.pk, 'file': SimpleUploadedFile('report.txt', b'async report')},
+            format='multipart'
+        )
+        response_without_file = self.client.post(
+            reverse(URL_ASYNC_UPLOAD_FILE), {'parent_folder': self.documents.pk}, format='multipart'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        new_file = File.objects.get(pk=json.loads(response.content)['pk'])
+        self.assertEqual(new_file.parent_folder, self.documents)
+        self.assertEqual(new_file.file.read(), b'async report')
+        self.assertEqual(response_without_file.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_03_upload_chunks_of_session(self):
+        """ Testing that the chunks of an upload session are written through the async view """
+
+        session = UploadSession.create_session(self.user, self.documents, 'video.mp4', 10)
+        url_chunk = reverse(URL_ASYNC_UPLOAD_CHUNK, kwargs={'session_pk': session.pk})
+
+        response_second = self.client.patch(
+            url_chunk, b'56789', content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET='5'
+        )
+        response_first = self.client.patch(
+            url_chunk, b'01234', content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET='0'
+        )
+        response_outside = self.client.patch(
+            url_chunk, b'01234', content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET='8'
+        )
+
+        self.assertEqual(response_second.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response_first.content), {'written': 5, 'received_ranges': [[0, 10]]})
+        self.assertEqual(response_outside.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertTrue(session.is_complete())
+        with open(session.get_temporary_path(), 'rb') as temporary_file:
+            self.assertEqual(temporary_file.read(), b'0123456789')
+
+        session.cancel()
+
+    def test_04_streaming_response_read_outside_event_loop(self):
+        """ Testing that the ASGI handler reads the blocks of a download in the pool of the reads """
+
+        response = self.client.get(reverse(URL_ASYNC_DOWNLOAD_FILE, kwargs={'pk': self.notes.pk}))
+        read = response.streaming_content
+        threads = []
+
+        def read_in_thread():
+            for block in read:
+                threads.append(threading.current_thread().name)
+                yield block
+
+        response.streaming_content = read_in_thread()
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        async_to_sync(StreamingASGIHandler().send_response)(response, send)
+
+        self.assertEqual(messages[0]['status'], status.HTTP_200_OK)
+        self.assertEqual(b''.join(message.get('body', b'') for message in messages[1:]), b'async notes')
+        self.assertEqual(messages[-1], {'type': 'http.response.body'})
+        self.assertTrue(threads)
+        self.assertTrue(all(name.startswith('async-io') for name in threads), threads)
@@ -4,12 +4,16 @@ from django.urls import reverse
 
 from rest_framework import status
 
-from apps.directories.models import File, Folder
+from apps.directories.models import Blob, File, Folder
 from apps.directories.test.files.test_crud import FileCRUDAPITest, upload_file_temporally
 
 import os.path
 
 URL_LIST_FILE = 'directories:files-list'
+URL_UPLOAD_BY_HASH = 'directories:files-upload-by-hash'
+URL_UPLOAD_SESSIONS = 'directories:files-upload-sessions'
+URL_UPLOAD_SESSION = 'directories:files-upload-session'
+URL_FINALIZE_UPLOAD_SESSION = 'directories:files-finalize-upload-session'
 
 
 @override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST)
@@ -103,3 +107,98 @@ class FolderCreateTest(FileCRUDAPITest):
         self.assertTrue(File.get_all_files_by_user_and_name(self.user, 'new_file.pdf').exists())
         # Validation of folders move in media folder
         self.assertTrue(os.path.exists(media_path_new_file))
+
+    @override_settings(CONTENT_ADDRESSED_STORAGE=True)
+    def test_05_create_file_with_same_content_share_blob(self):
+        """ Testing that the same content uploaded twice is stored once and can be uploaded only by hash """
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        for parent_folder in (self.storage, self.peripherals):
+            response = self.client.post(reverse(URL_LIST_FILE), {
+                'parent_folder': parent_folder.pk,
+                'file': upload_file_temporally('Series_1000.pdf')
+            }, format='multipart')
+            self.assertEquals(response.status_code, status.HTTP_201_CREATED)
+
+        files = File.get_all_files_by_user_and_name(self.user, 'Series_1000.pdf').filter(blob__isnull=False)
+        blob = Blob.objects.get()
+
+        self.assertEqual(files.count(), 2)
+        self.assertEqual(blob.references, 2)
+        self.assertTrue(os.path.exists(os.path.join(settings.MEDIA_ROOT_TEST, blob.file.name)))
+
+        response_unknown = self.client.post(reverse(URL_UPLOAD_BY_HASH), {
+            'parent_folder': self.g_amd.pk,
+            'name': 'copy.pdf',
+            'sha256': '0' * 64
+        })
+        response = self.client.post(reverse(URL_UPLOAD_BY_HASH), {
+            'parent_folder': self.g_amd.pk,
+            'name': 'copy.pdf',
+            'sha256': blob.sha256
+        })
+        new_file = File.get_all_files_by_user_and_name(self.user, 'copy.pdf').get()
+
+        self.assertEqual(response_unknown.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(new_file.details.size, blob.size)
+        self.assertEqual(Blob.get_by_id(blob.pk).references, 3)
+
+        File.delete_many_files([*files.values_list('pk', flat=True), new_file.pk])
+
+        # The content is removed when the last file that uses it is deleted
+        self.assertFalse(Blob.exists_by_id(blob.pk))
+        self.assertFalse(os.path.exists(os.path.join(settings.MEDIA_ROOT_TEST, blob.file.name)))
+
+    def test_06_create_file_with_resumable_upload_session(self):
+        """ Testing the upload of a file by chunks sent out of order """
+
+        content = upload_file_temporally('Series_1000.pdf').read()
+        chunk_size = 50000
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        response_create = self.client.post(reverse(URL_UPLOAD_SESSIONS), {
+            'parent_folder': self.gtx.pk,
+            'name': 'Series_1000.pdf',
+            'size': len(content)
+        })
+        session_pk = response_create.data['pk']
+        url_session = reverse(URL_UPLOAD_SESSION, kwargs={'session_pk': session_pk})
+        url_finalize = reverse(URL_FINALIZE_UPLOAD_SESSION, kwargs={'session_pk': session_pk})
+
+        for offset in (100000, 0):
+            response_chunk = self.client.generic(
+                'PATCH',
+                url_session,
+                content[offset:offset + chunk_size],
+                content_type='application/offset+octet-stream',
+                HTTP_UPLOAD_OFFSET=str(offset)
+            )
+            self.assertEqual(response_chunk.status_code, status.HTTP_200_OK)
+
+        response_incomplete = self.client.post(url_finalize)
+        response_resume = self.client.get(url_session)
+
+        self.assertEqual(response_create.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response_incomplete.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response_resume.data['received_ranges'], [(0, 50000), (100000, len(content))])
+
+        self.client.generic(
+            'PATCH',
+            url_session,
+            content[chunk_size:2 * chunk_size],
+            content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(chunk_size)
+        )
+        response = self.client.post(url_finalize)
+
+        new_file = File.get_by_id(response.data['pk'])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(new_file.parent_folder_id, self.gtx.pk)
+        self.assertEqual(new_file.details.size, len(content))
+        with open(new_file.get_full_path(), 'rb') as uploaded_file:
+            self.assertEqual(uploaded_file.read(), content)
+        self.assertFalse(os.listdir(os.path.join(settings.MEDIA_ROOT_TEST, settings.UPLOAD_SESSIONS_FOLDER)))
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework import status
+
+from apps.directories.test.files.test_crud import FileCRUDAPITest, upload_file_temporally
+
+URL_DOWNLOAD_FILE = 'directories:files-download'
+
+
+@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST)
+class FileDownloadTest(FileCRUDAPITest):
+
+    def setUp(self) -> None:
+        self.content = upload_file_temporally('Series_1000.pdf').read()
+        self.url_download = reverse(URL_DOWNLOAD_FILE, kwargs={'pk': self.f_series_1000.pk})
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_01_download_file_without_authentication(self):
+        """ Testing that a file can not be downloaded without credentials """
+
+        self.client.credentials()
+        response = self.client.get(self.url_download)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_02_download_complete_file(self):
+        """ Testing the download of a complete file and the conditional request with his ETag """
+
+        response = self.client.get(self.url_download)
+        response_not_modified = self.client.get(self.url_download, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="Series_1000.pdf"')
+        self.assertEqual(response_not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_03_download_ranges_of_file(self):
+        """ Testing the download of one and many ranges of a file """
+
+        size = len(self.content)
+
+        response_single = self.client.get(self.url_download, HTTP_RANGE='bytes=100-199')
+        response_suffix = self.client.get(self.url_download, HTTP_RANGE='bytes=-10')
+        response_multiple = self.client.get(self.url_download, HTTP_RANGE='bytes=0-9,1000-1009')
+        response_unsatisfiable = self.client.get(self.url_download, HTTP_RANGE=f'bytes={size}-')
+        response_stale = self.client.get(self.url_download, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"')
+
+        body_multiple = b''.join(response_multiple.streaming_content)
+        boundary = response_multiple['Content-Type'].split('boundary=')[1]
+
+        self.assertEqual(response_single.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response_single.streaming_content), self.content[100:200])
+        self.assertEqual(response_single['Content-Range'], f'bytes 100-199/{size}')
+        self.assertEqual(response_single['Content-Length'], '100')
+
+        self.assertEqual(b''.join(response_suffix.streaming_content), self.content[-10:])
+
+        self.assertEqual(response_multiple.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(body_multiple.count(f'--{boundary}'.encode()), 3)
+        self.assertIn(f'Content-Range: bytes 1000-1009/{size}\r\n\r\n'.encode() + self.content[1000:1010], body_multiple)
+
+        self.assertEqual(response_unsatisfiable.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response_stale.status_code, status.HTTP_200_OK)
+
+    @override_settings(FILE_DOWNLOADS_MODE='x-accel-redirect')
+    def test_04_download_file_offloaded_to_web_server(self):
+        """ Testing that the web server receives the internal location of the file to send it """
+
+        response = self.client.get(self.url_download)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.f_series_1000.file.name}')
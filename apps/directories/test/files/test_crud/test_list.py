@@ -1,13 +1,18 @@
 from django.conf import settings
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
 
+from apps.directories.models import Detail, File
 from apps.directories.test.files.test_crud import FileCRUDAPITest
 
 
 URL_DETAIL_FILE = 'directories:files-detail'
+URL_FOLDER_CONTENTS = 'directories:folders-contents'
+URL_LIST_FILE = 'directories:files-list'
 
 
 @override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST)
@@ -50,3 +55,53 @@ class FolderListTest(FileCRUDAPITest):
         self.assertEqual(data['file'], 'http://testserver/media/10/Hardware/GPU/NVIDIA/Series_1000.pdf')
         self.assertEqual(dict(data)['details']['type'], 'pdf')
         self.assertEqual(dict(data)['details']['size'], 143774)
+
+    def test_04_list_folders_and_files_of_folder_by_pages(self):
+        """ Testing the list of children folders and files of a folder in the same pages """
+
+        url_contents = reverse(URL_FOLDER_CONTENTS, kwargs={'pk': self.hardware.pk})
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        response_1 = self.client.get(f'{url_contents}?page_size=3')
+        response_2 = self.client.get(response_1.data['next'])
+
+        self.assertEqual(response_1.status_code, status.HTTP_200_OK)
+        self.assertEqual([folder['name'] for folder in response_1.data['folders']], ['GPU', 'Peripherals', 'Software'])
+        self.assertEqual(response_1.data['files'], [])
+        self.assertEqual([folder['name'] for folder in response_2.data['folders']], ['Storage'])
+        self.assertEqual([file['name'] for file in response_2.data['files']], ['Budget.csv'])
+        self.assertIsNone(response_2.data['next'])
+        self.assertNotIn('Link', response_2)
+
+    def test_05_list_files_with_invalid_cursor(self):
+        """ Testing that a page can not be requested with a cursor not created by the server """
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        response = self.client.get(f'{reverse(URL_LIST_FILE)}?cursor=invalid')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_06_list_files_with_constant_queries(self):
+        """ Testing that the number of queries of the list of files does not depend on the number of files """
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        with CaptureQueriesContext(connection) as queries_before:
+            response_before = self.client.get(reverse(URL_LIST_FILE))
+
+        details = Detail.objects.bulk_create([Detail(type='pdf', size=10) for _ in range(50)])
+        File.objects.bulk_create([
+            File(parent_folder=self.ops, details=detail, name=f'Manual {number}.pdf', file=f'manual_{number}.pdf')
+            for number, detail in enumerate(details)
+        ])
+
+        with CaptureQueriesContext(connection) as queries_after:
+            response_after = self.client.get(reverse(URL_LIST_FILE))
+
+        self.assertEqual(len(response_after.data), len(response_before.data) + 50)
+        self.assertEqual(len(queries_after), len(queries_before))
+        self.assertEqual(response_after.data[0]['name'], '1030.pdf')
+        self.assertEqual(response_after.data[0]['details'], {'type': 'pdf', 'size': 0})
+        self.assertTrue(response_after.data[0]['file'].startswith('http://testserver/media/'))
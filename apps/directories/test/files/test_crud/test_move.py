@@ -4,8 +4,9 @@ from django.urls import reverse
 
 from rest_framework import status
 
-from apps.directories.models import Folder, File
+from apps.directories.models import Folder, File, FilesystemOperation
 from apps.directories.test.files.test_crud import FileCRUDAPITest
+from apps.directories.utils.filesystem_queue import filesystem_queue
 
 import os.path
 
@@ -243,3 +244,41 @@ class FileMoveTest(FileCRUDAPITest):
         self.assertTrue(os.path.exists(media_path_2060_ti))
         self.assertTrue(os.path.exists(media_path_3060))
         self.assertTrue(os.path.exists(media_path_1030))
+
+    def test_10_move_files_with_same_name_of_different_folders(self):
+        """ Testing that the files that would have the same name in the new parent folder are not moved """
+
+        payload = {
+            'parent_folder': self.ops.pk,
+            'files_to_move': [self.f_linux.pk, self.f_s_linux.pk]
+        }
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = self.client.patch(reverse(URL_MOVE_FILE), payload)
+
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(File.get_by_id(self.f_linux.pk).parent_folder_id, self.root_folder.pk)
+
+    @override_settings(FILESYSTEM_QUEUE_ENABLED=True)
+    def test_11_move_many_files_with_journal(self):
+        """ Testing that the moves of the files are journaled together and applied after the commit """
+
+        files_ids = [self.f_keyboard.pk, self.f_mouse.pk, self.f_headphones.pk]
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            result = File.move_many_files_into_another_folder(files_ids, Folder.get_by_id(self.storage.pk))
+
+        journal_entries = list(FilesystemOperation.objects.filter(operation=FilesystemOperation.MOVE))
+        self.assertEqual((len(callbacks), len(journal_entries)), (1, 3))
+        filesystem_queue.apply_many(journal_entries)
+
+        storage = Folder.get_by_id(self.storage.pk)
+        files = File.get_elements_by_list_id(files_ids)
+
+        self.assertTrue(result)
+        self.assertEqual({file.parent_folder_id for file in files}, {self.storage.pk})
+        self.assertEqual((storage.total_files, Folder.get_by_id(self.peripherals.pk).total_files), (5, 0))
+        self.assertFalse(FilesystemOperation.objects.exists())
+        for file in files:
+            self.assertEqual(file.file.name, f'{storage.get_path_folder()}/{file.name}')
+            self.assertTrue(os.path.exists(file.get_full_path()))
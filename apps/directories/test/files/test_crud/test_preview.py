@@ -0,0 +1,151 @@
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework import status
+
+from apps.directories.models import File
+from apps.directories.test.files.test_crud import FileCRUDAPITest
+from apps.directories.utils.previews import PREVIEW, THUMBNAIL, preview_cache
+
+from io import BytesIO
+from PIL import Image
+from unittest import mock
+
+import os
+import shutil
+
+URL_PREVIEW_FILE = 'directories:files-preview'
+
+
+@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST, PREVIEWS_WORKERS=0)
+class FilePreviewTest(FileCRUDAPITest):
+
+    def setUp(self) -> None:
+        shutil.rmtree(preview_cache.get_root(), ignore_errors=True)
+        preview_cache.cached_bytes = None
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def create_image(self, name, size=(800, 600), image_format='PNG'):
+        content = BytesIO()
+        Image.new('RGB', size, (30, 120, 200)).save(content, image_format)
+        return File.objects.create(parent_folder=self.ti_gtx, file=SimpleUploadedFile(name, content.getvalue()))
+
+    def get_preview(self, file, **params):
+        return self.client.get(reverse(URL_PREVIEW_FILE, kwargs={'pk': file.pk}), params)
+
+    def get_image(self, response):
+        return Image.open(BytesIO(b''.join(response.streaming_content)))
+
+    def test_01_thumbnail_of_image(self):
+        """ Testing the thumbnail of an image and the conditional request with his ETag """
+
+        file = self.create_image('Board.png')
+        response = self.get_preview(file)
+        response_not_modified = self.client.get(
+            reverse(URL_PREVIEW_FILE, kwargs={'pk': file.pk}),
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        image = self.get_image(response)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('max-age=', response['Cache-Control'])
+        self.assertEqual(image.size, (256, 192))
+        self.assertEqual(response_not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_02_preview_of_first_page_of_pdf(self):
+        """ Testing the preview of the first page of a PDF """
+
+        response = self.get_preview(self.f_series_1000, size=PREVIEW)
+        image = self.get_image(response)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(max(image.size), settings.PREVIEWS_SIZES[PREVIEW])
+
+    def test_03_preview_of_unsupported_file(self):
+        """ Testing the preview of a file that is not an image, of a damaged image and with a wrong size """
+
+        response_csv = self.get_preview(self.f_budget)
+        response_damaged = self.get_preview(self.f_hdd)
+        response_size = self.get_preview(self.f_hdd, size='huge')
+
+        self.assertEqual(response_csv.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response_damaged.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(response_size.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_04_least_recently_used_previews_are_evicted(self):
+        """ Testing that the cache removes the previews used less recently when it is full """
+
+        files = [self.create_image(f'Photo_{number}.jpg', image_format='JPEG') for number in range(3)]
+        first_path = preview_cache.get_or_generate(files[0], THUMBNAIL)
+        second_path = preview_cache.get_or_generate(files[1], THUMBNAIL)
+        os.utime(second_path, (0, 0))
+        preview_cache.get(files[0], THUMBNAIL)
+
+        # The three thumbnails are equal, the cache has space for two and a half
+        with self.settings(PREVIEWS_CACHE_MAX_BYTES=os.path.getsize(first_path) * 5 // 2):
+            third_path = preview_cache.get_or_generate(files[2], THUMBNAIL)
+
+        self.assertTrue(os.path.exists(first_path))
+        self.assertFalse(os.path.exists(second_path))
+        self.assertTrue(os.path.exists(third_path))
+
+    def test_05_previews_generated_by_the_pool(self):
+        """ Testing the generation of the previews in the processes of the pool """
+
+        file = self.create_image('Chip.jpg', size=(2000, 1000), image_format='JPEG')
+        with self.settings(PREVIEWS_WORKERS=1):
+            path = preview_cache.submit(file, PREVIEW).result(timeout=60)
+            preview_cache.executor.shutdown()
+            preview_cache.executor = None
+
+        with Image.open(path) as image:
+            self.assertEqual((image.format, image.size), ('WEBP', (1024, 512)))
+
+    def test_06_previews_being_saved_are_not_evicted(self):
+        """ Testing that the eviction keeps the temporary files of the previews that are being saved """
+
+        file = self.create_image('Wafer.jpg', image_format='JPEG')
+        path = preview_cache.get_or_generate(file, THUMBNAIL)
+        temporary_path = f'{path}.0123456789abcdef.tmp'
+        shutil.copyfile(path, temporary_path)
+        os.utime(temporary_path, (0, 0))
+
+        with self.settings(PREVIEWS_CACHE_MAX_BYTES=1):
+            cached_bytes = preview_cache._evict()
+
+        self.assertEqual(cached_bytes, 0)
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(temporary_path))
+
+    def test_07_preview_evicted_before_it_is_opened(self):
+        """ Testing that a preview removed between the lookup and the opening is generated again """
+
+        file = self.create_image('Socket.png')
+        evicted_path = preview_cache.get_path(preview_cache.get_key(file, THUMBNAIL))
+
+        with mock.patch.object(preview_cache, 'get', return_value=evicted_path):
+            response = self.get_preview(file)
+        image = self.get_image(response)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(image.size, (256, 192))
+
+    def test_08_eviction_without_the_lock(self):
+        """ Testing that the folder is walked without the lock and by one thread at a time """
+
+        def evict():
+            # Another request can take the lock while the folder is walked
+            self.assertTrue(preview_cache.lock.acquire(blocking=False))
+            preview_cache.lock.release()
+            preview_cache._register('other-preview', 10)
+            return 100
+
+        with mock.patch.object(preview_cache, '_evict', side_effect=evict) as mock_evict:
+            preview_cache._register('new-preview', 50)
+
+        self.assertEqual(mock_evict.call_count, 1)
+        self.assertFalse(preview_cache.evicting)
+        self.assertEqual(preview_cache.cached_bytes, 110)
@@ -0,0 +1,129 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework import status
+
+from apps.directories.models import File, Folder
+from apps.directories.test.files.test_crud import FileCRUDAPITest, upload_file_temporally
+from apps.directories.utils.storage_quota import StorageQuota
+
+URL_LIST_FILE = 'directories:files-list'
+URL_QUOTA = 'directories:files-quota'
+URL_UPLOAD_SESSIONS = 'directories:files-upload-sessions'
+URL_UPLOAD_SESSION = 'directories:files-upload-session'
+URL_RECOVER_FILES = 'directories:files-recover-files'
+URL_RECOVER_FOLDER = 'directories:folders-recover-folder'
+
+
+@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST)
+class StorageQuotaTest(FileCRUDAPITest):
+
+    def setUp(self) -> None:
+        self.used = Folder.get_by_id(self.root_folder.pk).total_size
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def set_free_space(self, free_bytes):
+        get_user_model().objects.filter(pk=self.user.pk).update(storage_quota=self.used + free_bytes)
+
+    def test_01_upload_rejected_by_content_length(self):
+        """ Testing that an upload bigger than the free space is rejected and the reservation released """
+
+        self.set_free_space(1000)
+        files_before = File.objects.count()
+
+        response = self.client.post(reverse(URL_LIST_FILE), {
+            'parent_folder': self.gtx.pk,
+            'file': upload_file_temporally('Series_1000.pdf'),
+        })
+        response_quota = self.client.get(reverse(URL_QUOTA))
+
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(File.objects.count(), files_before)
+        self.assertEqual(response_quota.data, {'used': self.used, 'reserved': 0, 'quota': self.used + 1000})
+
+    def test_02_upload_inside_quota(self):
+        """ Testing that an upload with free space is stored and counted in the bytes used """
+
+        self.set_free_space(10 * 1024 * 1024)
+
+        response = self.client.post(reverse(URL_LIST_FILE), {
+            'parent_folder': self.gtx.pk,
+            'file': upload_file_temporally('Series_1000.pdf'),
+        })
+        usage = StorageQuota.get_usage(self.user.pk)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(usage['used'], self.used + File.get_by_id(response.data['pk']).details.size)
+        self.assertEqual(usage['reserved'], 0)
+
+    def test_03_upload_sessions_reserve_declared_size(self):
+        """ Testing that the sessions reserve his size until they are cancelled """
+
+        self.set_free_space(1000)
+        payload = {'parent_folder': self.gtx.pk, 'name': 'Big.pdf', 'size': 600}
+
+        response_first = self.client.post(reverse(URL_UPLOAD_SESSIONS), payload)
+        response_second = self.client.post(reverse(URL_UPLOAD_SESSIONS), {**payload, 'name': 'Other.pdf'})
+        reserved = StorageQuota.get_usage(self.user.pk)['reserved']
+        self.client.delete(reverse(URL_UPLOAD_SESSION, kwargs={'session_pk': response_first.data['pk']}))
+        response_third = self.client.post(reverse(URL_UPLOAD_SESSIONS), {**payload, 'name': 'Other.pdf'})
+
+        self.assertEqual(response_first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response_second.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(reserved, 600)
+        self.assertEqual(response_third.status_code, status.HTTP_201_CREATED)
+
+    def test_04_reservations_without_quota(self):
+        """ Testing that the users without quota can reserve any size and the quota of the settings """
+
+        self.assertTrue(StorageQuota.reserve(self.user.pk, 10 ** 15))
+        StorageQuota.release(self.user.pk, 10 ** 15)
+
+        with self.settings(STORAGE_QUOTA_BYTES=self.used + 100):
+            self.assertFalse(StorageQuota.reserve(self.user.pk, 101))
+            self.assertTrue(StorageQuota.reserve(self.user.pk, 100))
+            self.assertFalse(StorageQuota.reserve(self.user.pk, 1))
+
+    def test_05_recover_files_reserves_his_size(self):
+        """ Testing that the files of the recycle bin are only recovered if they fit in the quota again """
+
+        file = File.get_by_id(self.f_series_1000.pk)
+        File.disabled_many_files([file.pk])
+        self.used -= file.details.size
+
+        self.set_free_space(file.details.size - 1)
+        response_without_space = self.client.patch(reverse(URL_RECOVER_FILES), {'files_to_recover': [file.pk]})
+        file_without_space = File.get_by_id(file.pk)
+
+        self.set_free_space(file.details.size)
+        response = self.client.patch(reverse(URL_RECOVER_FILES), {'files_to_recover': [file.pk]})
+
+        self.assertEqual(response_without_space.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertFalse(file_without_space.is_active)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(File.get_by_id(file.pk).is_active)
+        self.assertEqual(StorageQuota.get_usage(self.user.pk), {
+            'used': self.used + file.details.size, 'reserved': 0, 'quota': self.used + file.details.size
+        })
+
+    def test_06_recover_folder_reserves_size_of_his_files(self):
+        """ Testing that a folder of the recycle bin is only recovered if his files fit in the quota again """
+
+        gpu = Folder.get_by_id(self.gpu.pk)
+        gpu.disable_folder_and_children()
+        trashed_size = gpu.total_size
+        self.used = Folder.get_by_id(self.root_folder.pk).total_size
+
+        self.set_free_space(trashed_size - 1)
+        response_without_space = self.client.patch(reverse(URL_RECOVER_FOLDER), {'folders_to_recover': [gpu.pk]})
+
+        self.set_free_space(trashed_size)
+        response = self.client.patch(reverse(URL_RECOVER_FOLDER), {'folders_to_recover': [gpu.pk]})
+
+        self.assertEqual(Folder.get_trashed_size([gpu.pk]), 0)
+        self.assertEqual(response_without_space.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(Folder.get_by_id(gpu.pk).is_active)
+        self.assertEqual(StorageQuota.get_usage(self.user.pk)['used'], self.used + trashed_size)
@@ -118,3 +118,19 @@ class FolderUpdateTest(FileCRUDAPITest):
         self.assertTrue(self.nvidia.has_this_file(update_file.pk))
         # Validation of folders move in media folder
         self.assertTrue(os.path.exists(media_path_new_file))
+
+    def test_05_save_without_changes_of_name_or_parent_folder(self):
+        """ Testing that a file saved without changes of his name or parent folder is updated with one statement """
+
+        file = File.objects.select_related('parent_folder').get(pk=self.f_series_1000.pk)
+        file.is_active = False
+
+        with self.assertNumQueries(1):
+            file.save()
+
+        file.name = 'Series_1000_new_gen'
+        file.save()
+
+        self.assertFalse(File.objects.get(pk=file.pk).is_active)
+        self.assertEqual(file.name, 'Series_1000_new_gen.pdf')
+        self.assertTrue(os.path.exists(file.get_full_path()))
@@ -0,0 +1,152 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+
+from apps.directories.models import Blob, File, Folder
+from apps.directories.models.blob import get_blob_path
+from apps.directories.test.files.test_crud import FileCRUDAPITest
+
+from unittest import mock
+
+import os.path
+
+URL_UPLOAD_MANY = 'directories:files-upload-many'
+
+
+def get_contents(*names):
+    return [SimpleUploadedFile(name, f'Content of {name}'.encode()) for name in names]
+
+
+@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST)
+class FileUploadManyTest(FileCRUDAPITest):
+
+    def setUp(self) -> None:
+        self.url_upload_many = reverse(URL_UPLOAD_MANY)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_01_upload_many_files(self):
+        """ Testing the creation of many files in a folder with one request """
+
+        contents = get_contents('Driver.txt', 'Manual.txt', 'Notes.md')
+        total_size = sum(content.size for content in contents)
+
+        response = self.client.post(self.url_upload_many, {'parent_folder': self.ops.pk, 'files': contents})
+
+        ops = Folder.get_by_id(self.ops.pk)
+        software = Folder.get_by_id(self.software.pk)
+        files = File.objects.filter(parent_folder=ops).select_related('details').order_by('name')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([file['name'] for file in response.data], ['Driver.txt', 'Manual.txt', 'Notes.md'])
+        self.assertEqual([file.name for file in files], ['Driver.txt', 'Manual.txt', 'Notes.md'])
+        self.assertEqual([file.details.type for file in files], ['txt', 'txt', 'md'])
+        self.assertEqual((ops.total_files, ops.total_size), (3, total_size))
+        self.assertEqual(software.total_files, 4)
+        for file in files:
+            self.assertEqual(file.file.name, f'{ops.get_path_folder()}/{file.name}')
+            with open(file.get_full_path(), 'rb') as content:
+                self.assertEqual(content.read(), f'Content of {file.name}'.encode())
+
+    def test_02_statements_independent_of_the_number_of_files(self):
+        """ Testing that the statements of an upload do not depend on the number of files """
+
+        statements_by_files = {}
+        for parent_folder, number_files in ((self.ops, 2), (self.storage, 6)):
+            contents = get_contents(*[f'Log_{number}.txt' for number in range(number_files)])
+
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(self.url_upload_many, {'parent_folder': parent_folder.pk, 'files': contents})
+
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            statements_by_files[number_files] = len(context.captured_queries)
+
+        self.assertEqual(len(set(statements_by_files.values())), 1, statements_by_files)
+
+    def test_03_upload_many_files_with_wrong_parameters(self):
+        """ Testing the upload with repeated names, without files, to other folder and without quota """
+
+        response_existing_name = self.client.post(self.url_upload_many, {
+            'parent_folder': self.gtx.pk,
+            'files': get_contents('New.pdf', '1030.pdf')
+        })
+        response_repeated_name = self.client.post(self.url_upload_many, {
+            'parent_folder': self.gtx.pk,
+            'files': get_contents('New.pdf', 'New.pdf')
+        })
+        response_without_files = self.client.post(self.url_upload_many, {'parent_folder': self.gtx.pk})
+        response_other_folder = self.client.post(self.url_upload_many, {
+            'parent_folder': 1000,
+            'files': get_contents('New.pdf')
+        })
+        get_user_model().objects.filter(pk=self.user.pk).update(storage_quota=0)
+        response_without_quota = self.client.post(self.url_upload_many, {
+            'parent_folder': self.gtx.pk,
+            'files': get_contents('New.pdf')
+        })
+
+        self.assertEqual(response_existing_name.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(response_repeated_name.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(response_without_files.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response_other_folder.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response_without_quota.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertFalse(File.objects.filter(name='New.pdf').exists())
+        self.assertFalse(os.path.exists(f'{settings.MEDIA_ROOT_TEST}{self.gtx.get_path_folder()}/New.pdf'))
+
+    @override_settings(CONTENT_ADDRESSED_STORAGE=True)
+    def test_04_upload_many_files_with_the_same_content(self):
+        """ Testing that the files with the same content share one blob """
+
+        contents = [SimpleUploadedFile(name, b'Same content') for name in ('First.txt', 'Second.txt')]
+
+        response = self.client.post(self.url_upload_many, {'parent_folder': self.ops.pk, 'files': contents})
+
+        files = File.objects.filter(parent_folder=self.ops.pk)
+        blob = Blob.objects.get()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(blob.references, 2)
+        self.assertEqual({file.blob_id for file in files}, {blob.pk})
+        with open(files.first().get_full_path(), 'rb') as content:
+            self.assertEqual(content.read(), b'Same content')
+
+    def test_05_upload_many_files_over_files_created_by_other_upload(self):
+        """ Testing that the upload does not overwrite the files created by other upload with the same names """
+
+        folder_path = f'{settings.MEDIA_ROOT_TEST}{self.ops.get_path_folder()}'
+        os.makedirs(folder_path, exist_ok=True)
+        with open(f'{folder_path}/Datasheet.txt', 'wb') as content:
+            content.write(b'Content of other upload')
+
+        response = self.client.post(self.url_upload_many, {
+            'parent_folder': self.ops.pk,
+            'files': get_contents('Schematic.txt', 'Datasheet.txt', 'Errata.md')
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertFalse(File.objects.filter(parent_folder=self.ops.pk).exists())
+        self.assertFalse(os.path.exists(f'{folder_path}/Schematic.txt'))
+        self.assertFalse(os.path.exists(f'{folder_path}/Errata.md'))
+        with open(f'{folder_path}/Datasheet.txt', 'rb') as content:
+            self.assertEqual(content.read(), b'Content of other upload')
+        os.remove(f'{folder_path}/Datasheet.txt')
+
+    @override_settings(CONTENT_ADDRESSED_STORAGE=True)
+    def test_06_contents_of_failed_upload_removed(self):
+        """ Testing that the contents written for new blobs are removed when the files can not be inserted """
+
+        contents = [SimpleUploadedFile('Firmware.bin', b'Content of the firmware')]
+
+        with mock.patch.object(File.objects, 'bulk_create', side_effect=RuntimeError('Insert failed')):
+            with self.assertRaises(RuntimeError):
+                File.create_many_files(self.ops, contents)
+
+        blob = Blob(sha256=Blob.get_hash_content(contents[0]))
+
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(settings.MEDIA_ROOT_TEST, get_blob_path(blob, blob.sha256))))
@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.test import override_settings
+
+from apps.directories.models import File, Folder
+from apps.directories.test.files.test_crud import FileCRUDAPITest, upload_file_temporally
+from apps.directories.utils.folder_aggregates import FolderAggregates
+
+from io import StringIO
+
+
+@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST)
+class FolderAggregatesTest(FileCRUDAPITest):
+
+    def get_totals(self):
+        return {
+            pk: totals
+            for pk, *totals in Folder.objects.filter(owner_user=self.user).values_list(
+                'pk', 'total_size', 'total_files', 'total_folders'
+            )
+        }
+
+    def assertTotalsRebuilt(self):
+        """ The totals updated incrementally must be equal to the totals calculated from zero """
+        totals = self.get_totals()
+        FolderAggregates.rebuild(self.user.pk)
+        self.assertEqual(totals, self.get_totals())
+
+    def test_01_totals_of_created_elements(self):
+        """ Testing the totals of the folders after create the folders and upload the files """
+
+        gpu = Folder.get_by_id(self.gpu.pk)
+        root = Folder.get_by_id(self.root_folder.pk)
+
+        self.assertEqual((gpu.total_files, gpu.total_folders), (10, 6))
+        self.assertEqual((root.total_files, root.total_folders), (19, 12))
+        self.assertEqual(root.total_size, sum(File.objects.values_list('details__size', flat=True)))
+        self.assertTotalsRebuilt()
+
+    def test_02_totals_after_recycle_bin(self):
+        """ Testing the totals after move folders and files to the recycle bin and recover them """
+
+        root_totals = self.get_totals()[self.root_folder.pk]
+
+        Folder.get_by_id(self.gpu.pk).disable_folder_and_children()
+        File.disabled_many_files([self.f_hdd.pk, self.f_windows.pk])
+        root = Folder.get_by_id(self.root_folder.pk)
+        gpu = Folder.get_by_id(self.gpu.pk)
+        self.assertEqual((root.total_files, root.total_folders), (7, 5))
+        self.assertEqual((gpu.total_files, gpu.total_folders), (10, 6))
+        self.assertTotalsRebuilt()
+
+        with self.assertRaises(ValueError):
+            Folder.get_by_id(self.rtx.pk).activate_folder_and_children()
+        self.assertEqual(Folder.get_by_id(self.root_folder.pk).total_files, 7)
+        self.assertTotalsRebuilt()
+
+        Folder.get_by_id(self.gpu.pk).activate_folder_and_children()
+        File.recover_many_files([self.f_hdd.pk, self.f_windows.pk])
+        self.assertEqual(self.get_totals()[self.root_folder.pk], root_totals)
+        self.assertTotalsRebuilt()
+
+    def test_03_totals_after_move_and_delete(self):
+        """ Testing the totals after move folders and files and delete them """
+
+        Folder.move_folder_into_another(Folder.get_by_id(self.gpu.pk), Folder.get_by_id(self.software.pk))
+        file = File.get_by_id(self.f_budget.pk)
+        file.parent_folder = Folder.get_by_id(self.peripherals.pk)
+        file.save()
+        software = Folder.get_by_id(self.software.pk)
+        self.assertEqual((software.total_files, software.total_folders), (11, 8))
+        self.assertEqual(Folder.get_by_id(self.peripherals.pk).total_files, 4)
+        self.assertTotalsRebuilt()
+
+        Folder.get_by_id(self.rtx.pk).disable_folder_and_children()
+        Folder.delete_many_folder_and_children([self.gpu.pk])
+        File.delete_many_files([self.f_linux.pk])
+        root = Folder.get_by_id(self.root_folder.pk)
+        self.assertEqual((root.total_files, root.total_folders), (8, 5))
+        self.assertTotalsRebuilt()
+
+    def test_04_rebuild_command_fixes_drift(self):
+        """ Testing that the command calculates again the totals changed by hand """
+
+        totals = self.get_totals()
+        Folder.objects.filter(owner_user=self.user).update(total_size=0, total_files=7, total_folders=3)
+        File.objects.create(parent_folder=self.ops, file=upload_file_temporally('Mouse.png'))
+
+        output = StringIO()
+        call_command('rebuild_folder_aggregates', user=self.user.pk, stdout=output)
+        root = Folder.get_by_id(self.root_folder.pk)
+
+        self.assertIn(f'{len(totals)} folders', output.getvalue())
+        self.assertEqual(root.total_files, totals[self.root_folder.pk][1] + 1)
+        self.assertEqual(root.total_folders, totals[self.root_folder.pk][2])
@@ -4,8 +4,8 @@ from django.urls import reverse
 
 from rest_framework import status
 
-from apps.directories.models import Folder, File
-from apps.directories.test.files.test_crud import FileCRUDAPITest
+from apps.directories.models import Blob, Folder, File
+from apps.directories.test.files.test_crud import FileCRUDAPITest, upload_file_temporally
 
 import os.path
 
@@ -107,3 +107,22 @@ class FolderRecicleBinTest(FileCRUDAPITest):
         self.assertFalse(os.path.exists(media_file_2060_ti_delete))
         self.assertFalse(os.path.exists(media_file_3060_ti_delete))
         self.assertFalse(os.path.exists(media_file_1030_delete))
+
+    @override_settings(CONTENT_ADDRESSED_STORAGE=True)
+    def test_02_delete_folder_with_content_addressed_file(self):
+        """ Testing the delete of a folder with the only file that uses a blob """
+
+        file = File.objects.create(parent_folder=self.ops, file=upload_file_temporally('new_file.pdf'))
+        blob = Blob.objects.get(pk=file.blob_id)
+        media_path_blob = os.path.join(settings.MEDIA_ROOT_TEST, blob.file.name)
+
+        self.assertTrue(os.path.exists(media_path_blob))
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = self.client.delete(reverse(URL_DELETE_FOLDER), {'folders_to_delete': [self.ops.pk]})
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertIsNone(Folder.get_by_id(self.ops.pk))
+        self.assertIsNone(File.get_by_id(file.pk))
+        self.assertFalse(Blob.exists_by_id(blob.pk))
+        self.assertFalse(os.path.exists(media_path_blob))
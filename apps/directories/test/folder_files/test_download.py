@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+
+from apps.directories.models import Folder
+from apps.directories.test.files.test_crud import FileCRUDAPITest, upload_file_temporally
+
+from unittest import mock
+
+import io
+import zipfile
+
+URL_DOWNLOAD_FOLDER = 'directories:folders-download'
+
+
+@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST)
+class FolderDownloadTest(FileCRUDAPITest):
+
+    def test_01_download_folder_like_zip(self):
+        """ Testing the download of a folder with his active descendants in a zip archive """
+
+        Folder.get_by_id(self.g_amd.pk).disable_folder_and_children()
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = self.client.get(reverse(URL_DOWNLOAD_FOLDER, kwargs={'pk': self.gpu.pk}))
+
+        with CaptureQueriesContext(connection) as queries:
+            content = b''.join(response.streaming_content)
+
+        archive = zipfile.ZipFile(io.BytesIO(content))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="GPU.zip"')
+        # The folders and the files are gathered with one query each one
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(sorted(archive.namelist()), [
+            'GPU/',
+            'GPU/GTX/',
+            'GPU/GTX/1030.pdf',
+            'GPU/GTX/TI/',
+            'GPU/NVIDIA/',
+            'GPU/NVIDIA/Series_1000.pdf',
+            'GPU/NVIDIA/Series_2000.pdf',
+            'GPU/RTX/',
+            'GPU/RTX/2060.jpg',
+            'GPU/RTX/TI/',
+            'GPU/RTX/TI/1070_TI.png',
+            'GPU/RTX/TI/1080_TI.png',
+            'GPU/RTX/TI/2060_TI.png',
+            'GPU/RTX/TI/3060_TI.png',
+        ])
+        self.assertEqual(archive.read('GPU/NVIDIA/Series_1000.pdf'), upload_file_temporally('Series_1000.pdf').read())
+        self.assertEqual(archive.getinfo('GPU/NVIDIA/Series_1000.pdf').compress_type, zipfile.ZIP_STORED)
+        self.assertIsNone(archive.testzip())
+
+    def test_02_download_folder_of_other_user(self):
+        """ Testing that a folder can not be downloaded without credentials """
+
+        response = self.client.get(reverse(URL_DOWNLOAD_FOLDER, kwargs={'pk': self.gpu.pk}))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_03_download_folder_read_by_pages(self):
+        """ Testing that the rows of the archive are read by pages without repeating or losing any """
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = self.client.get(reverse(URL_DOWNLOAD_FOLDER, kwargs={'pk': self.gpu.pk}))
+
+        with mock.patch('apps.directories.utils.download.ZIP_PAGE_SIZE', 2), CaptureQueriesContext(connection) as queries:
+            content = b''.join(response.streaming_content)
+
+        names = zipfile.ZipFile(io.BytesIO(content)).namelist()
+
+        self.assertGreater(len(queries), 2)
+        self.assertEqual(len(names), len(set(names)))
+        self.assertEqual(len([name for name in names if not name.endswith('/')]), 10)
@@ -4,8 +4,9 @@ from django.urls import reverse
 
 from rest_framework import status
 
-from apps.directories.models import Folder, File
+from apps.directories.models import Folder, File, FilesystemOperation
 from apps.directories.test.files.test_crud import FileCRUDAPITest
+from apps.directories.utils.filesystem_queue import filesystem_queue
 
 import os.path
 
@@ -142,3 +143,50 @@ class FolderFileMoveTest(FileCRUDAPITest):
         self.assertTrue(os.path.exists(media_path_storage))
         self.assertTrue(os.path.exists(media_path_hdd))
         self.assertTrue(os.path.exists(media_path_mv_2))
+
+    @override_settings(FILESYSTEM_QUEUE_ENABLED=True)
+    def test_03_move_many_folders_with_one_rename_by_folder(self):
+        """ Testing that the folders moved together are renamed once in the media, the folders inside
+            other moved folder travel with it """
+
+        result = Folder.move_many_folder_into_another(
+            [self.software.pk, self.ops.pk, self.peripherals.pk],
+            Folder.get_by_id(self.nvidia.pk)
+        )
+
+        journal_entries = list(FilesystemOperation.objects.filter(operation=FilesystemOperation.MOVE))
+        self.assertEqual(len(journal_entries), 2)
+        filesystem_queue.apply_many(journal_entries)
+
+        nvidia = Folder.get_by_id(self.nvidia.pk)
+        gpu = Folder.get_by_id(self.gpu.pk)
+        ops = Folder.get_by_id(self.ops.pk)
+        file_linux = File.get_by_id(self.f_s_linux.pk)
+
+        self.assertTrue(result)
+        self.assertEqual(Folder.get_by_id(self.software.pk).get_parent().pk, nvidia.pk)
+        self.assertEqual(Folder.get_by_id(self.peripherals.pk).get_parent().pk, nvidia.pk)
+        self.assertEqual(ops.get_parent().pk, self.software.pk)
+        self.assertEqual(ops.get_path_folder(), f'{nvidia.get_path_folder()}/Software/Operative system')
+        self.assertEqual(ops.route, f'{nvidia.get_path_folder()}/Software/')
+        self.assertEqual(file_linux.file.name, f'{nvidia.get_path_folder()}/Software/linux.pdf')
+        self.assertTrue(os.path.exists(file_linux.get_full_path()))
+        self.assertTrue(os.path.exists(File.get_by_id(self.f_keyboard.pk).get_full_path()))
+        self.assertEqual((nvidia.total_files, nvidia.total_folders), (6, 3))
+        self.assertEqual((gpu.total_files, gpu.total_folders), (14, 9))
+
+    def test_04_move_many_folders_with_an_error(self):
+        """ Testing that if a folder can not be moved none of the folders is moved """
+
+        result = Folder.move_many_folder_into_another(
+            [self.peripherals.pk, self.software.pk],
+            Folder.get_by_id(self.ops.pk)
+        )
+
+        ops = Folder.get_by_id(self.ops.pk)
+
+        self.assertFalse(result)
+        self.assertEqual(Folder.get_by_id(self.peripherals.pk).get_parent().pk, self.hardware.pk)
+        self.assertEqual(Folder.get_by_id(self.software.pk).get_parent().pk, self.hardware.pk)
+        self.assertEqual((ops.total_files, ops.total_folders), (0, 0))
+        self.assertFalse(FilesystemOperation.objects.exists())
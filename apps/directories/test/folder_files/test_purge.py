@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from apps.directories.models import File, Folder
+from apps.directories.test.files.test_crud import FileCRUDAPITest
+
+from datetime import timedelta
+from io import StringIO
+
+import os.path
+
+
+@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST)
+class PurgeRecycleBinTest(FileCRUDAPITest):
+
+    def test_01_purge_expired_folders_and_files(self):
+        """ Testing the purge of the expired elements of the recicle bin, the elements
+            not expired stay in the recicle bin """
+
+        Folder.get_by_id(self.gpu.pk).disable_folder_and_children()
+        Folder.get_by_id(self.peripherals.pk).disable_folder_and_children()
+        File.disabled_many_files([self.f_budget.pk])
+
+        expired_date = timezone.now() - timedelta(days=settings.RECYCLE_BIN_RETENTION_DAYS + 1)
+        Folder.get_element_by_id_like_queryset(self.gpu.pk).update(trashed_at=expired_date)
+        File.get_element_by_id_like_queryset(self.f_budget.pk).update(trashed_at=expired_date)
+
+        media_path_gpu = f'{settings.MEDIA_ROOT_TEST}{self.gpu.get_path_folder()}'
+        media_path_budget = f'{settings.MEDIA_ROOT_TEST}{self.f_budget.file.name}'
+
+        output = StringIO()
+        call_command('purge_recycle_bin', '--once', '--batch-size', '3', stdout=output)
+
+        self.assertIn('Purged 11 files, 7 folders', output.getvalue())
+        self.assertFalse(Folder.exists_by_id(self.gpu.pk))
+        self.assertFalse(Folder.exists_by_id(self.ti_rtx.pk))
+        self.assertFalse(File.exists_by_id(self.f_3060_ti.pk))
+        self.assertFalse(File.exists_by_id(self.f_budget.pk))
+        self.assertFalse(os.path.exists(media_path_gpu))
+        self.assertFalse(os.path.exists(media_path_budget))
+        self.assertTrue(Folder.exists_by_id(self.peripherals.pk))
+        self.assertTrue(File.exists_by_id(self.f_mouse.pk))
+        self.assertTrue(Folder.get_by_id(self.hardware.pk).is_active)
+
+    def test_02_evict_recicle_bin_over_quota(self):
+        """ Testing the eviction of the oldest elements of the recicle bin before his
+            expiration when the user is over the quota """
+
+        File.disabled_many_files([self.f_series_1000.pk])
+        Folder.get_by_id(self.peripherals.pk).disable_folder_and_children()
+
+        used = sum(File.get_all_files_by_user(self.user).values_list('details__size', flat=True))
+
+        call_command('purge_recycle_bin', '--once', '--quota-bytes', str(used - 1), stdout=StringIO())
+
+        self.assertFalse(File.exists_by_id(self.f_series_1000.pk))
+        self.assertTrue(Folder.exists_by_id(self.peripherals.pk))
+        self.assertTrue(File.exists_by_id(self.f_mouse.pk))
@@ -1,5 +1,7 @@
 from django.conf import settings
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
@@ -10,6 +12,7 @@ from apps.directories.test.files.test_crud import FileCRUDAPITest
 
 URL_MOVE_TO_RECICLE_BIN = 'directories:folders-move-to-recycle-bin'
 URL_RECOVER_FOLDER = 'directories:folders-recover-folder'
+URL_RECYCLE_BIN = 'directories:folders-recycle-bin'
 
 
 @override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST)
@@ -120,3 +123,60 @@ class FolderRecicleBinTest(FileCRUDAPITest):
         self.assertTrue(file_2060_ti_moved.is_active)
         self.assertTrue(file_3060_ti_moved.is_active)
         self.assertTrue(file_1030_moved.is_active)
+
+    def test_03_recicle_bin_statements_independent_of_subtree_size(self):
+        """ Testing to move to recicle bin and recover folders with a number of statements
+            independent of the size of the subtree, and the listing of the top level of the recicle bin """
+
+        statements_to_disable = []
+        statements_to_recover = []
+        for folder in (self.ti_gtx, self.gpu):
+            with CaptureQueriesContext(connection) as context:
+                Folder.get_by_id(folder.pk).disable_folder_and_children()
+            statements_to_disable.append(len(context.captured_queries))
+
+        url_recycle_bin = reverse(URL_RECYCLE_BIN)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = self.client.get(url_recycle_bin)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({folder['pk'] for folder in response.data['folders']}, {self.ti_gtx.pk, self.gpu.pk})
+        self.assertEqual(response.data['files'], [])
+        self.assertFalse(File.get_by_id(self.f_3060_ti.pk).is_active)
+
+        # The folder inside the other trashed folder is recovered after it
+        for folder in (self.gpu, self.ti_gtx):
+            with CaptureQueriesContext(connection) as context:
+                Folder.get_by_id(folder.pk).activate_folder_and_children()
+            statements_to_recover.append(len(context.captured_queries))
+
+        self.assertEqual(statements_to_disable[0], statements_to_disable[1])
+        self.assertEqual(statements_to_recover[0], statements_to_recover[1])
+        self.assertTrue(Folder.get_by_id(self.ti_rtx.pk).is_active)
+        self.assertTrue(File.get_by_id(self.f_3060_ti.pk).is_active)
+        self.assertFalse(Folder.get_trashed_folders_by_user(self.user).exists())
+
+    def test_04_recover_folder_inside_trashed_folder(self):
+        """ Testing that a folder inside a trashed folder is only recovered with it """
+
+        Folder.get_by_id(self.gpu.pk).disable_folder_and_children()
+        Folder.get_by_id(self.peripherals.pk).disable_folder_and_children()
+        url_recover_folder = reverse(URL_RECOVER_FOLDER)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        response_descendant = self.client.patch(
+            url_recover_folder,
+            {'folders_to_recover': [self.peripherals.pk, self.rtx.pk]}
+        )
+        rtx_after_descendant = Folder.get_by_id(self.rtx.pk)
+        peripherals_after_descendant = Folder.get_by_id(self.peripherals.pk)
+
+        response_root = self.client.patch(url_recover_folder, {'folders_to_recover': [self.gpu.pk]})
+
+        self.assertEqual(response_descendant.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(rtx_after_descendant.is_active)
+        # None of the folders is recovered when one of them can not be recovered
+        self.assertFalse(peripherals_after_descendant.is_active)
+        self.assertEqual(response_root.status_code, status.HTTP_200_OK)
+        self.assertTrue(Folder.get_by_id(self.rtx.pk).is_active)
+        self.assertTrue(File.get_by_id(self.f_1070_ti.pk).is_active)
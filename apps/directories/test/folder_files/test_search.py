@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework import status
+
+from apps.directories.models import Folder
+from apps.directories.test.files.test_crud import FileCRUDAPITest
+from apps.directories.utils.name_index import NameIndex
+
+from unittest import mock
+
+URL_SEARCH = 'directories:folders-search'
+
+
+@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST)
+class FolderSearchTest(FileCRUDAPITest):
+
+    def setUp(self) -> None:
+        self.url_search = reverse(URL_SEARCH)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def get_names(self, response):
+        return (
+            [folder['name'] for folder in response.data['folders']],
+            [file['name'] for file in response.data['files']],
+        )
+
+    def test_01_search_names_containing_text(self):
+        """ Testing the search of the folders and files that contain a text in all the tree and in a subtree """
+
+        response = self.client.get(self.url_search, {'q': 'SERIES'})
+        response_subtree = self.client.get(self.url_search, {'q': 'series', 'folder': self.g_amd.pk})
+        response_short = self.client.get(self.url_search, {'q': 'ti'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_names(response), (
+            [], ['Series_1000.pdf', 'Series_2000.pdf', 'Series_4000.pdf', 'Series_5000.pdf']
+        ))
+        self.assertEqual(self.get_names(response_subtree), ([], ['Series_4000.pdf', 'Series_5000.pdf']))
+        self.assertEqual(response_short.data['folders'][0]['name'], 'Operative system')
+        self.assertEqual(
+            [folder['pk'] for folder in response_short.data['folders'][1:]],
+            sorted([self.ti_gtx.pk, self.ti_rtx.pk])
+        )
+        self.assertEqual(
+            self.get_names(response_short)[1],
+            ['1070_TI.png', '1080_TI.png', '2060_TI.png', '3060_TI.png']
+        )
+
+    def test_02_search_names_by_prefix(self):
+        """ Testing the search of the folders and files whose name starts with a text """
+
+        response = self.client.get(self.url_search, {'q': '10', 'mode': 'prefix'})
+        response_limited = self.client.get(self.url_search, {'q': '10', 'mode': 'prefix', 'page_size': 2})
+
+        self.assertEqual(self.get_names(response), ([], ['1030.pdf', '1070_TI.png', '1080_TI.png']))
+        self.assertEqual(self.get_names(response_limited), ([], ['1030.pdf', '1070_TI.png']))
+
+    @override_settings(CACHE_SHARED=True)
+    def test_03_search_ignores_recycle_bin_and_sees_renames(self):
+        """ Testing that the trashed elements are not found and the renamed ones are found by the new name """
+
+        Folder.get_by_id(self.g_amd.pk).disable_folder_and_children()
+        nvidia = Folder.get_by_id(self.nvidia.pk)
+        nvidia.name = 'Geforce'
+        nvidia.save()
+
+        response = self.client.get(self.url_search, {'q': 'series'})
+        response_renamed = self.client.get(self.url_search, {'q': 'geforce'})
+
+        self.assertEqual(self.get_names(response), ([], ['Series_1000.pdf', 'Series_2000.pdf']))
+        self.assertEqual(self.get_names(response_renamed), (['Geforce'], []))
+
+    def test_04_search_with_wrong_parameters(self):
+        """ Testing the search without text, in a folder of other user and without credentials """
+
+        response_without_text = self.client.get(self.url_search)
+        response_other_folder = self.client.get(self.url_search, {'q': 'series', 'folder': 1000})
+        self.client.credentials()
+        response_unauthorized = self.client.get(self.url_search, {'q': 'series'})
+
+        self.assertEqual(response_without_text.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response_other_folder.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response_unauthorized.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(CACHE_SHARED=True, NAME_INDEX_MAX_USERS=1)
+    def test_05_name_indexes_kept_for_the_last_users(self):
+        """ Testing that the process keeps the index of a user until other users search """
+
+        NameIndex._indexes.clear()
+        index = NameIndex.load(self.user.pk)
+
+        with self.assertNumQueries(0):
+            self.assertIs(NameIndex.load(self.user.pk), index)
+
+        NameIndex.load(self.user.pk + 1000)
+
+        self.assertEqual(list(NameIndex._indexes), [self.user.pk + 1000])
+
+    def test_06_search_in_database_without_shared_cache(self):
+        """ Testing that without a shared cache the search reads the database instead of building the index """
+
+        with mock.patch.object(NameIndex, 'build') as build:
+            response = self.client.get(self.url_search, {'q': 'series', 'folder': self.nvidia.pk})
+
+        build.assert_not_called()
+        self.assertEqual(self.get_names(response), ([], ['Series_1000.pdf', 'Series_2000.pdf']))
@@ -20,7 +20,7 @@ URL_RECOVER_FOLDER = 'directories:folders-recover-folder'
 URL_DELETE_FOLDER = 'directories:folders-delete-folder'
 
 
-@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST)
+@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST, FILESYSTEM_QUEUE_ENABLED=False)
 class AuthenticationAPITestCase(APITestCase):
 
     @classmethod
@@ -12,7 +12,7 @@ from shutil import rmtree
 URL_MOVE_FOLDER = 'directories:folders-move-folder'
 
 
-@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST)
+@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST, FILESYSTEM_QUEUE_ENABLED=False)
 class FolderCRUDAPITest(APITestCase):
 
     @classmethod
@@ -4,7 +4,8 @@ from django.urls import reverse
 
 from rest_framework import status
 
-from apps.directories.models import Folder
+from apps.directories.models import Folder, FilesystemOperation
+from apps.directories.utils.filesystem_queue import filesystem_queue
 from apps.directories.test.test_crud import FolderCRUDAPITest
 
 import os.path
@@ -102,3 +103,48 @@ class FolderCreateTest(FolderCRUDAPITest):
         self.assertTrue(child_folder.is_descendant_of(hardware_folder))
         # Validation of folders move in media folder
         self.assertTrue(os.path.exists(media_path_new_folder))
+
+    def test_05_paths_of_deep_folder_without_queries(self):
+        """ Testing the paths of a folder are resolved from the stored path without
+            hitting the database, no matter how deep is the folder """
+
+        deep_folder = Folder.objects.get(pk=self.n_gpu_3070_ti.pk)
+        shallow_folder = Folder.objects.get(pk=self.hardware.pk)
+
+        with self.assertNumQueries(0):
+            path_deep_folder = deep_folder.get_path_folder()
+            path_parent_deep_folder = deep_folder.get_path_parent_folder()
+            shallow_folder.get_absolute_path_folder()
+
+        self.assertEqual(path_deep_folder, f'{self.user.pk}/Hardware/GPU/RTX/TI/3070 TI')
+        self.assertEqual(path_parent_deep_folder, f'{self.user.pk}/Hardware/GPU/RTX/TI')
+        self.assertTrue(os.path.exists(f'{settings.MEDIA_ROOT_TEST}{path_deep_folder}'))
+
+    @override_settings(FILESYSTEM_QUEUE_ENABLED=True, CACHE_SHARED=True)
+    def test_06_create_folder_journaled_until_commit(self):
+        """ Testing the creation of the folder in media is journaled in the request
+            and applied after the commit of the transaction """
+        payload = {
+            'name': 'Drivers',
+        }
+
+        url_create_folder = reverse(URL_CREATE_FOLDER, kwargs={'pk': self.root_folder.pk})
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(url_create_folder, payload)
+
+        child_folder = Folder.objects.get(name='Drivers')
+        media_path_new_folder = f'{settings.MEDIA_ROOT_TEST}{child_folder.get_path_folder()}'
+        journal_entry = FilesystemOperation.objects.get(source=media_path_new_folder)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # The submit of the journal entry and the invalidation of the ownership and name indexes
+        self.assertEqual(len(callbacks), 3)
+        self.assertEqual(journal_entry.operation, FilesystemOperation.CREATE_FOLDER)
+        self.assertFalse(os.path.exists(media_path_new_folder))
+
+        filesystem_queue.apply(journal_entry)
+
+        self.assertTrue(os.path.exists(media_path_new_folder))
+        self.assertFalse(FilesystemOperation.exists_by_id(journal_entry.pk))
@@ -110,3 +110,21 @@ class FolderListTest(FolderCRUDAPITest):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(len(response.data) == 0)
+
+    def test_08_list_children_folders_by_pages(self):
+        """ Testing the list of children folders following the cursor of the next page """
+
+        url_list_folder = reverse(URL_LIST_CHILDREN, kwargs={'pk': self.hardware.pk})
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        names = []
+        next_url = f'{url_list_folder}?page_size=4'
+        while next_url:
+            response = self.client.get(next_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(len(response.data) <= 4)
+            names.extend(folder['name'] for folder in response.data)
+            next_url = response.get('Link', '').split(';')[0].strip('<>')
+
+        self.assertEqual(names, ['Budget', 'CPU', 'GPU', 'Memories', 'Peripherals', 'Storage'])
@@ -1,10 +1,13 @@
 from django.conf import settings
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
 
 from apps.directories.models import Folder
+from apps.directories.utils.ownership_index import OwnershipIndex
 from apps.directories.test.test_crud import FolderCRUDAPITest
 
 import os.path
@@ -250,3 +253,51 @@ class FolderUpdateTest(FolderCRUDAPITest):
         self.assertTrue(os.path.exists(media_pth_3070_ti))
         self.assertTrue(os.path.exists(media_pth_2000))
         self.assertTrue(os.path.exists(media_pth_4000))
+
+    def test_08_update_name_statements_independent_of_subtree_size(self):
+        """ Benchmark of the statements used to rename folders with subtrees of different sizes.
+            The number of statements must be the same for a folder with few descendants and
+            for a folder with many descendants """
+
+        for number in range(40):
+            Folder.create_folder_and_assign_to_parent(self.user, f'Core {number}', Folder.objects.get(pk=self.i5.pk))
+
+        # The folders of the user are loaded in the cache by the first request
+        OwnershipIndex.load(self.user.pk)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        statements_by_subtree_size = {}
+        for folder, new_name in ((self.memories, 'Memory'), (self.storage, 'Storage units'), (self.cpu, 'Processors')):
+            url_detail_folder = reverse(URL_DETAIL_FOLDER, kwargs={'pk': folder.pk})
+            subtree_size = Folder.objects.get(pk=folder.pk).get_descendant_count()
+
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.patch(url_detail_folder, {'name': new_name})
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            statements_by_subtree_size[subtree_size] = len(context.captured_queries)
+
+        self.assertEqual(len(set(statements_by_subtree_size.values())), 1, statements_by_subtree_size)
+
+        i5_folder = Folder.objects.get(pk=self.i5.pk)
+        ram_folder = Folder.objects.get(pk=self.ram.pk)
+        self.assertEqual(i5_folder.get_path_folder(), f'{self.user.pk}/Hardware/Processors/Intel/i5')
+        self.assertEqual(i5_folder.route, f'{self.user.pk}/Hardware/Processors/Intel/')
+        self.assertEqual(ram_folder.get_path_folder(), f'{self.user.pk}/Hardware/Memory/RAM')
+        self.assertTrue(os.path.exists(f'{settings.MEDIA_ROOT_TEST}{i5_folder.get_path_folder()}'))
+        self.assertTrue(os.path.exists(f'{settings.MEDIA_ROOT_TEST}{ram_folder.get_path_folder()}'))
+
+    def test_09_save_without_changes_of_name(self):
+        """ Testing that a folder saved without changes of his name is updated with one statement """
+
+        folder = Folder.objects.get(pk=self.i5.pk)
+        folder.is_active = False
+
+        with self.assertNumQueries(1):
+            folder.save()
+
+        saved_folder = Folder.objects.get(pk=self.i5.pk)
+        self.assertFalse(saved_folder.is_active)
+        self.assertEqual(saved_folder.get_path_folder(), self.i5.get_path_folder())
+        self.assertEqual(saved_folder.route, self.i5.route)
@@ -0,0 +1,235 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.db import transaction
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from apps.directories.models import File, FilesystemLane, FilesystemOperation, Folder
+from apps.directories.utils.filesystem_queue import filesystem_queue
+
+from unittest import mock
+
+import os
+import shutil
+
+URL_LIST_FILE = 'directories:files-list'
+URL_DELETE_FILES = 'directories:files-delete-file'
+URL_UPLOAD_MANY = 'directories:files-upload-many'
+URL_DETAIL_FOLDER = 'directories:folders-detail'
+
+
+@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST, FILESYSTEM_QUEUE_ENABLED=True)
+class FilesystemQueueTest(TransactionTestCase):
+
+    def setUp(self) -> None:
+        # The threads of the queue and the test can not use the database at the same time, the
+        # operations are submitted at the end of the transaction and the test waits for them
+        with transaction.atomic():
+            self.user = get_user_model().objects.create(
+                pk=40,
+                first_name='queue test',
+                last_name='testing',
+                username='QTS',
+                email='testing_queue@xyz.com',
+                password='contrasenia@123456'
+            )
+        filesystem_queue.join()
+        self.root_folder = Folder.get_root_folder_by_user(self.user)
+        self.lane = filesystem_queue.get_lane_key(f'{settings.MEDIA_ROOT_TEST}{self.root_folder.get_path_folder()}')
+
+    def tearDown(self) -> None:
+        filesystem_queue.join()
+        shutil.rmtree(f'{settings.MEDIA_ROOT_TEST}{self.user.pk}', ignore_errors=True)
+
+    def test_01_operations_applied_in_order_after_the_commit(self):
+        """ Testing that the operations of a user are applied in order by the workers and removed from the journal """
+
+        with transaction.atomic():
+            documents = Folder.create_folder_and_assign_to_parent(self.user, 'Documents', self.root_folder)
+            Folder.create_folder_and_assign_to_parent(self.user, 'Invoices', documents)
+            documents.name = 'Papers'
+            documents.save()
+
+            self.assertEqual(FilesystemOperation.objects.filter(lane=self.lane).count(), 3)
+
+        filesystem_queue.join()
+
+        self.assertTrue(os.path.isdir(f'{settings.MEDIA_ROOT_TEST}{self.user.pk}/Papers/Invoices'))
+        self.assertFalse(os.path.exists(f'{settings.MEDIA_ROOT_TEST}{self.user.pk}/Documents'))
+        self.assertFalse(FilesystemOperation.objects.exists())
+        self.assertIsNone(FilesystemLane.objects.get(key=self.lane).claimed_until)
+
+    def test_02_move_to_existing_destination_failed(self):
+        """ Testing that a move does not put the source inside a destination that already exists """
+
+        documents = Folder.create_folder_and_assign_to_parent(self.user, 'Documents', self.root_folder)
+        filesystem_queue.join()
+        source = f'{settings.MEDIA_ROOT_TEST}{self.user.pk}/Documents'
+        destination = f'{settings.MEDIA_ROOT_TEST}{self.user.pk}/Papers'
+        os.makedirs(destination)
+
+        filesystem_queue.enqueue(FilesystemOperation.MOVE, source, destination)
+        filesystem_queue.join()
+
+        journal_entry = FilesystemOperation.objects.get()
+
+        self.assertEqual(journal_entry.status, FilesystemOperation.FAILED)
+        self.assertIn('FileExistsError', journal_entry.error)
+        self.assertTrue(os.path.isdir(f'{settings.MEDIA_ROOT_TEST}{documents.get_path_folder()}'))
+        self.assertFalse(os.path.exists(f'{destination}/Documents'))
+
+    def test_03_lane_claimed_by_other_process(self):
+        """ Testing that the operations of a lane claimed by other process are not applied until the lease expires """
+
+        self.assertTrue(FilesystemLane.claim(self.lane))
+
+        Folder.create_folder_and_assign_to_parent(self.user, 'Documents', self.root_folder)
+        filesystem_queue.join()
+
+        self.assertEqual(FilesystemOperation.objects.filter(status=FilesystemOperation.PENDING).count(), 1)
+        self.assertFalse(os.path.exists(f'{settings.MEDIA_ROOT_TEST}{self.user.pk}/Documents'))
+
+        FilesystemLane.objects.filter(key=self.lane).update(claimed_until=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(filesystem_queue.replay_pending(), 1)
+        filesystem_queue.join()
+
+        self.assertTrue(os.path.isdir(f'{settings.MEDIA_ROOT_TEST}{self.user.pk}/Documents'))
+        self.assertFalse(FilesystemOperation.objects.exists())
+
+
+@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST, FILESYSTEM_QUEUE_ENABLED=True, PREVIEWS_WORKERS=0)
+class FilesystemQueueAPITest(TransactionTestCase):
+    """ The views with the queue enabled. The lanes are applied when the test replays them, so the
+        requests find the operations of the requests before them still pending """
+
+    def setUp(self) -> None:
+        with transaction.atomic():
+            self.user = get_user_model().objects.create(
+                pk=41,
+                first_name='queue api test',
+                last_name='testing',
+                username='QATS',
+                email='testing_queue_api@xyz.com',
+                password='contrasenia@123456'
+            )
+            self.root_folder = Folder.get_root_folder_by_user(self.user)
+            self.documents = Folder.create_folder_and_assign_to_parent(self.user, 'Documents', self.root_folder)
+        filesystem_queue.join()
+
+        self.user_path = f'{settings.MEDIA_ROOT_TEST}{self.user.pk}'
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+
+    def tearDown(self) -> None:
+        filesystem_queue.join()
+        shutil.rmtree(self.user_path, ignore_errors=True)
+
+    def upload(self, name, content):
+        return self.client.post(
+            reverse(URL_LIST_FILE),
+            {'parent_folder': self.documents.pk, 'file': SimpleUploadedFile(name, content)},
+            format='multipart'
+        )
+
+    def apply_pending_operations(self):
+        filesystem_queue.replay_pending()
+        filesystem_queue.join()
+
+    def test_01_upload_after_rename_of_his_folder(self):
+        """ Testing that an upload to a folder renamed by a pending operation is written after the rename """
+
+        with mock.patch.object(filesystem_queue, 'submit'):
+            response_rename = self.client.patch(
+                reverse(URL_DETAIL_FOLDER, kwargs={'pk': self.documents.pk}),
+                {'name': 'Papers'}
+            )
+            response_upload = self.upload('Report.txt', b'Content of the report')
+
+            self.assertFalse(os.path.exists(f'{self.user_path}/Papers'))
+
+        self.apply_pending_operations()
+
+        new_file = File.objects.get(name='Report.txt')
+
+        self.assertEqual(response_rename.status_code, status.HTTP_200_OK)
+        self.assertEqual(response_upload.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(new_file.file.name, f'{self.user.pk}/Papers/Report.txt')
+        self.assertFalse(os.path.exists(f'{self.user_path}/Documents'))
+        with open(new_file.get_full_path(), 'rb') as content:
+            self.assertEqual(content.read(), b'Content of the report')
+        self.assertFalse(FilesystemOperation.objects.exists())
+
+    def test_02_upload_after_delete_of_file_with_the_same_name(self):
+        """ Testing that an upload is not removed by the pending removal of a deleted file with the same name """
+
+        self.upload('Report.txt', b'First report')
+        self.apply_pending_operations()
+        first_file = File.objects.get(name='Report.txt')
+
+        with mock.patch.object(filesystem_queue, 'submit'):
+            response_delete = self.client.delete(reverse(URL_DELETE_FILES), {'files_to_delete': [first_file.pk]})
+            response_upload = self.upload('Report.txt', b'Second report')
+
+        self.apply_pending_operations()
+
+        new_file = File.objects.get(name='Report.txt')
+
+        self.assertEqual(response_delete.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(response_upload.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(new_file.file.name, first_file.file.name)
+        with open(new_file.get_full_path(), 'rb') as content:
+            self.assertEqual(content.read(), b'Second report')
+        self.assertFalse(FilesystemOperation.objects.exists())
+        self.assertFalse(os.listdir(f'{settings.MEDIA_ROOT_TEST}{settings.FILESYSTEM_QUEUE_STAGING_FOLDER}/{self.user.pk}'))
+
+    def test_03_staged_contents_of_rolled_back_uploads_removed(self):
+        """ Testing that the replay removes the old staged contents without operation in the journal """
+
+        staging_path = filesystem_queue.get_staging_path(f'{self.user_path}/Documents/Report.txt')
+        os.makedirs(os.path.dirname(staging_path), exist_ok=True)
+        with open(staging_path, 'wb') as content:
+            content.write(b'Content of a rolled back upload')
+
+        removed_recent = filesystem_queue.remove_abandoned_staged_contents()
+        os.utime(staging_path, (0, 0))
+        removed_old = filesystem_queue.remove_abandoned_staged_contents()
+
+        self.assertEqual((removed_recent, removed_old), (0, 1))
+        self.assertFalse(os.path.exists(staging_path))
+
+    @override_settings(CONTENT_ADDRESSED_STORAGE=True)
+    def test_04_upload_of_the_content_of_a_collected_blob(self):
+        """ Testing that the pending removal of a collected blob does not remove the same content uploaded again """
+
+        self.upload('Report.txt', b'Shared report')
+        self.apply_pending_operations()
+        first_file = File.objects.get(name='Report.txt')
+
+        with mock.patch.object(filesystem_queue, 'submit'):
+            response_delete = self.client.delete(reverse(URL_DELETE_FILES), {'files_to_delete': [first_file.pk]})
+            response_upload = self.client.post(reverse(URL_UPLOAD_MANY), {
+                'parent_folder': self.documents.pk,
+                'files': [SimpleUploadedFile('Copy.txt', b'Shared report')]
+            })
+
+        self.apply_pending_operations()
+
+        new_file = File.objects.get(name='Copy.txt')
+        blob_path = os.path.join(settings.MEDIA_ROOT_TEST, new_file.blob.file.name)
+
+        self.assertEqual(response_delete.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(response_upload.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(new_file.file.name, first_file.file.name)
+        with open(blob_path, 'rb') as content:
+            self.assertEqual(content.read(), b'Shared report')
+        self.assertFalse(FilesystemOperation.objects.exists())
+        os.remove(blob_path)
@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import override_settings
 from django.urls import reverse
 
@@ -8,8 +9,10 @@ from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
 
 from apps.directories.models import Folder
+from apps.directories.utils.ownership_index import OwnershipIndex
 
 from shutil import rmtree
+from unittest import mock
 
 URL_CREATE_FOLDER = 'directories:folders-create-folder'
 URL_LIST_CHILDREN = 'directories:folders-children-folders'
@@ -20,7 +23,7 @@ URL_RECOVER_FOLDER = 'directories:folders-recover-folder'
 URL_DELETE_FOLDER = 'directories:folders-delete-folder'
 
 
-@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST)
+@override_settings(MEDIA_ROOT=settings.MEDIA_ROOT_TEST, FILESYSTEM_QUEUE_ENABLED=False)
 class PermissionsAPITestCase(APITestCase):
 
     @classmethod
@@ -203,6 +206,46 @@ class PermissionsAPITestCase(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    @override_settings(CACHE_SHARED=True)
+    def test_08_ownership_index_cached_and_invalidated(self):
+        """ Testing that the folders of the user are read from the cache until a folder is created or deleted """
+
+        OwnershipIndex.load(self.user_1.pk)
+
+        with self.assertNumQueries(0):
+            index = OwnershipIndex.load(self.user_1.pk)
+
+        self.assertTrue(index.owns_folders([self.root_folder_1.pk, self.user_1_test_folder_3.pk]))
+        self.assertFalse(index.owns_folders([self.user_1_test_folder_3.pk, self.user_2_test_folder_1.pk]))
+
+        new_folder = Folder.create_folder_and_assign_to_parent(self.user_1, 'user_1_test_4', self.root_folder_1)
+
+        self.assertTrue(OwnershipIndex.load(self.user_1.pk).owns_folder(new_folder.pk))
+
+        Folder.delete_many_folder_and_children([new_folder.pk])
+
+        self.assertFalse(OwnershipIndex.load(self.user_1.pk).owns_folder(new_folder.pk))
+
+    def test_09_ownership_index_kept_by_the_process_without_shared_cache(self):
+        """ Testing that without a shared cache the process keeps the folders of the user and looks
+            in the database for the folders created by other process """
+
+        cache.clear()
+        with self.assertNumQueries(1):
+            OwnershipIndex.load(self.user_1.pk)
+
+        # Other process creates the folder, his invalidation does not reach the cache of this process
+        with mock.patch.object(OwnershipIndex, 'invalidate'):
+            new_folder = Folder.create_folder_and_assign_to_parent(self.user_1, 'user_1_test_5', self.root_folder_1)
+
+        with self.assertNumQueries(0):
+            index = OwnershipIndex.load(self.user_1.pk)
+            self.assertTrue(index.owns_folders([self.root_folder_1.pk, self.user_1_test_folder_3.pk]))
+
+        with self.assertNumQueries(1):
+            self.assertTrue(index.owns_folder(new_folder.pk))
+            self.assertFalse(index.owns_folder(self.user_2_test_folder_1.pk))
+
     @classmethod
     def tearDownClass(cls):
         """ Remove the test file in media"""
@@ -0,0 +1,96 @@
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from apps.directories.models import File, Folder
+from apps.directories.utils.storage_backends import get_storage_backend
+
+from moto import mock_s3
+
+import boto3
+import io
+import os
+
+S3_BACKEND = 'apps.directories.utils.storage_backends.S3StorageBackend'
+S3_MEDIA_STORAGE = 'apps.directories.utils.storage_backends.BackendMediaStorage'
+
+
+@override_settings(
+    MEDIA_ROOT=settings.MEDIA_ROOT_TEST,
+    FILESYSTEM_QUEUE_ENABLED=False,
+    STORAGE_BACKEND=S3_BACKEND,
+    DEFAULT_FILE_STORAGE=S3_MEDIA_STORAGE,
+    STORAGE_S3_BUCKET='qstorage-test',
+    STORAGE_S3_REGION='us-east-1',
+    STORAGE_S3_ACCESS_KEY='testing',
+    STORAGE_S3_SECRET_KEY='testing',
+    STORAGE_S3_MULTIPART_CHUNK_SIZE=5 * 1024 * 1024,
+)
+class S3StorageBackendTest(TestCase):
+
+    def setUp(self) -> None:
+        self.mock_s3 = mock_s3()
+        self.mock_s3.start()
+        self.client_s3 = boto3.client('s3', region_name='us-east-1')
+        self.client_s3.create_bucket(Bucket=settings.STORAGE_S3_BUCKET)
+
+    def tearDown(self) -> None:
+        self.mock_s3.stop()
+
+    def get_keys(self):
+        response = self.client_s3.list_objects_v2(Bucket=settings.STORAGE_S3_BUCKET)
+        return {element['Key'] for element in response.get('Contents', [])}
+
+    def test_01_multipart_upload_and_server_side_move(self):
+        """ Testing that the big files are uploaded by parts and the folders are moved inside the bucket """
+
+        storage_backend = get_storage_backend()
+        content = os.urandom(11 * 1024 * 1024)
+        path_file = os.path.join(settings.MEDIA_ROOT, '1/Videos/movie.mp4')
+
+        storage_backend.create_folder(os.path.join(settings.MEDIA_ROOT, '1/Archive'))
+        storage_backend.save(path_file, io.BytesIO(content))
+
+        head = self.client_s3.head_object(Bucket=settings.STORAGE_S3_BUCKET, Key='1/Videos/movie.mp4')
+        # The ETag of an object uploaded by parts ends with the number of parts
+        self.assertTrue(head['ETag'].strip('"').endswith('-3'))
+
+        with self.assertRaises(FileExistsError):
+            storage_backend.move(os.path.join(settings.MEDIA_ROOT, '1/Videos'), os.path.join(settings.MEDIA_ROOT, '1/Archive'))
+        storage_backend.move(os.path.join(settings.MEDIA_ROOT, '1/Videos'), os.path.join(settings.MEDIA_ROOT, '1/Archive/Videos'))
+
+        self.assertEqual(self.get_keys(), {'1/Archive/', '1/Archive/Videos/movie.mp4'})
+        with storage_backend.open(os.path.join(settings.MEDIA_ROOT, '1/Archive/Videos/movie.mp4')) as moved_file:
+            self.assertEqual(moved_file.read(), content)
+
+        storage_backend.remove_tree(os.path.join(settings.MEDIA_ROOT, '1/Archive'))
+
+        self.assertEqual(self.get_keys(), set())
+
+    def test_02_directory_operations_in_bucket(self):
+        """ Testing that the folders and files of a user are created, renamed and deleted in the bucket """
+
+        user = get_user_model().objects.create(
+            pk=30,
+            first_name='storage test',
+            last_name='testing',
+            username='TST',
+            email='testing_storage@xyz.com',
+            password='contrasenia@123456'
+        )
+        root_folder = Folder.get_root_folder_by_user(user)
+        documents = Folder.create_folder_and_assign_to_parent(user, 'Documents', root_folder)
+        File.objects.create(parent_folder=documents, file=SimpleUploadedFile('notes.txt', b'notes'))
+
+        self.assertEqual(self.get_keys(), {'30/', '30/Documents/', '30/Documents/notes.txt'})
+
+        documents.name = 'Papers'
+        documents.save()
+
+        self.assertEqual(self.get_keys(), {'30/', '30/Papers/', '30/Papers/notes.txt'})
+        self.assertEqual(File.objects.get(parent_folder=documents).file.read(), b'notes')
+
+        Folder.delete_many_folder_and_children([documents.pk])
+
+        self.assertEqual(self.get_keys(), {'30/'})
@@ -2,7 +2,7 @@ from django.urls import path, include
 
 from rest_framework.routers import DefaultRouter
 
-from .views import FolderVS, FileVS
+from .views import FolderVS, FileVS, transfers
 
 
 router = DefaultRouter()
@@ -14,4 +14,8 @@ app_name = 'directories'
 
 urlpatterns = [
     path('', include(router.urls)),
+    # Async transfers for the ASGI application
+    path('async/files/upload/', transfers.upload_file, name='async-upload-file'),
+    path('async/files/<int:pk>/download/', transfers.download_file, name='async-download-file'),
+    path('async/files/upload-sessions/<int:session_pk>/', transfers.upload_chunk, name='async-upload-chunk'),
 ]
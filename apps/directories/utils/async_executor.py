@@ -0,0 +1,100 @@
+from typing import Any, Callable, Optional
+
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections
+
+import asyncio
+import functools
+import os
+import threading
+
+
+class BoundedExecutor():
+    """
+        Pool of threads with a fixed size used by the async views to run the blocking work.
+        The connections to the database are opened by the threads of the pool, so their
+        number is limited by the size of the pool and not by the number of requests
+    """
+
+    def __init__(self, name: str, setting_workers: str) -> None:
+        self.name = name
+        self.setting_workers = setting_workers
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, self.setting_workers),
+                    thread_name_prefix=self.name
+                )
+        return self.executor
+
+    @staticmethod
+    def _call(func: Callable, *args, **kwargs) -> Any:
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """ Run the function in a thread of the pool and wait his result without blocking the event loop """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(self._call, func, *args, **kwargs))
+
+    def reset_after_fork(self) -> None:
+        self.executor = None
+        self.lock = threading.Lock()
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """
+        ASGI handler that reads the blocks of the streaming responses, like the downloads and
+        the zip archives, in the pool of the reads of the files. Django 4.0 iterates them in
+        the event loop, so a read of the disk stopped all the requests of the process.
+
+        The iterator of the response can be continued by any thread of the pool
+    """
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        # The headers and the cookies are sent like in ASGIHandler
+        response_headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode('ascii')
+            if isinstance(value, str):
+                value = value.encode('latin1')
+            response_headers.append((bytes(header), bytes(value)))
+        for cookie in response.cookies.values():
+            response_headers.append((b'Set-Cookie', cookie.output(header='').encode('ascii').strip()))
+
+        await send({'type': 'http.response.start', 'status': response.status_code, 'headers': response_headers})
+
+        parts = iter(response)
+        while True:
+            part = await io_executor.run(next, parts, None)
+            if part is None:
+                break
+            for chunk, _ in self.chunk_bytes(part):
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body'})
+
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+
+# Queries of the async views
+orm_executor = BoundedExecutor('async-orm', 'ASYNC_ORM_WORKERS')
+# Reads and writes of the content of the files
+io_executor = BoundedExecutor('async-io', 'ASYNC_IO_WORKERS')
+
+os.register_at_fork(after_in_child=orm_executor.reset_after_fork)
+os.register_at_fork(after_in_child=io_executor.reset_after_fork)
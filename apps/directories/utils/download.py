@@ -0,0 +1,335 @@
+from typing import IO, TYPE_CHECKING, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from urllib.parse import quote
+
+import functools
+import mimetypes
+import operator
+import os
+import uuid
+import zipfile
+
+if TYPE_CHECKING:
+    from django.db.models import QuerySet
+    from django.http import HttpRequest
+    from ..models import File, Folder
+
+X_ACCEL_REDIRECT = 'x-accel-redirect'
+X_SENDFILE = 'x-sendfile'
+# Rows of the folders and the files read by query to write a zip archive
+ZIP_PAGE_SIZE = 1000
+
+
+class RangeFileWrapper():
+    """
+        File that only returns the bytes of a range. The file descriptor is left in the first
+        byte of the range, so a server with wsgi.file_wrapper can send it with os.sendfile
+        using the Content-Length of the response, and any other server reads it by blocks
+    """
+
+    def __init__(self, filelike: IO[bytes], start: int, length: int) -> None:
+        self.filelike = filelike
+        self.remaining = length
+        self.filelike.seek(start)
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.filelike.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self.filelike.fileno()
+
+    def close(self) -> None:
+        self.filelike.close()
+
+
+class DownloadFileResponse(FileResponse):
+
+    def __init__(self, *args, **kwargs) -> None:
+        # Used to read the file and by the wsgi.file_wrapper of the server
+        self.block_size = settings.FILE_DOWNLOADS_BLOCK_SIZE
+        super().__init__(*args, **kwargs)
+
+
+def get_etag(file: 'File') -> str:
+    """ Return the entity tag of the content of a file """
+    if file.is_content_addressed():
+        return f'"{file.blob.sha256}"'
+    return f'"{file.pk}-{int(file.updated_at.timestamp() * 1000000)}-{file.details.size}"'
+
+
+def get_content_disposition(name: str) -> str:
+    try:
+        name.encode('ascii')
+        return 'attachment; filename="{}"'.format(name.replace('\\', '\\\\').replace('"', r'\"'))
+    except UnicodeEncodeError:
+        return f"attachment; filename*=utf-8''{quote(name)}"
+
+
+def parse_range_header(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+        Return the ranges of a Range header like a list of (start, end) with the end included.
+        Return None if the header is not valid and must be ignored, and an empty list if no
+        range can be satisfied
+
+        Parameters:
+            header(str): value of the Range header
+            size(int): size of the file in bytes
+    """
+    unit, _, ranges_specifier = header.partition('=')
+    if unit.strip() != 'bytes' or not ranges_specifier:
+        return None
+
+    ranges = []
+    for specifier in ranges_specifier.split(','):
+        start, separator, end = specifier.strip().partition('-')
+        if not separator or not (start.isdigit() or end.isdigit()):
+            return None
+        if start and end and not (start.isdigit() and end.isdigit() and int(start) <= int(end)):
+            return None
+
+        if not start:
+            # Suffix range with the last bytes of the file
+            if int(end) == 0:
+                continue
+            ranges.append((max(size - int(end), 0), size - 1))
+        elif int(start) < size:
+            ranges.append((int(start), min(int(end), size - 1) if end else size - 1))
+
+    if len(ranges) > settings.FILE_DOWNLOADS_MAX_RANGES:
+        return None
+
+    return ranges
+
+
+def _get_multipart_content(
+        filelike: IO[bytes], ranges: List[Tuple[int, int]],
+        size: int, content_type: str, boundary: str) -> Iterator[bytes]:
+
+    try:
+        for start, end in ranges:
+            yield (
+                f'--{boundary}\r\nContent-Type: {content_type}\r\n'
+                f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+            ).encode()
+            range_file = RangeFileWrapper(filelike, start, end - start + 1)
+            for block in iter(lambda: range_file.read(settings.FILE_DOWNLOADS_BLOCK_SIZE), b''):
+                yield block
+            yield b'\r\n'
+        yield f'--{boundary}--\r\n'.encode()
+    finally:
+        filelike.close()
+
+
+def _get_offloaded_response(file: 'File') -> HttpResponse:
+    """ Return an empty response with the header that makes the web server send the file """
+    response = HttpResponse()
+    if settings.FILE_DOWNLOADS_MODE == X_ACCEL_REDIRECT:
+        response['X-Accel-Redirect'] = quote(f'{settings.FILE_DOWNLOADS_ACCEL_REDIRECT_PREFIX}{file.file.name}')
+    else:
+        response['X-Sendfile'] = os.path.join(settings.MEDIA_ROOT, file.file.name)
+    # The web server sets the type from the file
+    del response['Content-Type']
+    return response
+
+
+def get_download_response(request: 'HttpRequest', file: 'File') -> HttpResponse:
+    """
+        Return the response to download a file, answering the conditional and range requests
+
+        Parameters:
+            request(HttpRequest): request of the download
+            file(File): file to download
+
+        Return:
+            response(HttpResponse): response with the bytes requested or with the header that
+            lets the web server send them
+    """
+    size = file.details.size
+    etag = get_etag(file)
+    name = file.get_full_name()
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+    if etag in [tag.strip() for tag in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]:
+        response = HttpResponse(status=304)
+        response['ETag'] = etag
+        return response
+
+    if settings.FILE_DOWNLOADS_MODE in (X_ACCEL_REDIRECT, X_SENDFILE):
+        response = _get_offloaded_response(file)
+    else:
+        ranges = None
+        range_header = request.META.get('HTTP_RANGE', '')
+        if range_header and request.META.get('HTTP_IF_RANGE', etag) == etag:
+            ranges = parse_range_header(range_header, size)
+
+        if ranges is not None and not ranges:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        filelike = file.file.storage.open(file.file.name, 'rb').file
+
+        if not ranges:
+            response = DownloadFileResponse(filelike, content_type=content_type)
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            response = DownloadFileResponse(
+                RangeFileWrapper(filelike, start, end - start + 1),
+                status=206,
+                content_type=content_type
+            )
+            response['Content-Length'] = end - start + 1
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        else:
+            boundary = uuid.uuid4().hex
+            response = StreamingHttpResponse(
+                _get_multipart_content(filelike, ranges, size, content_type, boundary),
+                status=206,
+                content_type=f'multipart/byteranges; boundary={boundary}'
+            )
+
+        response['Accept-Ranges'] = 'bytes'
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(file.updated_at.timestamp())
+    response['Cache-Control'] = 'private, no-cache'
+    response['Content-Disposition'] = get_content_disposition(name)
+    return response
+
+
+class ZipStreamBuffer():
+    """
+        Unseekable output of a zip archive. The bytes written are taken by the generator of
+        the response after every block, so the archive is never kept in memory or in disk
+    """
+
+    def __init__(self) -> None:
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def pop(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _get_zip_info(name: str, modified_at, compress_type: int = zipfile.ZIP_STORED, size: int = 0) -> zipfile.ZipInfo:
+    if timezone.is_aware(modified_at):
+        modified_at = timezone.localtime(modified_at)
+    date_time = modified_at.timetuple()[:6]
+    info = zipfile.ZipInfo(name, date_time=max(date_time, (1980, 1, 1, 0, 0, 0)))
+    info.compress_type = compress_type
+    info.file_size = size
+    info.external_attr = (0o40775 << 16) | 0x10 if name.endswith('/') else 0o664 << 16
+    return info
+
+
+def _iterate_by_pages(queryset: 'QuerySet', keys: Tuple[str, ...], fields: Tuple[str, ...]) -> Iterator[tuple]:
+    """
+        Return the fields of the rows of the queryset ordered by the keys, reading them by pages
+        with one query each one instead of with a cursor of the database, so every page can be
+        read by a different thread, like the blocks of a response sent by StreamingASGIHandler
+
+        Parameters:
+            queryset(QuerySet): rows to read
+            keys(Tuple[str, ...]): fields that order the rows, unique together
+            fields(Tuple[str, ...]): fields returned of every row
+    """
+    queryset = queryset.order_by(*keys).values_list(*fields, *keys)
+    last_keys = None
+
+    while True:
+        page = queryset
+        if last_keys is not None:
+            # The rows after the last one read, comparing the keys in order
+            page = page.filter(functools.reduce(operator.or_, [
+                Q(**dict(zip(keys[:position], last_keys)), **{f'{keys[position]}__gt': last_keys[position]})
+                for position in range(len(keys))
+            ]))
+
+        rows = list(page[:ZIP_PAGE_SIZE])
+        for row in rows:
+            yield row[:len(fields)]
+
+        if len(rows) < ZIP_PAGE_SIZE:
+            return
+        last_keys = rows[-1][len(fields):]
+
+
+def _get_zip_content(folder: 'Folder') -> Iterator[bytes]:
+    """ Write the zip archive of the folder and his active descendants by blocks """
+    from ..models import File, Folder
+
+    storage = File._meta.get_field('file').storage
+    # The names inside the archive start in the folder downloaded
+    prefix_length = len(folder.physical_path)
+    buffer = ZipStreamBuffer()
+
+    folders = _iterate_by_pages(
+        Folder.objects.filter(path__startswith=folder.path, is_active=True),
+        ('path', ),
+        ('physical_path', 'updated_at')
+    )
+
+    files = _iterate_by_pages(
+        File.objects.filter(parent_folder__path__startswith=folder.path, parent_folder__is_active=True, is_active=True),
+        ('parent_folder__path', 'name', 'pk'),
+        ('file', 'name', 'details__type', 'details__size', 'parent_folder__physical_path', 'updated_at')
+    )
+
+    with zipfile.ZipFile(buffer, mode='w', allowZip64=True) as archive:
+        for physical_path, updated_at in folders:
+            archive.writestr(_get_zip_info(f'{folder.name}{physical_path[prefix_length:]}/', updated_at), b'')
+        yield buffer.pop()
+
+        for path_file, name, type_file, size, physical_path, updated_at in files:
+            full_name = name if '.' in name else f'{name}.{type_file}'
+            compress_type = zipfile.ZIP_STORED if type_file.lower() in settings.ZIP_STORED_TYPES else zipfile.ZIP_DEFLATED
+            info = _get_zip_info(f'{folder.name}{physical_path[prefix_length:]}/{full_name}', updated_at, compress_type, size)
+
+            with storage.open(path_file, 'rb') as content, archive.open(info, mode='w') as entry:
+                for block in iter(lambda: content.read(settings.FILE_DOWNLOADS_BLOCK_SIZE), b''):
+                    entry.write(block)
+                    yield buffer.pop()
+            yield buffer.pop()
+
+    yield buffer.pop()
+
+
+def get_folder_zip_response(folder: 'Folder') -> StreamingHttpResponse:
+    """
+        Return the response that streams a zip archive with the folder, his active descendants
+        and all their files. The memory used does not depend on the size of the archive
+
+        Parameters:
+            folder(Folder): folder to download
+
+        Return:
+            response(StreamingHttpResponse): response with the archive
+    """
+    response = StreamingHttpResponse(_get_zip_content(folder), content_type='application/zip')
+    response['Content-Disposition'] = get_content_disposition(f'{folder.name}.zip')
+    response['Cache-Control'] = 'private, no-cache'
+    return response
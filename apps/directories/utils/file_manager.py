@@ -2,11 +2,13 @@ from typing import TYPE_CHECKING, Tuple
 
 from django.conf import settings
 
+from .filesystem_queue import filesystem_queue
+from .folder_aggregates import FolderAggregates
+
 import os
-import shutil
 
 if TYPE_CHECKING:
-    from ..models import File, Folder
+    from ..models import File
 
 
 class FileManager():
@@ -29,10 +31,14 @@ class FileManager():
         return os.path.join(*args)
 
     def _rename_folder(self, old_path: str, new_path: str) -> None:
-        os.rename(old_path, new_path)
+        from ..models import FilesystemOperation
+
+        filesystem_queue.enqueue(FilesystemOperation.MOVE, old_path, new_path)
 
     def _move_folders(self, path_actual_file, path_new_file):
-        shutil.move(path_actual_file, path_new_file)
+        from ..models import FilesystemOperation
+
+        filesystem_queue.enqueue(FilesystemOperation.MOVE, path_actual_file, path_new_file)
 
     def __process_paths(self) -> Tuple[str, str]:
         """ Return the old an new path in that order like a tuple"""
@@ -50,6 +56,9 @@ class FileManager():
     def _update_file_paths(self):
         """Update the path of actual file """
 
+        if self.actual_file.is_content_addressed():
+            return
+
         paths_processed = self.__process_paths()
         old_rename = paths_processed[0]
         new_rename = paths_processed[1]
@@ -57,23 +66,17 @@ class FileManager():
         self._move_folders(old_rename, new_rename)
         self.actual_file.file = f'{self.actual_file.parent_folder.get_path_folder()}/{self.actual_file.get_full_name()}'
 
-    def _update_file_paths_by_parent_folders(self, folder: 'Folder'):
-        """Update the path of actual file using a folder object"""
-
-        new_path = folder.get_absolute_path_folder()
-        old_path = self.__get_new_path_folder()
-        self._move_folders(old_path, new_path)
-        self.actual_file.file = f'{self.actual_file.parent_folder.get_path_folder()}/{self.actual_file.get_full_name()}'
-
     def _update_file_name(self):
         """Update the name of actual file """
 
-        paths_processed = self.__process_paths()
-        old_rename = paths_processed[0]
-        new_rename = paths_processed[1]
+        if not self.actual_file.is_content_addressed():
+            paths_processed = self.__process_paths()
+            old_rename = paths_processed[0]
+            new_rename = paths_processed[1]
+
+            self._rename_folder(old_rename, new_rename)
+            self.actual_file.file = f'{self.actual_file.parent_folder.get_path_folder()}/{self.actual_file.get_full_name()}'
 
-        self._rename_folder(old_rename, new_rename)
-        self.actual_file.file = f'{self.actual_file.parent_folder.get_path_folder()}/{self.actual_file.get_full_name()}'
         self.actual_file.name = self.actual_file.get_full_name()
 
     def _process_save(self):
@@ -91,6 +94,15 @@ class FileManager():
             self._update_file_name()
 
     def _delete_folder(self) -> None:
+        from ..models import Blob, File, FilesystemOperation
+
+        FolderAggregates.add_files_rows(FolderAggregates.get_files_rows(File.objects.filter(pk=self.actual_file.pk)))
+
+        if self.actual_file.is_content_addressed():
+            self.actual_file.delete()
+            Blob.release_many([self.actual_file.blob_id])
+            return
+
         path_folder = self.actual_file.get_full_path()
-        os.remove(path_folder)
+        filesystem_queue.enqueue(FilesystemOperation.REMOVE_FILE, path_folder)
         self.actual_file.delete()
@@ -0,0 +1,341 @@
+from typing import IO, TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .storage_backends import get_storage_backend
+
+import os
+import threading
+import time
+import uuid
+import zlib
+
+if TYPE_CHECKING:
+    from ..models import FilesystemOperation
+
+
+class FilesystemQueue():
+    """
+        Queue of the operations over the media folder. Every operation is written in a journal
+        inside the transaction that changes the database and it is applied by the workers after
+        the commit. The operations of the same user are applied in order by the process that
+        holds the lease of his lane, so two processes never apply the same operation. The
+        uploaded contents are saved in the staging folder and moved to their paths by the
+        lane, after the moves and removals registered before them.
+    """
+
+    def __init__(self) -> None:
+        self.lanes: Optional[List[ThreadPoolExecutor]] = None
+        self.scheduled: Set[str] = set()
+        self.lock = threading.Lock()
+
+    def _get_lanes(self) -> List[ThreadPoolExecutor]:
+        with self.lock:
+            if self.lanes is None:
+                self.lanes = [
+                    ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'filesystem-queue-{number}')
+                    for number in range(settings.FILESYSTEM_QUEUE_WORKERS)
+                ]
+        return self.lanes
+
+    def _get_lane(self, key: str) -> ThreadPoolExecutor:
+        """ Return the worker of the lane """
+        lanes = self._get_lanes()
+        return lanes[zlib.crc32(key.encode()) % len(lanes)]
+
+    @staticmethod
+    def get_lane_key(path: str) -> str:
+        """ Return the lane of a path, the folder of the user owner of the path """
+        parts = os.path.relpath(path, settings.MEDIA_ROOT).split(os.sep)
+        # The staged contents are inside a folder named like their lane
+        if parts[0] == settings.FILESYSTEM_QUEUE_STAGING_FOLDER and len(parts) > 2:
+            return parts[1]
+        return parts[0]
+
+    def get_staging_path(self, path: str) -> str:
+        """ Return a new path of the staging folder for a content that will be written in the path """
+        return os.path.join(
+            settings.MEDIA_ROOT,
+            settings.FILESYSTEM_QUEUE_STAGING_FOLDER,
+            self.get_lane_key(path),
+            uuid.uuid4().hex
+        )
+
+    def write(self, path: str, content: IO[bytes]) -> str:
+        """
+            Write the content of a new file. The content is saved in the staging folder and moved
+            to his path by the lane, so it is not written before a rename or a removal of the same
+            path registered before it. If the queue is disabled the content is written immediately
+
+            Parameters:
+                path(str): absolute path of the new file, FileExistsError if other file uses it
+                content(File): content of the file
+            Return:
+                path(str): path written, in the staging folder if the queue is enabled
+        """
+        from ..models import FilesystemOperation
+
+        if not settings.FILESYSTEM_QUEUE_ENABLED:
+            get_storage_backend().create(path, content)
+            return path
+
+        staging_path = self.get_staging_path(path)
+        get_storage_backend().create(staging_path, content)
+        self.enqueue(FilesystemOperation.WRITE_FILE, staging_path, path)
+        return staging_path
+
+    def write_many(self, files: List[Tuple[str, IO[bytes]]]) -> List[str]:
+        """
+            Write the contents of many new files in parallel, like the files of an upload of many
+            files. The caller must remove the paths returned if his transaction fails, the moves
+            registered in the journal are rolled back with it
+
+            Parameters:
+                files(List[Tuple[str, File]]): absolute path of every new file and his content
+            Return:
+                paths(List[str]): paths written, in the staging folder if the queue is enabled
+        """
+        from ..models import FilesystemOperation
+
+        if not settings.FILESYSTEM_QUEUE_ENABLED:
+            return get_storage_backend().save_many(files, exclusive=True)
+
+        staging_paths = [self.get_staging_path(path) for path, _ in files]
+        written_paths = get_storage_backend().save_many(
+            [(staging_path, content) for staging_path, (_, content) in zip(staging_paths, files)],
+            exclusive=True
+        )
+        self.enqueue_many(
+            FilesystemOperation.WRITE_FILE,
+            [(staging_path, path) for staging_path, (path, _) in zip(staging_paths, files)]
+        )
+        return written_paths
+
+    def enqueue(self, operation: str, source: str, destination: str = '') -> None:
+        """
+            Register an operation over the media folder. If the queue is disabled the
+            operation is applied immediately
+
+            Parameters:
+                operation(str): One of the operations of FilesystemOperation
+                source(str): absolute path affected by the operation
+                destination(str): absolute destination path of the move operations
+        """
+        from ..models import FilesystemOperation
+
+        if not settings.FILESYSTEM_QUEUE_ENABLED:
+            apply_filesystem_operation(operation, source, destination)
+            return
+
+        lane = self.get_lane_key(source)
+        FilesystemOperation.objects.create(
+            operation=operation,
+            source=source,
+            destination=destination,
+            lane=lane
+        )
+        transaction.on_commit(lambda: self.submit(lane))
+
+    def enqueue_many(self, operation: str, paths: List[Tuple[str, str]]) -> None:
+        """
+            Register many operations that do not depend between them, like the moves of the files
+            of a bulk move. They are written in the journal with one statement and applied in
+            parallel by the worker of the user, after the operations registered before them
+
+            Parameters:
+                operation(str): One of the operations of FilesystemOperation
+                paths(List[Tuple[str, str]]): absolute source and destination paths of every operation
+        """
+        from ..models import FilesystemOperation
+
+        if not paths:
+            return
+
+        if not settings.FILESYSTEM_QUEUE_ENABLED:
+            with ThreadPoolExecutor(max_workers=settings.FILESYSTEM_QUEUE_PARALLEL_OPERATIONS) as executor:
+                list(executor.map(lambda path: apply_filesystem_operation(operation, *path), paths))
+            return
+
+        lane = self.get_lane_key(paths[0][0])
+        batch = uuid.uuid4()
+        FilesystemOperation.objects.bulk_create(
+            [
+                FilesystemOperation(operation=operation, source=source, destination=destination, lane=lane, batch=batch)
+                for source, destination in paths
+            ],
+            batch_size=1000
+        )
+        transaction.on_commit(lambda: self.submit(lane))
+
+    def submit(self, lane: str) -> None:
+        """ Schedule the application of the pending operations of a lane, once while it is waiting """
+        with self.lock:
+            if lane in self.scheduled:
+                return
+            self.scheduled.add(lane)
+        self._get_lane(lane).submit(self._run, lane)
+
+    def _run(self, lane: str) -> None:
+        from ..models import FilesystemLane, FilesystemOperation
+
+        with self.lock:
+            self.scheduled.discard(lane)
+
+        try:
+            # The operations committed while other process held the lease are applied by that
+            # process, it looks for them after releasing the lease
+            while FilesystemLane.claim(lane):
+                try:
+                    self.apply_lane(lane)
+                finally:
+                    FilesystemLane.release(lane)
+                if not FilesystemOperation.objects.filter(lane=lane, status=FilesystemOperation.PENDING).exists():
+                    break
+        finally:
+            close_old_connections()
+
+    def apply_lane(self, lane: str) -> None:
+        """ Apply in order the pending operations of a lane, the caller must hold the lease of the lane """
+        from ..models import FilesystemLane, FilesystemOperation
+
+        while True:
+            journal_entries = list(
+                FilesystemOperation.objects.filter(lane=lane, status=FilesystemOperation.PENDING).order_by('pk')[:1000]
+            )
+            if not journal_entries:
+                return
+
+            for batch, group in groupby(journal_entries, key=lambda journal_entry: journal_entry.batch):
+                group = list(group)
+                if batch is None:
+                    for journal_entry in group:
+                        self.apply(journal_entry)
+                else:
+                    self.apply_many(group)
+                FilesystemLane.renew(lane)
+
+    def apply(self, journal_entry: 'FilesystemOperation') -> None:
+        """ Apply an operation of the journal and remove it, or mark it as failed """
+        from ..models import FilesystemOperation
+
+        try:
+            apply_filesystem_operation(journal_entry.operation, journal_entry.source, journal_entry.destination)
+        except Exception as error:
+            FilesystemOperation.get_element_by_id_like_queryset(journal_entry.pk).update(
+                status=FilesystemOperation.FAILED,
+                error=repr(error)
+            )
+        else:
+            FilesystemOperation.get_element_by_id_like_queryset(journal_entry.pk).delete()
+
+    def apply_many(self, journal_entries: List['FilesystemOperation']) -> None:
+        """ Apply in parallel operations of the journal that do not depend between them """
+        from ..models import FilesystemOperation
+
+        errors: Dict[int, str] = {}
+
+        def apply(journal_entry: 'FilesystemOperation') -> None:
+            try:
+                apply_filesystem_operation(journal_entry.operation, journal_entry.source, journal_entry.destination)
+            except Exception as error:
+                errors[journal_entry.pk] = repr(error)
+
+        with ThreadPoolExecutor(max_workers=settings.FILESYSTEM_QUEUE_PARALLEL_OPERATIONS) as executor:
+            list(executor.map(apply, journal_entries))
+
+        applied = [journal_entry.pk for journal_entry in journal_entries if journal_entry.pk not in errors]
+        for start in range(0, len(applied), 1000):
+            FilesystemOperation.objects.filter(pk__in=applied[start:start + 1000]).delete()
+        for pk, error in errors.items():
+            FilesystemOperation.get_element_by_id_like_queryset(pk).update(status=FilesystemOperation.FAILED, error=error)
+
+    def replay_pending(self) -> int:
+        """
+            Submit again the lanes with operations that were not applied, for example because the
+            process was stopped, and remove the staged contents of the transactions rolled back.
+            It is run by every worker of the server when it starts, the leases of the lanes keep
+            two workers from applying the same operations. Return the number of operations pending
+        """
+        from ..models import FilesystemOperation
+
+        self.remove_abandoned_staged_contents()
+
+        pending = FilesystemOperation.objects.filter(status=FilesystemOperation.PENDING)
+        lanes = list(pending.values_list('lane', flat=True).distinct().order_by('lane'))
+        total = pending.count()
+        for lane in lanes:
+            self.submit(lane)
+        return total
+
+    def remove_abandoned_staged_contents(self) -> int:
+        """
+            Remove the staged contents without an operation in the journal, older than the
+            expiration of the staging folder. Their transactions were rolled back after the
+            contents were written. Return the number of contents removed
+        """
+        from ..models import FilesystemOperation
+
+        storage_backend = get_storage_backend()
+        expiration = time.time() - settings.FILESYSTEM_QUEUE_STAGING_EXPIRATION_SECONDS
+        staging_folder = os.path.join(settings.MEDIA_ROOT, settings.FILESYSTEM_QUEUE_STAGING_FOLDER)
+        paths = [path for path, modified_at in storage_backend.list_files(staging_folder) if modified_at < expiration]
+
+        removed = 0
+        for start in range(0, len(paths), 1000):
+            page = paths[start:start + 1000]
+            journaled = set(FilesystemOperation.objects.filter(source__in=page).values_list('source', flat=True))
+            for path in page:
+                if path not in journaled:
+                    storage_backend.remove_file(path)
+                    removed += 1
+        return removed
+
+    def reset_after_fork(self) -> None:
+        """ Forget the workers of the parent process, they do not exist in a forked process """
+        self.lanes = None
+        self.scheduled = set()
+        self.lock = threading.Lock()
+
+    def join(self) -> None:
+        """ Wait until all the operations submitted are applied """
+        for lane in self._get_lanes():
+            lane.submit(lambda: None).result()
+
+
+def apply_filesystem_operation(operation: str, source: str, destination: str = '') -> None:
+    """
+        Apply an operation over the storage backend. The operations can be applied more than
+        once, so an operation replayed after a crash does not fail if it was already applied
+    """
+    from ..models import FilesystemOperation
+
+    storage_backend = get_storage_backend()
+
+    if operation == FilesystemOperation.CREATE_FOLDER:
+        storage_backend.create_folder(source)
+    elif operation == FilesystemOperation.MOVE:
+        if not storage_backend.exists(source) and storage_backend.exists(destination):
+            return
+        storage_backend.move(source, destination)
+    elif operation == FilesystemOperation.REMOVE_FILE:
+        storage_backend.remove_file(source)
+    elif operation == FilesystemOperation.REMOVE_TREE:
+        storage_backend.remove_tree(source)
+    elif operation == FilesystemOperation.WRITE_FILE:
+        if not storage_backend.exists(source) and storage_backend.exists(destination):
+            return
+        # The folders of the blobs are not created by other operation
+        storage_backend.create_folder(os.path.dirname(destination))
+        storage_backend.move(source, destination)
+    else:
+        raise ValueError(f'Unknown filesystem operation: {operation}')
+
+
+filesystem_queue = FilesystemQueue()
+
+# The production server forks the workers from a process with the app already loaded
+os.register_at_fork(after_in_child=filesystem_queue.reset_after_fork)
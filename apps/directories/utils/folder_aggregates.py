@@ -0,0 +1,250 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import Count, F, QuerySet, Sum
+
+# (parent path, is active, trashed root path, size, number of files)
+FilesRow = Tuple[str, bool, Optional[str], Optional[int], int]
+# (path, is active, trashed root path, size, files, folders)
+FoldersRow = Tuple[str, bool, Optional[str], int, int, int]
+# (size, files, folders)
+Totals = Tuple[int, int, int]
+
+
+class FolderAggregates():
+    """
+        Totals of bytes, files and descendant folders of every folder, kept in the columns
+        total_size, total_files and total_folders of the folders.
+
+        An element is counted by a folder that contains it if the element is active or if it
+        was moved to the recycle bin together with the folder or one of his descendants, so
+        the totals of a trashed folder are kept ready to be added again when it is recovered.
+
+        The ancestors of a folder are the prefixes of his path, every change is applied to the
+        folders that count it with at most one UPDATE by level of depth
+    """
+
+    @staticmethod
+    def get_steplen() -> int:
+        from ..models import Folder
+        return Folder.steplen
+
+    @staticmethod
+    def get_parent_path(path: str) -> str:
+        return path[:-FolderAggregates.get_steplen()]
+
+    @staticmethod
+    def get_ancestors_paths(path: str) -> List[str]:
+        """ Return the paths of the folder and all his ancestors """
+        steplen = FolderAggregates.get_steplen()
+        return [path[:length] for length in range(steplen, len(path) + 1, steplen)]
+
+    @staticmethod
+    def get_counting_paths(parent_path: str, is_active: bool, trashed_root_path: Optional[str] = None) -> List[str]:
+        """
+            Return the paths of the folders that count an element
+
+            Parameters:
+                parent_path(str): path of the folder that contains the element
+                is_active(bool): if the element is active
+                trashed_root_path(str): path of the folder moved to the recycle bin with the element
+        """
+        if not parent_path:
+            return []
+
+        if is_active:
+            return FolderAggregates.get_ancestors_paths(parent_path)
+
+        if trashed_root_path and parent_path.startswith(trashed_root_path):
+            return FolderAggregates.get_ancestors_paths(parent_path)[len(trashed_root_path) // FolderAggregates.get_steplen() - 1:]
+
+        return []
+
+    @staticmethod
+    def add(paths: Iterable[str], size: int = 0, files: int = 0, folders: int = 0) -> None:
+        """ Add the totals received to the folders of the paths, the values can be negative """
+        from ..models import Folder
+
+        paths = list(paths)
+        if not paths or not (size or files or folders):
+            return
+
+        Folder.objects.filter(path__in=paths).update(
+            total_size=F('total_size') + size,
+            total_files=F('total_files') + files,
+            total_folders=F('total_folders') + folders
+        )
+
+    @staticmethod
+    def get_files_rows(files: QuerySet) -> List[FilesRow]:
+        """ Return the files of the queryset grouped by parent folder, state and trashed root """
+        return list(
+            files.order_by().values('parent_folder__path', 'is_active', 'trashed_root__path').annotate(
+                size=Sum('details__size'),
+                total=Count('pk')
+            ).values_list('parent_folder__path', 'is_active', 'trashed_root__path', 'size', 'total')
+        )
+
+    @staticmethod
+    def add_files_rows(rows_removed: Iterable[FilesRow] = (), rows_added: Iterable[FilesRow] = ()) -> None:
+        """
+            Subtract and add groups of files to the folders that count them, the folders with
+            the same change are updated together
+
+            Parameters:
+                rows_removed(Iterable[FilesRow]): groups of files that are no longer counted
+                rows_added(Iterable[FilesRow]): groups of files that start to be counted
+        """
+        deltas: Dict[str, List[int]] = {}
+        for sign, rows in ((-1, rows_removed), (1, rows_added)):
+            for parent_path, is_active, trashed_root_path, size, total in rows:
+                for path in FolderAggregates.get_counting_paths(parent_path, is_active, trashed_root_path):
+                    delta = deltas.setdefault(path, [0, 0, 0])
+                    delta[0] += sign * (size or 0)
+                    delta[1] += sign * total
+
+        FolderAggregates._add_deltas(deltas)
+
+    @staticmethod
+    def get_folders_rows(folders: QuerySet) -> List[FoldersRow]:
+        """ Return the path, state and totals of the folders of the queryset """
+        return list(folders.order_by().values_list(
+            'path', 'is_active', 'trashed_root__path', 'total_size', 'total_files', 'total_folders'
+        ))
+
+    @staticmethod
+    def add_folders_rows(rows_removed: Iterable[FoldersRow] = (), rows_added: Iterable[FoldersRow] = ()) -> None:
+        """
+            Subtract and add folders, with all the elements inside them, to the folders that
+            count them. Used before and after a change of many folders at the same time
+
+            Parameters:
+                rows_removed(Iterable[FoldersRow]): folders that are no longer counted
+                rows_added(Iterable[FoldersRow]): folders that start to be counted
+        """
+        deltas: Dict[str, List[int]] = {}
+        for sign, rows in ((-1, rows_removed), (1, rows_added)):
+            for folder_path, is_active, trashed_root_path, size, files, folders in rows:
+                parent_path = FolderAggregates.get_parent_path(folder_path)
+                for path in FolderAggregates.get_counting_paths(parent_path, is_active, trashed_root_path):
+                    delta = deltas.setdefault(path, [0, 0, 0])
+                    delta[0] += sign * size
+                    delta[1] += sign * files
+                    delta[2] += sign * (folders + 1)
+
+        FolderAggregates._add_deltas(deltas)
+
+    @staticmethod
+    def _add_deltas(deltas: Dict[str, List[int]]) -> None:
+        """ Apply the changes by path with one UPDATE for every group of folders with the same change """
+        paths_by_delta: Dict[Totals, List[str]] = {}
+        for path, (size, files, folders) in deltas.items():
+            paths_by_delta.setdefault((size, files, folders), []).append(path)
+
+        for (size, files, folders), paths in paths_by_delta.items():
+            FolderAggregates.add(paths, size, files, folders)
+
+    @staticmethod
+    def get_subtree_totals(path: str, **filters) -> Totals:
+        """
+            Return the totals of the files and folders inside the folder of the path, the
+            folder included, that pass the filters received
+        """
+        from ..models import File, Folder
+
+        files = File.objects.filter(parent_folder__path__startswith=path, **filters).aggregate(
+            size=Sum('details__size'),
+            total=Count('pk')
+        )
+        folders = Folder.objects.filter(path__startswith=path, **filters).count()
+        return files['size'] or 0, files['total'], folders
+
+    @staticmethod
+    def add_folder_contribution(folder_id: int, sign: int = 1) -> None:
+        """
+            Add or subtract a folder and his totals to the folders that count it, reading the
+            actual state of the folder. Used before and after a change of the folder
+
+            Parameters:
+                folder_id(int): id of the folder
+                sign(int): 1 to add the folder or -1 to subtract it
+        """
+        from ..models import Folder
+
+        path, is_active, trashed_root_path, size, files, folders = Folder.objects.values_list(
+            'path', 'is_active', 'trashed_root__path', 'total_size', 'total_files', 'total_folders'
+        ).get(pk=folder_id)
+
+        FolderAggregates.add(
+            FolderAggregates.get_counting_paths(FolderAggregates.get_parent_path(path), is_active, trashed_root_path),
+            sign * size, sign * files, sign * (folders + 1)
+        )
+
+    @staticmethod
+    def recover_folder(folder_path: str, trashed_root_id: int, trashed_root_path: str) -> None:
+        """
+            Add to the ancestors of the trashed root the elements inside the folder that will be
+            recovered, they were already counted by the folders until the trashed root
+        """
+        size, files, folders = FolderAggregates.get_subtree_totals(folder_path, trashed_root_id=trashed_root_id)
+        FolderAggregates.add(
+            FolderAggregates.get_counting_paths(FolderAggregates.get_parent_path(trashed_root_path), True),
+            size, files, folders
+        )
+
+    @staticmethod
+    def remove_folder(folder_id: int) -> None:
+        """ Subtract a folder that will be deleted and all the elements inside it from the folders that count them """
+        from ..models import Folder
+
+        path, is_active, trashed_root_path = Folder.objects.values_list(
+            'path', 'is_active', 'trashed_root__path'
+        ).get(pk=folder_id)
+
+        FolderAggregates.add_folder_contribution(folder_id, -1)
+        if not is_active:
+            # The elements recovered inside a trashed folder are counted over his trashed root
+            size, files, folders = FolderAggregates.get_subtree_totals(path, is_active=True)
+            FolderAggregates.add(
+                FolderAggregates.get_counting_paths(FolderAggregates.get_parent_path(trashed_root_path or path), True),
+                -size, -files, -folders
+            )
+
+    @staticmethod
+    def rebuild(owner_user_id: Optional[int] = None) -> int:
+        """
+            Calculate again the totals of the folders from the files and folders stored, to
+            fix any drift of the incremental changes
+
+            Parameters:
+                owner_user_id(int): id of the user whose folders are rebuilt, or None for all the users
+
+            Return:
+                rebuilt(int): number of folders rebuilt
+        """
+        from ..models import File, Folder
+
+        folders = Folder.objects.all()
+        files = File.objects.all()
+        if owner_user_id is not None:
+            folders = folders.filter(owner_user_id=owner_user_id)
+            files = files.filter(parent_folder__owner_user_id=owner_user_id)
+
+        folders_rows = list(folders.values_list('pk', 'path', 'is_active', 'trashed_root__path').iterator())
+        totals: Dict[str, List[int]] = {path: [0, 0, 0] for _, path, _, _ in folders_rows}
+
+        for parent_path, is_active, trashed_root_path, size, total in FolderAggregates.get_files_rows(files):
+            for path in FolderAggregates.get_counting_paths(parent_path, is_active, trashed_root_path):
+                totals[path][0] += size or 0
+                totals[path][1] += total
+
+        for _, folder_path, is_active, trashed_root_path in folders_rows:
+            parent_path = FolderAggregates.get_parent_path(folder_path)
+            for path in FolderAggregates.get_counting_paths(parent_path, is_active, trashed_root_path):
+                totals[path][2] += 1
+
+        rebuilt_folders = [
+            Folder(pk=pk, total_size=totals[path][0], total_files=totals[path][1], total_folders=totals[path][2])
+            for pk, path, _, _ in folders_rows
+        ]
+        Folder.objects.bulk_update(rebuilt_folders, ['total_size', 'total_files', 'total_folders'], batch_size=1000)
+        return len(rebuilt_folders)
@@ -2,8 +2,9 @@ from typing import TYPE_CHECKING
 
 from django.conf import settings
 
+from .filesystem_queue import filesystem_queue
+
 import os
-import shutil
 
 if TYPE_CHECKING:
     from ..models import Folder
@@ -15,20 +16,16 @@ class FolderManager():
         self.media_root_path = settings.MEDIA_ROOT
         self.folder = folder
 
-    def __get_old_path_folder(self) -> str:
+    def _get_physical_path_new_folder(self) -> str:
         """
-            Return the path
+            Return the physical path of a folder that is not saved yet. Only used
+            when the path was not assigned by who creates the folder
         """
-        if self.folder.is_leaf():
-            route_children = self.folder.route.split('/')
-        else:
-            first_children = self.folder.get_first_child()
-            route_children = first_children.route.split('/')
-
-        route_children = route_children[:-1]
-        old_path_children = "/".join(route_children)
+        if self.folder.is_root():
+            return f'{self.folder.owner_user_id}'
 
-        return old_path_children
+        parent_folder = self.folder.get_parent()
+        return parent_folder.get_child_path_folder(self.folder.name)
 
     def _join_with_media_root(self, *args) -> str:
         elements = list(args)
@@ -37,68 +34,75 @@ class FolderManager():
 
     def _get_complete_path_folder(self) -> str:
         """ Return the path folder join with the path media folder """
-        ancestors = self.folder.get_ancestors_folder()
-        path_folder = self.folder.get_path_parent_folder()
-        patch_folder = self._join_with_media_root(path_folder)
-        if ancestors:
-            patch_folder = self._join_with_media_root(path_folder, self.folder.name)
-        return patch_folder
+        return self._join_with_media_root(self.folder.get_path_folder())
 
     def _join_paths(self, *args) -> str:
         return os.path.join(*args)
 
     def _create_folder(self, path_folder: str) -> None:
-        os.umask(0)
-        os.makedirs(path_folder, mode=0o777)
+        from ..models import FilesystemOperation
+
+        filesystem_queue.enqueue(FilesystemOperation.CREATE_FOLDER, path_folder)
 
     def _rename_folder(self, old_path: str, new_path: str) -> None:
-        os.rename(old_path, new_path)
+        from ..models import FilesystemOperation
+
+        filesystem_queue.enqueue(FilesystemOperation.MOVE, old_path, new_path)
 
     def _move_folders(self, path_actual_folder, path_new_parent_folder):
-        actual_path = self.__join_paths(self.media_root_path, path_actual_folder)
-        new_path = self.__join_paths(self.media_root_path, path_new_parent_folder)
-        shutil.move(actual_path, new_path)
+        actual_path = self._join_with_media_root(path_actual_folder)
+        new_path = self._join_with_media_root(path_new_parent_folder)
+        self._rename_folder(actual_path, new_path)
 
     def _update_folder_paths(self):
         """Update the route of actual folder and his children folders"""
 
-        old_path_children = self.__get_old_path_folder()
-        media_old_path = self._join_paths(self.media_root_path, old_path_children)
-
-        if self.folder.is_leaf() and not self.folder.is_root():
-            media_old_path = self._join_paths(media_old_path, self.folder.old_name)
+        old_path = self.folder.get_path_folder()
+        new_path = f'{self.folder.get_path_parent_folder()}/{self.folder.name}'
 
-        media_new_patch = self._join_paths(self.media_root_path, self.folder.route)
-        if self.folder.name != settings.ROOT_NAME_FOLDER:
-            media_new_patch = self._join_paths(media_new_patch, self.folder.name)
+        if old_path == new_path:
+            return
 
-        self._rename_folder(media_old_path, media_new_patch)
+        self._rename_folder(self._join_with_media_root(old_path), self._join_with_media_root(new_path))
 
-        self.folder.update_route_parent_folder_and_children()
+        self.folder.physical_path = new_path
+        self.folder.update_route_parent_folder_and_children(old_path)
 
     def _execute_pre_save_function(self) -> None:
 
-        path_folder = self.folder.get_path_parent_folder()
-
-        media_patch_folder = self._get_complete_path_folder()
-
         if self.folder.pk is None:
-            self._create_folder(media_patch_folder)
-        elif self.folder.get_children_count() > 0 or (self.folder.is_leaf() and not self.folder.is_root()):
+            if not self.folder.physical_path:
+                self.folder.physical_path = self._get_physical_path_new_folder()
+            self._create_folder(self._get_complete_path_folder())
+        elif not self.folder.has_changed('name'):
+            # Only the name changes the paths, the folders are moved with move_folder_into_another
+            return
+        elif not self.folder.is_root():
             self._update_folder_paths()
 
-        self.folder.route = f'{path_folder}/'
+        self.folder.route = f'{self.folder.get_path_parent_folder()}/'
         self.folder.old_name = self.folder.name
 
     def _delete_folder(self) -> None:
+        from ..models import FilesystemOperation
 
         path_folder = self._get_complete_path_folder()
-        shutil.rmtree(path_folder)
+        filesystem_queue.enqueue(FilesystemOperation.REMOVE_TREE, path_folder)
         self.folder.delete()
 
 
-def move_folders_in_media(path_actual_folder, path_new_parent_folder):
+def move_folders_in_media(paths):
+    """
+        Register the renames of the folders moved together, one for every moved folder,
+        they are applied in parallel because the folders are not inside each other
+
+        Parameters:
+            paths(List[Tuple[str, str]]): actual and new paths of the folders inside the media
+    """
+    from ..models import FilesystemOperation
+
     media_root_path = settings.MEDIA_ROOT
-    media_actual_folder = os.path.join(media_root_path, path_actual_folder)
-    media_new_parent_folder = os.path.join(media_root_path, path_new_parent_folder)
-    shutil.move(media_actual_folder, media_new_parent_folder)
+    filesystem_queue.enqueue_many(FilesystemOperation.MOVE, [
+        (os.path.join(media_root_path, actual_path), os.path.join(media_root_path, new_path))
+        for actual_path, new_path in paths
+    ])
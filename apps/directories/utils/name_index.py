@@ -0,0 +1,144 @@
+from typing import Dict, Iterator, List, Tuple
+
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+import threading
+import time
+
+FOLDERS = 'folders'
+FILES = 'files'
+
+
+def get_trigrams(name: str) -> List[str]:
+    return [name[position:position + 3] for position in range(len(name) - 2)]
+
+
+class NameIndex():
+    """
+        Index in memory of the names of the folders and files of a user, used to search by
+        name when the database does not have trigram indexes. The names are sorted to answer
+        the prefix searches with a binary search, and every trigram keeps the positions of the
+        names that contain it to answer the substring searches without reading all the names.
+
+        The indexes are kept in the memory of the process and they are discarded when the
+        generation of the user in the cache changes, so all the processes see the changes. The
+        process keeps the indexes of the NAME_INDEX_MAX_USERS users that searched last, and only
+        when the cache is shared (CACHE_SHARED), otherwise a process would not see the changes
+        made by the others, so the searches do not use the index and read the database
+    """
+
+    _indexes: 'OrderedDict[int, Tuple[int, float, NameIndex]]' = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, entries: List[Tuple[str, str, int]]) -> None:
+        entries.sort()
+        self.names = [name for name, _, _ in entries]
+        self.elements = [(kind, pk) for _, kind, pk in entries]
+        self.trigrams: Dict[str, array] = {}
+        for position, name in enumerate(self.names):
+            for trigram in set(get_trigrams(name)):
+                self.trigrams.setdefault(trigram, array('L')).append(position)
+
+    @staticmethod
+    def _get_generation_key(user_id: int) -> str:
+        return f'name-index:{user_id}:generation'
+
+    @staticmethod
+    def build(user_id: int) -> 'NameIndex':
+        """ Build the index of the user with one query by table """
+        from ..models import File, Folder
+
+        entries = [
+            (name.lower(), FOLDERS, pk)
+            for pk, name in Folder.objects.filter(owner_user_id=user_id).values_list('pk', 'name').iterator()
+        ]
+        entries.extend(
+            (name.lower(), FILES, pk)
+            for pk, name in File.objects.filter(parent_folder__owner_user_id=user_id).values_list('pk', 'name').iterator()
+        )
+        return NameIndex(entries)
+
+    @staticmethod
+    def load(user_id: int) -> 'NameIndex':
+        """
+            Return the index of the user kept by the process, or build it if the process does
+            not have it, it expired, the names of the user changed or the cache is not shared
+
+            Parameters:
+                user_id(int): id of the owner of the folders and files
+
+            Return:
+                index(NameIndex): names of the user
+        """
+        if not settings.CACHE_SHARED:
+            return NameIndex.build(user_id)
+
+        generation = cache.get_or_set(NameIndex._get_generation_key(user_id), 0, timeout=None)
+
+        with NameIndex._lock:
+            kept = NameIndex._indexes.get(user_id)
+            if kept is not None:
+                NameIndex._indexes.move_to_end(user_id)
+        if kept is not None and kept[0] == generation and kept[1] > time.monotonic():
+            return kept[2]
+
+        index = NameIndex.build(user_id)
+        with NameIndex._lock:
+            NameIndex._indexes[user_id] = (generation, time.monotonic() + settings.NAME_INDEX_TIMEOUT, index)
+            NameIndex._indexes.move_to_end(user_id)
+            # The least recently used indexes are discarded
+            while len(NameIndex._indexes) > settings.NAME_INDEX_MAX_USERS:
+                NameIndex._indexes.popitem(last=False)
+        return index
+
+    @staticmethod
+    def invalidate(user_id: int) -> None:
+        """ Discard the indexes of the user in all the processes now and after the commit """
+        if not settings.CACHE_SHARED:
+            return
+
+        def increase_generation():
+            generation_key = NameIndex._get_generation_key(user_id)
+            try:
+                cache.incr(generation_key)
+            except ValueError:
+                cache.add(generation_key, 1, timeout=None)
+
+        increase_generation()
+        transaction.on_commit(increase_generation)
+
+    def search(self, query: str, prefix: bool = False) -> Iterator[Tuple[str, int]]:
+        """
+            Return the (kind, pk) of the folders and files with the query in his name, ordered by name
+
+            Parameters:
+                query(str): text searched without distinguish upper and lower case
+                prefix(bool): if the names must start with the query instead of contain it
+        """
+        query = query.lower()
+
+        if prefix:
+            position = bisect_left(self.names, query)
+            while position < len(self.names) and self.names[position].startswith(query):
+                yield self.elements[position]
+                position += 1
+            return
+
+        if len(query) < 3:
+            positions: Iterator[int] = iter(range(len(self.names)))
+        else:
+            postings = [self.trigrams.get(trigram) for trigram in set(get_trigrams(query))]
+            if not all(postings):
+                return
+            # The names with the query contain all his trigrams, the rarest is enough to check them
+            positions = iter(min(postings, key=len))
+
+        for position in positions:
+            if query in self.names[position]:
+                yield self.elements[position]
@@ -0,0 +1,112 @@
+from typing import FrozenSet, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+class OwnershipIndex():
+    """
+        Set of the ids of the folders of a user, cached across the requests. The files are
+        owned by the owner of his parent folder, so the index answers the ownership of the
+        folders and the files without queries.
+
+        The cached sets are stored under a generation of the user that is increased when
+        a folder of the user is created, deleted or moved, so a set loaded before the change
+        is never read after it. When the cache is not shared by all the processes (CACHE_SHARED)
+        the changes made by other process are not seen, so the set is kept for a short time and
+        a folder that is not in the set is looked for again in the database
+    """
+
+    def __init__(self, user_id: int, folders_id: FrozenSet[int], is_current: bool = True) -> None:
+        self.user_id = user_id
+        self.folders_id = folders_id
+        # False for a set read from the cache of the process, without the changes of other processes
+        self.is_current = is_current
+
+    @staticmethod
+    def _get_generation_key(user_id: int) -> str:
+        return f'ownership-index:{user_id}:generation'
+
+    @staticmethod
+    def _get_generation(user_id: int) -> int:
+        generation_key = OwnershipIndex._get_generation_key(user_id)
+        generation = cache.get(generation_key)
+        if generation is None:
+            cache.add(generation_key, 0, timeout=None)
+            generation = cache.get(generation_key, 0)
+        return generation
+
+    @staticmethod
+    def _get_key(user_id: int) -> str:
+        return f'ownership-index:{user_id}:{OwnershipIndex._get_generation(user_id)}'
+
+    @staticmethod
+    def _get_folders_id(user_id: int) -> FrozenSet[int]:
+        """ Read the folders of the user from the database and cache them """
+        from ..models import Folder
+
+        folders_id = frozenset(Folder.objects.filter(owner_user_id=user_id).values_list('pk', flat=True))
+        timeout = settings.OWNERSHIP_INDEX_TIMEOUT if settings.CACHE_SHARED else settings.OWNERSHIP_INDEX_LOCAL_TIMEOUT
+        cache.set(OwnershipIndex._get_key(user_id), folders_id, timeout=timeout)
+        return folders_id
+
+    @staticmethod
+    def load(user_id: int) -> 'OwnershipIndex':
+        """
+            Return the index of the user from the cache, or build it with one query if it is
+            not cached or it was invalidated
+
+            Parameters:
+                user_id(int): id of the owner of the folders
+
+            Return:
+                index(OwnershipIndex): folders of the user
+        """
+        folders_id = cache.get(OwnershipIndex._get_key(user_id))
+        if folders_id is None:
+            return OwnershipIndex(user_id, OwnershipIndex._get_folders_id(user_id))
+
+        return OwnershipIndex(user_id, folders_id, is_current=settings.CACHE_SHARED)
+
+    @staticmethod
+    def invalidate(user_id: int) -> None:
+        """ Discard the index of the user now and again after the commit of the current transaction """
+        def increase_generation():
+            generation_key = OwnershipIndex._get_generation_key(user_id)
+            try:
+                cache.incr(generation_key)
+            except ValueError:
+                cache.add(generation_key, 1, timeout=None)
+
+        increase_generation()
+        # Other request could load the folders before the commit and cache them
+        transaction.on_commit(increase_generation)
+
+    def _refresh(self) -> bool:
+        """ Read again the folders of a set that could be old. Return if the set was read again """
+        if self.is_current:
+            return False
+
+        self.folders_id = OwnershipIndex._get_folders_id(self.user_id)
+        self.is_current = True
+        return True
+
+    def _contains(self, folders_id: FrozenSet[int]) -> bool:
+        # A folder created by other process is not in an old set
+        return folders_id <= self.folders_id or (self._refresh() and folders_id <= self.folders_id)
+
+    def owns_folder(self, id_folder) -> bool:
+        try:
+            return self._contains(frozenset([int(id_folder)]))
+        except (TypeError, ValueError):
+            return False
+
+    def owns_folders(self, ids_folders: Iterable) -> bool:
+        try:
+            return self._contains(frozenset(int(id_folder) for id_folder in ids_folders))
+        except (TypeError, ValueError):
+            return False
+
+    def owns_file(self, file) -> bool:
+        return self._contains(frozenset([file.parent_folder_id]))
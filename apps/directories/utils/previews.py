@@ -0,0 +1,262 @@
+from typing import IO, TYPE_CHECKING, Dict, Optional
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from importlib.util import find_spec
+
+from django.conf import settings
+from django.db import transaction
+
+from .storage_backends import get_storage_backend
+
+import multiprocessing
+import os
+import threading
+import uuid
+
+if TYPE_CHECKING:
+    from ..models import File
+
+THUMBNAIL = 'thumbnail'
+PREVIEW = 'preview'
+
+IMAGE_TYPES = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'bmp', 'tif', 'tiff'}
+PDF_TYPES = {'pdf'}
+
+
+def render_preview(source_path: str, destination_path: str, file_type: str, max_size: int, quality: int) -> int:
+    """
+        Render an image no bigger than max_size from an image or from the first page of a
+        PDF, and save it in WEBP. It runs in the processes of the pool, so the decoding of
+        big images does not stop the threads of the server
+
+        Return:
+            size(int): bytes of the image saved
+    """
+    from PIL import Image, ImageOps
+
+    with get_storage_backend().open(source_path) as source:
+        if file_type in PDF_TYPES:
+            import pypdfium2
+
+            document = pypdfium2.PdfDocument(source.read())
+            try:
+                page = document[0]
+                width, height = page.get_size()
+                image = page.render(scale=max_size / max(width, height, 1)).to_pil()
+            finally:
+                document.close()
+        else:
+            image = Image.open(source)
+            # The JPEG are decoded directly in a reduced scale
+            image.draft('RGB', (max_size, max_size))
+            image = ImageOps.exif_transpose(image)
+
+        image.thumbnail((max_size, max_size))
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+        os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+        temporary_path = f'{destination_path}.{uuid.uuid4().hex}.tmp'
+        image.save(temporary_path, 'WEBP', quality=quality)
+        os.replace(temporary_path, destination_path)
+
+    return os.path.getsize(destination_path)
+
+
+class PreviewCache():
+    """
+        Thumbnails and previews of the images and PDFs, generated in a pool of processes and
+        kept in a folder of the disk. The images are named by the content of the file, so a
+        renamed or moved file keeps them, and the least recently used are evicted when the
+        folder is bigger than PREVIEWS_CACHE_MAX_BYTES
+    """
+
+    def __init__(self) -> None:
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.pending: Dict[str, Future] = {}
+        self.cached_bytes: Optional[int] = None
+        # Only one thread walks the folder to evict, the others count the bytes they add meanwhile
+        self.evicting = False
+        self.bytes_while_evicting = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_root() -> str:
+        return os.path.join(settings.MEDIA_ROOT, settings.PREVIEWS_FOLDER)
+
+    @staticmethod
+    def is_supported(file: 'File') -> bool:
+        """ Return if a preview of the file can be generated with the packages installed """
+        file_type = file.details.type.lower()
+        if file_type in PDF_TYPES:
+            return find_spec('PIL') is not None and find_spec('pypdfium2') is not None
+        return file_type in IMAGE_TYPES and find_spec('PIL') is not None
+
+    @staticmethod
+    def get_key(file: 'File', kind: str) -> str:
+        """ Return the name of the preview, it changes when the content of the file changes """
+        if file.is_content_addressed():
+            return f'{file.blob.sha256}-{kind}'
+        return f'{file.pk}-{int(file.created_at.timestamp() * 1000000)}-{file.details.size}-{kind}'
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.get_root(), key[:2], f'{key}.webp')
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self.executor is None:
+                # The processes are forked from a clean server process and not from the threads of the app
+                self.executor = ProcessPoolExecutor(
+                    max_workers=settings.PREVIEWS_WORKERS,
+                    mp_context=multiprocessing.get_context('forkserver')
+                )
+        return self.executor
+
+    def get(self, file: 'File', kind: str) -> Optional[str]:
+        """ Return the path of the preview if it is in the cache, marking it as recently used """
+        path = self.get_path(self.get_key(file, kind))
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def submit(self, file: 'File', kind: str) -> Future:
+        """
+            Start the generation of the preview of a file, or return the generation already
+            started by other request
+
+            Parameters:
+                file(File): image or PDF
+                kind(str): THUMBNAIL or PREVIEW
+
+            Return:
+                future(Future): finished with the path of the preview
+        """
+        key = self.get_key(file, kind)
+        arguments = (
+            file.get_full_path(), self.get_path(key), file.details.type.lower(),
+            settings.PREVIEWS_SIZES[kind], settings.PREVIEWS_QUALITY
+        )
+
+        with self.lock:
+            future = self.pending.get(key)
+            if future is not None:
+                return future
+
+            if settings.PREVIEWS_WORKERS:
+                future = Future()
+                self.pending[key] = future
+            else:
+                future = None
+
+        if future is None:
+            # Without workers the preview is generated by the thread of the request
+            future = Future()
+            try:
+                future.set_result(self._register(key, render_preview(*arguments)))
+            except Exception as error:
+                future.set_exception(error)
+            return future
+
+        def finish(generation: Future) -> None:
+            with self.lock:
+                self.pending.pop(key, None)
+            try:
+                future.set_result(self._register(key, generation.result()))
+            except Exception as error:
+                future.set_exception(error)
+
+        try:
+            self._get_executor().submit(render_preview, *arguments).add_done_callback(finish)
+        except Exception as error:
+            with self.lock:
+                self.pending.pop(key, None)
+            future.set_exception(error)
+        return future
+
+    def get_or_generate(self, file: 'File', kind: str, timeout: Optional[float] = None) -> str:
+        """ Return the path of the preview, generating it if it is not in the cache """
+        return self.get(file, kind) or self.submit(file, kind).result(timeout=timeout)
+
+    def open_preview(self, file: 'File', kind: str, timeout: Optional[float] = None) -> IO[bytes]:
+        """ Open the preview, generating it again if it was evicted before it was opened """
+        try:
+            return open(self.get_or_generate(file, kind, timeout=timeout), 'rb')
+        except FileNotFoundError:
+            return open(self.submit(file, kind).result(timeout=timeout), 'rb')
+
+    def generate_after_upload(self, file: 'File') -> None:
+        """ Generate the thumbnail of a new file in the pool after the commit, so the galleries find it ready """
+        if settings.PREVIEWS_WORKERS and settings.PREVIEWS_GENERATE_ON_UPLOAD and self.is_supported(file):
+            transaction.on_commit(lambda: self.submit(file, THUMBNAIL))
+
+    def _register(self, key: str, size: int) -> str:
+        """
+            Count the bytes of a new preview and evict the oldest previews if the cache is full.
+            The folder is walked without the lock, so the other requests are not stopped by it
+        """
+        with self.lock:
+            if self.cached_bytes is not None:
+                self.cached_bytes += size
+            if self.evicting:
+                self.bytes_while_evicting += size
+                evict = False
+            else:
+                evict = self.cached_bytes is None or self.cached_bytes > settings.PREVIEWS_CACHE_MAX_BYTES
+                if evict:
+                    self.evicting = True
+                    self.bytes_while_evicting = 0
+
+        if evict:
+            kept_bytes = None
+            try:
+                kept_bytes = self._evict()
+            finally:
+                with self.lock:
+                    self.evicting = False
+                    if kept_bytes is not None:
+                        self.cached_bytes = kept_bytes + self.bytes_while_evicting
+        return self.get_path(key)
+
+    def _evict(self) -> int:
+        """ Remove the least recently used previews until the cache uses 90% of his maximum. Return the bytes kept """
+        entries = []
+        for directory, _, names in os.walk(self.get_root()):
+            for name in names:
+                # The previews that are being saved are renamed when they are complete
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        if total <= settings.PREVIEWS_CACHE_MAX_BYTES:
+            return total
+
+        limit = settings.PREVIEWS_CACHE_MAX_BYTES * 0.9
+        for _, size, path in sorted(entries):
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+    def reset_after_fork(self) -> None:
+        """ Forget the pool of the parent process, his processes are not children of a forked process """
+        self.executor = None
+        self.pending = {}
+        self.evicting = False
+        self.lock = threading.Lock()
+
+
+preview_cache = PreviewCache()
+
+os.register_at_fork(after_in_child=preview_cache.reset_after_fork)
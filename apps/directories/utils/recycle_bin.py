@@ -0,0 +1,172 @@
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet, Sum
+from django.utils import timezone
+
+from .folder_aggregates import FolderAggregates
+from .storage_backends import get_storage_backend
+
+import os
+import time
+
+if TYPE_CHECKING:
+    from ..models import File, Folder
+
+
+class RecycleBinPurger():
+
+    def __init__(self, batch_size: int = 500, unlinks_per_second: Optional[float] = None) -> None:
+        self.media_root_path = settings.MEDIA_ROOT
+        self.batch_size = batch_size
+        self.unlink_interval = 1 / unlinks_per_second if unlinks_per_second else 0
+        self.last_unlink = 0.0
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """ Restart the counters used to report the throughput """
+        self.purged_files = 0
+        self.purged_folders = 0
+        self.purged_bytes = 0
+        self.started_at = time.monotonic()
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+            Return the counters of the elements purged since the last reset
+
+            Return:
+                stats(Dict[str, float]): purged elements, elapsed seconds and throughput
+        """
+        elapsed = max(time.monotonic() - self.started_at, 1e-6)
+        return {
+            'files': self.purged_files,
+            'folders': self.purged_folders,
+            'bytes': self.purged_bytes,
+            'seconds': elapsed,
+            'files_per_second': self.purged_files / elapsed,
+            'bytes_per_second': self.purged_bytes / elapsed,
+        }
+
+    def _get_expiration_date(self) -> datetime:
+        """ Return the date before which the trashed elements are expired """
+        return timezone.now() - timedelta(days=settings.RECYCLE_BIN_RETENTION_DAYS)
+
+    def _wait_unlink_turn(self) -> None:
+        """ Sleep the time needed to keep the unlinks under the rate limit """
+        if not self.unlink_interval:
+            return
+
+        waiting = self.last_unlink + self.unlink_interval - time.monotonic()
+        if waiting > 0:
+            time.sleep(waiting)
+        self.last_unlink = time.monotonic()
+
+    def _remove_file_from_media(self, path_file: str) -> None:
+        self._wait_unlink_turn()
+        get_storage_backend().remove_file(os.path.join(self.media_root_path, path_file))
+
+    def _purge_files(self, files: QuerySet['File']) -> None:
+        """ Delete from media and database the files of the queryset in bounded batches """
+        from ..models import Blob, Detail
+
+        while True:
+            batch = list(files.values_list('file', 'details_id', 'details__size', 'blob_id')[:self.batch_size])
+            if not batch:
+                return
+
+            for path_file, _, _, blob_id in batch:
+                if blob_id is None:
+                    self._remove_file_from_media(path_file)
+
+            with transaction.atomic():
+                # The files are deleted in cascade with his details
+                Detail.objects.filter(pk__in=[details_id for _, details_id, _, _ in batch]).delete()
+                Blob.release_many([blob_id for _, _, _, blob_id in batch if blob_id is not None])
+
+            self.purged_files += len(batch)
+            self.purged_bytes += sum(size for _, _, size, _ in batch)
+
+    def _purge_folder(self, folder: 'Folder') -> None:
+        """ Delete from media and database the folder, his descendants and all the files inside them """
+        from ..models import File
+
+        FolderAggregates.remove_folder(folder.pk)
+        self._purge_files(File.objects.filter(parent_folder__path__startswith=folder.path))
+
+        get_storage_backend().remove_tree(folder.get_absolute_path_folder())
+        self.purged_folders += folder.get_descendant_count() + 1
+        folder.delete()
+
+    def _purge_entry(self, entry: Union['File', 'Folder']) -> None:
+        from ..models import File
+
+        if isinstance(entry, File):
+            self._purge_files(File.get_element_by_id_like_queryset(entry.pk))
+        else:
+            self._purge_folder(entry)
+
+    def purge_expired(self) -> None:
+        """ Delete all the folders and files of the recycle bin that are expired """
+        from ..models import File, Folder
+
+        expiration_date = self._get_expiration_date()
+
+        self._purge_files(File.objects.filter(is_active=False, trashed_at__lte=expiration_date))
+
+        expired_folders = Folder.objects.filter(is_active=False, trashed_at__lte=expiration_date).order_by('path')
+        # The folders are taken one by one because a purged folder can contain another expired folder
+        folder = expired_folders.first()
+        while folder is not None:
+            self._purge_folder(folder)
+            folder = expired_folders.first()
+
+    def get_size_entry(self, entry: Union['File', 'Folder']) -> int:
+        """ Return the bytes used by a file or by all the files inside a folder and his descendants """
+        from ..models import File
+
+        if isinstance(entry, File):
+            return entry.details.size
+
+        files = File.objects.filter(parent_folder__path__startswith=entry.path)
+        return files.aggregate(total=Sum('details__size'))['total'] or 0
+
+    def get_trashed_entries_by_user(self, user_id: int) -> List[Union['File', 'Folder']]:
+        """ Return the top level elements of the recycle bin of a user, the oldest first """
+        from ..models import File, Folder
+
+        folders = Folder.objects.filter(owner_user_id=user_id, is_active=False, trashed_at__isnull=False)
+        files = File.objects.filter(
+            parent_folder__owner_user_id=user_id,
+            is_active=False,
+            trashed_at__isnull=False
+        ).select_related('details')
+
+        return sorted([*folders, *files], key=lambda entry: entry.trashed_at)
+
+    def evict_over_quota(self, quota_bytes: int) -> None:
+        """
+            Delete before his expiration the oldest elements of the recycle bin of
+            the users whose files use more bytes than the quota received
+
+            Parameters:
+                quota_bytes(int): bytes that a user can use before the eviction
+        """
+        from ..models import File
+
+        users_over_quota = File.objects.values('parent_folder__owner_user_id').annotate(
+            used=Sum('details__size')
+        ).filter(used__gt=quota_bytes)
+
+        for user_usage in users_over_quota:
+            used = user_usage['used']
+            for entry in self.get_trashed_entries_by_user(user_usage['parent_folder__owner_user_id']):
+                if used <= quota_bytes:
+                    break
+                # An entry inside an evicted folder was deleted together with it
+                if not type(entry).exists_by_id(entry.pk):
+                    continue
+                used -= self.get_size_entry(entry)
+                self._purge_entry(entry)
@@ -0,0 +1,93 @@
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import QuerySet
+
+from ..projections import project_files, project_folders
+from .name_index import FILES, FOLDERS, NameIndex
+
+if TYPE_CHECKING:
+    from apps.users.models import User
+    from ..models import Folder
+
+Rows = List[Dict[str, Any]]
+
+
+def get_searched_querysets(user: 'User', subtree: Optional['Folder'] = None) -> Tuple[QuerySet, QuerySet]:
+    """ Return the active folders and files of the user, inside the subtree if it is received """
+    from ..models import File, Folder
+
+    folders = Folder.objects.filter(owner_user_id=user.pk, is_active=True)
+    files = File.objects.filter(parent_folder__owner_user_id=user.pk, parent_folder__is_active=True, is_active=True)
+
+    if subtree is not None:
+        folders = folders.filter(path__startswith=subtree.path)
+        files = files.filter(parent_folder__path__startswith=subtree.path)
+
+    return folders, files
+
+
+def _search_in_database(folders: QuerySet, files: QuerySet, query: str, prefix: bool, limit: int) -> Tuple[Rows, Rows]:
+    """ Search with the trigram indexes of the names in PostgreSQL, ILIKE '%query%' and ILIKE 'query%' use them """
+    lookup = 'name__istartswith' if prefix else 'name__icontains'
+
+    return (
+        list(project_folders(folders.filter(**{lookup: query}).order_by('name', 'pk'))[:limit]),
+        list(project_files(files.filter(**{lookup: query}).order_by('name', 'pk'))[:limit]),
+    )
+
+
+def _search_in_memory(
+        user: 'User', folders: QuerySet, files: QuerySet, query: str, prefix: bool, limit: int) -> Tuple[Rows, Rows]:
+    """
+        Search the names in the index of the process and read the rows of the matches by
+        batches, discarding the elements that are not active or are outside of the subtree
+    """
+    projections = {FOLDERS: project_folders(folders), FILES: project_files(files)}
+    candidates: Dict[str, List[int]] = {FOLDERS: [], FILES: []}
+    results: Dict[str, Rows] = {FOLDERS: [], FILES: []}
+
+    def read_candidates(kind: str) -> None:
+        if candidates[kind]:
+            rows = {row['pk']: row for row in projections[kind].filter(pk__in=candidates[kind])}
+            results[kind].extend(rows[pk] for pk in candidates[kind] if pk in rows)
+            candidates[kind] = []
+
+    for kind, pk in NameIndex.load(user.pk).search(query, prefix):
+        if len(results[kind]) >= limit:
+            if len(results[FOLDERS]) >= limit and len(results[FILES]) >= limit:
+                break
+            continue
+
+        candidates[kind].append(pk)
+        if len(results[kind]) + len(candidates[kind]) >= limit:
+            read_candidates(kind)
+
+    read_candidates(FOLDERS)
+    read_candidates(FILES)
+    return results[FOLDERS][:limit], results[FILES][:limit]
+
+
+def search_by_name(
+        user: 'User', query: str, prefix: bool = False, subtree: Optional['Folder'] = None,
+        limit: int = 100) -> Tuple[Rows, Rows]:
+    """
+        Return the folders and files of the user with the query in their names
+
+        Parameters:
+            user(User): owner of the folders and files
+            query(str): text searched without distinguish upper and lower case
+            prefix(bool): if the names must start with the query instead of contain it
+            subtree(Folder): folder where the search is done, or None to search in all the tree
+            limit(int): maximum of folders and of files returned
+
+        Return:
+            folders, files(Tuple[Rows, Rows]): projections of the folders and files found
+    """
+    folders, files = get_searched_querysets(user, subtree)
+
+    # Without a shared cache the index of the process would be built again for every search
+    if connection.vendor == 'postgresql' or not settings.CACHE_SHARED:
+        return _search_in_database(folders, files, query, prefix, limit)
+    return _search_in_memory(user, folders, files, query, prefix, limit)
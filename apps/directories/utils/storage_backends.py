@@ -0,0 +1,349 @@
+from typing import IO, Dict, Iterator, List, Tuple
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File as FileCore
+from django.core.files.storage import Storage
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.deconstruct import deconstructible
+from django.utils.module_loading import import_string
+
+import os
+import shutil
+import tempfile
+import threading
+
+
+class StorageBackend():
+    """
+        Physical store of the folders and files. The paths received are the absolute paths
+        inside the media folder used by the rest of the directory layer, every backend
+        translates them to his own locations
+    """
+
+    def create_folder(self, path: str) -> None:
+        raise NotImplementedError
+
+    def move(self, source: str, destination: str) -> None:
+        """ Rename a file or a folder to the destination path, FileExistsError if the destination exists """
+        raise NotImplementedError
+
+    def remove_file(self, path: str) -> None:
+        raise NotImplementedError
+
+    def remove_tree(self, path: str) -> None:
+        raise NotImplementedError
+
+    def exists(self, path: str) -> bool:
+        raise NotImplementedError
+
+    def size(self, path: str) -> int:
+        raise NotImplementedError
+
+    def list_files(self, path: str) -> Iterator[Tuple[str, float]]:
+        """ Return the path and the timestamp of the last modification of the files inside a folder and his children """
+        raise NotImplementedError
+
+    def save(self, path: str, content: IO[bytes]) -> None:
+        raise NotImplementedError
+
+    def create(self, path: str, content: IO[bytes]) -> None:
+        """ Save a content in a path that must not exist, FileExistsError if it exists """
+        raise NotImplementedError
+
+    def save_many(self, files: List[Tuple[str, IO[bytes]]], exclusive: bool = False) -> List[str]:
+        """
+            Save many contents at the same time, every content is written by a thread of a pool.
+            With exclusive the paths must not exist. If a content can not be saved the contents
+            written by the call are removed and the error is raised, else return the paths written
+        """
+        def save(file: Tuple[str, IO[bytes]]) -> str:
+            path, content = file
+            content.seek(0)
+            if exclusive:
+                self.create(path, content)
+            else:
+                self.save(path, content)
+            return path
+
+        with ThreadPoolExecutor(max_workers=settings.UPLOAD_MANY_PARALLEL_WRITES) as executor:
+            writes = [executor.submit(save, file) for file in files]
+
+        written_paths = [write.result() for write in writes if write.exception() is None]
+        errors = [write.exception() for write in writes if write.exception() is not None]
+        if errors:
+            for path in written_paths:
+                self.remove_file(path)
+            raise errors[0]
+        return written_paths
+
+    def open(self, path: str) -> IO[bytes]:
+        raise NotImplementedError
+
+
+class LocalStorageBackend(StorageBackend):
+    """ Store the folders and files in the local disk """
+
+    def create_folder(self, path: str) -> None:
+        os.umask(0)
+        os.makedirs(path, mode=0o777, exist_ok=True)
+
+    def move(self, source: str, destination: str) -> None:
+        # shutil.move would move the source inside a destination folder that already exists
+        if os.path.lexists(destination):
+            raise FileExistsError(destination)
+        os.rename(source, destination)
+
+    def remove_file(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def remove_tree(self, path: str) -> None:
+        shutil.rmtree(path, ignore_errors=True)
+
+    def exists(self, path: str) -> bool:
+        return os.path.exists(path)
+
+    def size(self, path: str) -> int:
+        return os.path.getsize(path)
+
+    def list_files(self, path: str) -> Iterator[Tuple[str, float]]:
+        for directory, _, names in os.walk(path):
+            for name in names:
+                file_path = os.path.join(directory, name)
+                try:
+                    yield file_path, os.path.getmtime(file_path)
+                except FileNotFoundError:
+                    continue
+
+    def save(self, path: str, content: IO[bytes]) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as destination:
+            shutil.copyfileobj(content, destination)
+
+    def create(self, path: str, content: IO[bytes]) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'xb') as destination:
+            shutil.copyfileobj(content, destination)
+
+    def open(self, path: str) -> IO[bytes]:
+        return open(path, 'rb')
+
+
+class S3StorageBackend(StorageBackend):
+    """
+        Store the folders and files in a bucket of a service compatible with S3. The key of
+        an element is his path relative to the media folder, and a folder is a key ended in
+        a slash plus every key that starts with it. The uploads and downloads are split in
+        parts transferred in parallel and the moves are copies made by the server
+    """
+
+    def __init__(self) -> None:
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+        except ImportError as error:
+            raise ImproperlyConfigured('The S3 storage backend requires the boto3 package') from error
+
+        self.bucket = settings.STORAGE_S3_BUCKET
+        self.client = boto3.client(
+            's3',
+            endpoint_url=settings.STORAGE_S3_ENDPOINT_URL,
+            region_name=settings.STORAGE_S3_REGION,
+            aws_access_key_id=settings.STORAGE_S3_ACCESS_KEY,
+            aws_secret_access_key=settings.STORAGE_S3_SECRET_KEY,
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.STORAGE_S3_MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=settings.STORAGE_S3_MULTIPART_CHUNK_SIZE,
+            max_concurrency=settings.STORAGE_S3_MAX_CONCURRENCY,
+            use_threads=True,
+        )
+
+    def _get_key(self, path: str) -> str:
+        """ Return the key of the bucket that corresponds to a path of the media folder """
+        key = os.path.relpath(path, settings.MEDIA_ROOT) if os.path.isabs(path) else path
+        return key.replace(os.sep, '/').strip('/')
+
+    def _list_objects(self, prefix: str) -> Iterator[Dict]:
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            yield from page.get('Contents', [])
+
+    def _list_keys(self, prefix: str) -> Iterator[str]:
+        for element in self._list_objects(prefix):
+            yield element['Key']
+
+    def _head(self, key: str) -> Dict:
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as error:
+            if error.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return {}
+            raise
+
+    def _is_file(self, key: str) -> bool:
+        return bool(key) and bool(self._head(key))
+
+    def _is_folder(self, key: str) -> bool:
+        response = self.client.list_objects_v2(Bucket=self.bucket, Prefix=f'{key}/', MaxKeys=1)
+        return response.get('KeyCount', 0) > 0
+
+    def _copy(self, source_key: str, destination_key: str) -> None:
+        # Over the multipart threshold boto3 copies the object by parts in the server
+        self.client.copy(
+            {'Bucket': self.bucket, 'Key': source_key},
+            self.bucket,
+            destination_key,
+            Config=self.transfer_config
+        )
+
+    def _delete_keys(self, keys: List[str]) -> None:
+        # A request can delete up to 1000 keys
+        for start in range(0, len(keys), 1000):
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': key} for key in keys[start:start + 1000]], 'Quiet': True}
+            )
+
+    def create_folder(self, path: str) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=f'{self._get_key(path)}/', Body=b'')
+
+    def move(self, source: str, destination: str) -> None:
+        source_key = self._get_key(source)
+        destination_key = self._get_key(destination)
+
+        if self._is_file(destination_key) or self._is_folder(destination_key):
+            raise FileExistsError(destination)
+
+        if self._is_file(source_key):
+            self._copy(source_key, destination_key)
+            self._delete_keys([source_key])
+            return
+
+        source_keys = list(self._list_keys(f'{source_key}/'))
+        if not source_keys:
+            raise FileNotFoundError(source)
+
+        destination_keys = [f'{destination_key}/{key[len(source_key) + 1:]}' for key in source_keys]
+        with ThreadPoolExecutor(max_workers=settings.STORAGE_S3_MAX_CONCURRENCY) as executor:
+            list(executor.map(self._copy, source_keys, destination_keys))
+        self._delete_keys(source_keys)
+
+    def remove_file(self, path: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._get_key(path))
+
+    def remove_tree(self, path: str) -> None:
+        self._delete_keys(list(self._list_keys(f'{self._get_key(path)}/')))
+
+    def exists(self, path: str) -> bool:
+        key = self._get_key(path)
+        return self._is_file(key) or self._is_folder(key)
+
+    def list_files(self, path: str) -> Iterator[Tuple[str, float]]:
+        for element in self._list_objects(f'{self._get_key(path)}/'):
+            # The folders are keys ended in a slash
+            if not element['Key'].endswith('/'):
+                yield os.path.join(settings.MEDIA_ROOT, element['Key']), element['LastModified'].timestamp()
+
+    def size(self, path: str) -> int:
+        head = self._head(self._get_key(path))
+        if not head:
+            raise FileNotFoundError(path)
+        return head['ContentLength']
+
+    def save(self, path: str, content: IO[bytes]) -> None:
+        self.client.upload_fileobj(content, self.bucket, self._get_key(path), Config=self.transfer_config)
+
+    def create(self, path: str, content: IO[bytes]) -> None:
+        """ The conditional write is only supported by a single request, it is not split in parts """
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.put_object(Bucket=self.bucket, Key=self._get_key(path), Body=content, IfNoneMatch='*')
+        except ClientError as error:
+            if error.response['Error']['Code'] in ('412', 'PreconditionFailed', 'ConditionalRequestConflict'):
+                raise FileExistsError(path) from error
+            raise
+
+    def open(self, path: str) -> IO[bytes]:
+        """ Download the object by parts in parallel into a temporary file """
+        content = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        self.client.download_fileobj(self.bucket, self._get_key(path), content, Config=self.transfer_config)
+        content.seek(0)
+        return content
+
+
+_storage_backends: Dict[str, StorageBackend] = {}
+_storage_backends_lock = threading.Lock()
+
+
+def get_storage_backend() -> StorageBackend:
+    """ Return the instance of the backend configured in the STORAGE_BACKEND setting """
+    with _storage_backends_lock:
+        if settings.STORAGE_BACKEND not in _storage_backends:
+            _storage_backends[settings.STORAGE_BACKEND] = import_string(settings.STORAGE_BACKEND)()
+        return _storage_backends[settings.STORAGE_BACKEND]
+
+
+@receiver(setting_changed)
+def reset_storage_backends(setting, **kwargs):
+    if setting.startswith('STORAGE_'):
+        with _storage_backends_lock:
+            _storage_backends.clear()
+
+
+def _reset_storage_backends_after_fork() -> None:
+    # The clients of the backends are not safe to share with a forked process
+    global _storage_backends_lock
+    _storage_backends_lock = threading.Lock()
+    _storage_backends.clear()
+
+
+os.register_at_fork(after_in_child=_reset_storage_backends_after_fork)
+
+
+@deconstructible
+class BackendMediaStorage(Storage):
+    """
+        Storage of django that saves the uploaded files through the configured storage backend.
+        The contents are written by the lane of the filesystem queue, after the operations over
+        the same paths that are pending
+    """
+
+    def _get_path(self, name: str) -> str:
+        return os.path.join(settings.MEDIA_ROOT, name)
+
+    def _open(self, name, mode='rb'):
+        return FileCore(get_storage_backend().open(self._get_path(name)), name)
+
+    def get_available_name(self, name, max_length=None):
+        # The path of a file is his name, unique in his folder. The media can still have a file
+        # with the same path that the lane has not removed, so it is not compared with the media
+        return name
+
+    def _save(self, name, content):
+        from .filesystem_queue import filesystem_queue
+
+        content.seek(0)
+        filesystem_queue.write(self._get_path(name), content)
+        return name
+
+    def delete(self, name):
+        get_storage_backend().remove_file(self._get_path(name))
+
+    def exists(self, name):
+        return get_storage_backend().exists(self._get_path(name))
+
+    def size(self, name):
+        return get_storage_backend().size(self._get_path(name))
+
+    def url(self, name):
+        return f'{settings.MEDIA_URL}{name}'
@@ -0,0 +1,77 @@
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+class StorageQuota():
+    """
+        Bytes that a user can store. The bytes used are the total size of the root folder of the
+        user and the bytes reserved are the uploads in progress, both kept in counters updated
+        with atomic UPDATEs, so the space is reserved before the content is received and the
+        uploads at the same time can not store more than the quota. The content moved to the
+        recycle bin is not counted, so his size is reserved again before recover it
+    """
+
+    @staticmethod
+    def get_used_expression():
+        from ..models import Folder
+
+        return Coalesce(
+            Subquery(Folder.objects.filter(owner_user_id=OuterRef('pk'), depth=1).values('total_size')[:1]),
+            Value(0)
+        )
+
+    @staticmethod
+    def get_quota_expression():
+        """ The users without quota have the quota of the settings """
+        if settings.STORAGE_QUOTA_BYTES is None:
+            return F('storage_quota')
+        return Coalesce(F('storage_quota'), Value(settings.STORAGE_QUOTA_BYTES))
+
+    @staticmethod
+    def reserve(user_id: int, size: int) -> bool:
+        """
+            Reserve the space of an upload if the user has it free, checking and reserving in
+            the same statement
+
+            Parameters:
+                user_id(int): id of the user that uploads the content
+                size(int): bytes that will be uploaded
+
+            Return:
+                reserved(bool): True if the space was reserved or False if the quota is exceeded
+        """
+        has_space = Q(
+            storage_reserved__lte=StorageQuota.get_quota_expression() - StorageQuota.get_used_expression() - size
+        )
+        if settings.STORAGE_QUOTA_BYTES is None:
+            has_space |= Q(storage_quota__isnull=True)
+
+        return get_user_model().objects.filter(has_space, pk=user_id).update(
+            storage_reserved=F('storage_reserved') + size
+        ) == 1
+
+    @staticmethod
+    def release(user_id: int, size: int) -> None:
+        """ Free the space reserved by an upload that finished, failed or was cancelled """
+        if size:
+            get_user_model().objects.filter(pk=user_id).update(
+                storage_reserved=Greatest(F('storage_reserved') - size, Value(0))
+            )
+
+    @staticmethod
+    def get_usage(user_id: int) -> Dict[str, Optional[int]]:
+        """
+            Return the bytes used, reserved and the quota of the user
+
+            Return:
+                usage(Dict[str, Optional[int]]): bytes used, reserved and quota, None if it does not have quota
+        """
+        return get_user_model().objects.filter(pk=user_id).values(
+            used=StorageQuota.get_used_expression(),
+            reserved=F('storage_reserved'),
+            quota=StorageQuota.get_quota_expression()
+        ).get()
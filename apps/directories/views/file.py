@@ -1,23 +1,68 @@
+from concurrent import futures
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+
 from rest_framework import status
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import action
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 
 from apps.directories.models import Folder
 
-from ..models import File
-from ..serializers import FileSerializer
+from ..exceptions import LengthRequired, StorageQuotaExceeded
+from ..models import Blob, File, UploadSession
+from ..serializers import FileSerializer, UploadSessionSerializer
+from ..pagination import KeysetPagination
+from ..parsers import ChunkParser
+from ..projections import get_files_rows, project_files
+from ..renderers import FastJSONRenderer
 from ..permissions import IsAuthenticatedOwnerFolderFileUser
+from ..utils.download import get_download_response
+from ..utils.previews import PREVIEW, THUMBNAIL, preview_cache
+from ..utils.storage_quota import StorageQuota
 
 
 class FileVS(ModelViewSet):
 
     serializer_class = FileSerializer
     permission_classes = [IsAuthenticatedOwnerFolderFileUser]
+    pagination_class = KeysetPagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     http_method_names = ['get', 'patch', 'post', 'delete']
+    reserved_bytes = 0
 
     def get_queryset(self):
-        return File.get_all_files_by_user(self.request.user)
+        return File.get_all_files_by_user(self.request.user).select_related('details')
+
+    def check_permissions(self, request):
+        # The permissions read the body, the space of the uploads is reserved before
+        if self.action in ('create', 'upload_many') and request.user.is_authenticated:
+            self.reserve_upload(request)
+        super().check_permissions(request)
+
+    def reserve_upload(self, request) -> None:
+        """ Reserve the bytes of the body of the upload, rejecting it before receive the content """
+        length = request.META.get('CONTENT_LENGTH', '')
+        if not length.isdigit():
+            raise LengthRequired()
+
+        if not StorageQuota.reserve(request.user.pk, int(length)):
+            raise StorageQuotaExceeded()
+        self.reserved_bytes = int(length)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self.reserved_bytes:
+            StorageQuota.release(request.user.pk, self.reserved_bytes)
+            self.reserved_bytes = 0
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        """ List the files of the user from a projection of his columns """
+
+        page = self.paginate_queryset(project_files(File.get_all_files_by_user(self.request.user)))
+        return self.get_paginated_response(get_files_rows(page, request))
 
     @action(detail=False, methods=['get'], url_path='list-files',
             url_name='list-files', permission_classes=[IsAuthenticatedOwnerFolderFileUser])
@@ -32,9 +77,251 @@ class FileVS(ModelViewSet):
             )
 
         parent_folder = Folder.get_by_id(parent_folder_id)
-        serializer = FileSerializer(parent_folder.get_all_files(), many=True)
+        page = self.paginate_queryset(project_files(parent_folder.get_all_files()))
+
+        return self.get_paginated_response(get_files_rows(page))
+
+    @action(detail=False, methods=['get'], url_path='quota',
+            url_name='quota', permission_classes=[IsAuthenticatedOwnerFolderFileUser])
+    def quota(self, request):
+        """ Return the bytes used and reserved by the user and his quota """
+        return Response(StorageQuota.get_usage(self.request.user.pk))
+
+    @action(detail=True, methods=['get'], url_path='download',
+            url_name='download', permission_classes=[IsAuthenticatedOwnerFolderFileUser])
+    def download(self, request, pk=None):
+        """ Send the content of the file supporting range and conditional requests """
+        return get_download_response(request, self.get_object())
+
+    @action(detail=True, methods=['get'], url_path='preview',
+            url_name='preview', permission_classes=[IsAuthenticatedOwnerFolderFileUser])
+    def preview(self, request, pk=None):
+        """ Send a small image of an image or of the first page of a PDF, size is thumbnail or preview """
+        file = self.get_object()
+        kind = request.query_params.get('size', THUMBNAIL)
+
+        if kind not in (THUMBNAIL, PREVIEW):
+            return Response(
+                {'message': f'The size must be {THUMBNAIL} or {PREVIEW}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not preview_cache.is_supported(file):
+            return Response({'message': 'The file does not have preview'}, status=status.HTTP_404_NOT_FOUND)
 
-        return Response(serializer.data)
+        etag = f'"{preview_cache.get_key(file, kind)}"'
+        if etag in [tag.strip() for tag in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            try:
+                preview = preview_cache.open_preview(file, kind, timeout=settings.PREVIEWS_TIMEOUT)
+            except futures.TimeoutError:
+                return Response(
+                    {'message': 'The preview is being generated, try again later'},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={'Retry-After': '1'}
+                )
+            except Exception:
+                return Response(
+                    {'message': 'The preview of the file can not be generated'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            response = FileResponse(preview, content_type='image/webp')
+
+        # The name of the preview changes with the content, so the clients can keep it
+        response['ETag'] = etag
+        response['Cache-Control'] = f'private, max-age={settings.PREVIEWS_MAX_AGE}'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='upload-many',
+            url_name='upload-many', permission_classes=[IsAuthenticatedOwnerFolderFileUser])
+    def upload_many(self, request):
+        """ Create many files in a folder with one request, the contents are sent in the files field """
+        id_parent_folder = self.request.data.get('parent_folder', None)
+        contents = self.request.FILES.getlist('files')
+
+        if id_parent_folder is None or not contents:
+            return Response(
+                {'message': 'The parent_folder and files fields are required.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(contents) > settings.UPLOAD_MANY_MAX_FILES:
+            return Response(
+                {'message': f'At most {settings.UPLOAD_MANY_MAX_FILES} files can be uploaded in a request.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        parent_folder = self.request.user.get_folder_by_id(id_parent_folder)
+        if parent_folder is None:
+            return Response(
+                {'message': 'The destination folder does not exists. Check it and try again'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        names = [File.get_upload_name(content) for content in contents]
+        if len(set(names)) != len(names) or set(names) & parent_folder.get_all_files_name():
+            return Response(
+                {'message': 'The files must have different names between them and with the files of the folder'},
+                status=status.HTTP_412_PRECONDITION_FAILED
+            )
+
+        try:
+            new_files = File.create_many_files(parent_folder, contents)
+        except FileExistsError:
+            return Response(
+                {'message': 'The files must have different names between them and with the files of the folder'},
+                status=status.HTTP_412_PRECONDITION_FAILED
+            )
+        return Response(FileSerializer(new_files, many=True).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='upload-by-hash',
+            url_name='upload-by-hash', permission_classes=[IsAuthenticatedOwnerFolderFileUser])
+    def upload_by_hash(self, request):
+        """ Create a file with a content that the user already stored without upload it again """
+        id_parent_folder = self.request.data.get('parent_folder', None)
+        name = self.request.data.get('name', None)
+        sha256 = self.request.data.get('sha256', None)
+
+        if id_parent_folder is None or not name or not sha256:
+            return Response(
+                {'message': 'The parent_folder, name and sha256 fields are required.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        parent_folder = self.request.user.get_folder_by_id(id_parent_folder)
+        if parent_folder is None:
+            return Response(
+                {'message': 'The destination folder does not exists. Check it and try again'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        blob = Blob.get_blob_by_user_and_hash(self.request.user.pk, sha256)
+        if blob is None:
+            return Response(
+                {'message': 'The content is not stored. Upload the file'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        if name in parent_folder.get_all_files_name():
+            return Response(
+                {'message': 'A file with the same name already exists in the folder'},
+                status=status.HTTP_412_PRECONDITION_FAILED
+            )
+
+        if not StorageQuota.reserve(self.request.user.pk, blob.size):
+            raise StorageQuotaExceeded()
+        try:
+            new_file = File.create_file_from_blob(parent_folder, name, blob)
+        finally:
+            StorageQuota.release(self.request.user.pk, blob.size)
+        return Response(FileSerializer(new_file).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='upload-sessions',
+            url_name='upload-sessions', permission_classes=[IsAuthenticatedOwnerFolderFileUser])
+    def create_upload_session(self, request):
+        """ Start a resumable upload of a file that will be sent by chunks """
+        id_parent_folder = self.request.data.get('parent_folder', None)
+        name = self.request.data.get('name', None)
+        size = self.request.data.get('size', None)
+
+        if id_parent_folder is None or not name or size is None or not str(size).isdigit():
+            return Response(
+                {'message': 'The parent_folder, name and size fields are required.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        parent_folder = self.request.user.get_folder_by_id(id_parent_folder)
+        if parent_folder is None:
+            return Response(
+                {'message': 'The destination folder does not exists. Check it and try again'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        if name in parent_folder.get_all_files_name():
+            return Response(
+                {'message': 'A file with the same name already exists in the folder'},
+                status=status.HTTP_412_PRECONDITION_FAILED
+            )
+
+        # The space of the file is reserved until the session is finalized or cancelled
+        if not StorageQuota.reserve(self.request.user.pk, int(size)):
+            raise StorageQuotaExceeded()
+        session = UploadSession.create_session(self.request.user, parent_folder, name, int(size))
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], url_path=r'upload-sessions/(?P<session_pk>[0-9]+)',
+            url_name='upload-session', permission_classes=[IsAuthenticatedOwnerFolderFileUser],
+            parser_classes=[ChunkParser])
+    def upload_session(self, request, session_pk=None):
+        """ Return the ranges already received to resume the upload """
+        session = UploadSession.get_by_user_and_id(self.request.user, session_pk)
+        if session is None:
+            return Response({'message': 'The upload session does not exists'}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(UploadSessionSerializer(session).data)
+
+    @upload_session.mapping.patch
+    def upload_chunk(self, request, session_pk=None):
+        """ Write the body of the request in the offset received in the Upload-Offset header """
+        session = UploadSession.get_by_user_and_id(self.request.user, session_pk)
+        if session is None:
+            return Response({'message': 'The upload session does not exists'}, status=status.HTTP_404_NOT_FOUND)
+
+        offset = request.META.get('HTTP_UPLOAD_OFFSET', '')
+        length = request.META.get('CONTENT_LENGTH', '')
+        if not offset.isdigit() or not length.isdigit():
+            return Response(
+                {'message': 'The Upload-Offset and Content-Length headers are required.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if int(length) > settings.UPLOAD_SESSIONS_MAX_CHUNK_SIZE:
+            return Response(
+                {'message': f'The chunks can not be bigger than {settings.UPLOAD_SESSIONS_MAX_CHUNK_SIZE} bytes'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
+        try:
+            written = session.write_chunk(int(offset), request.stream, int(length))
+        except ValueError as error:
+            return Response({'message': str(error)}, status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+        return Response({'written': written, 'received_ranges': session.get_received_ranges()})
+
+    @upload_session.mapping.delete
+    def cancel_upload_session(self, request, session_pk=None):
+        """ Cancel the upload and remove the chunks received """
+        session = UploadSession.get_by_user_and_id(self.request.user, session_pk)
+        if session is None:
+            return Response({'message': 'The upload session does not exists'}, status=status.HTTP_404_NOT_FOUND)
+
+        session.cancel()
+        return Response({'message': 'Upload cancelled'}, status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=['post'], url_path=r'upload-sessions/(?P<session_pk>[0-9]+)/finalize',
+            url_name='finalize-upload-session', permission_classes=[IsAuthenticatedOwnerFolderFileUser])
+    def finalize_upload_session(self, request, session_pk=None):
+        """ Create the file in the folder once all the chunks were received """
+        session = UploadSession.get_by_user_and_id(self.request.user, session_pk)
+        if session is None:
+            return Response({'message': 'The upload session does not exists'}, status=status.HTTP_404_NOT_FOUND)
+
+        if not session.is_complete():
+            return Response(
+                {'message': 'There are chunks of the file that were not received',
+                 'received_ranges': session.get_received_ranges()},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        if session.name in session.parent_folder.get_all_files_name():
+            return Response(
+                {'message': 'A file with the same name already exists in the folder'},
+                status=status.HTTP_412_PRECONDITION_FAILED
+            )
+
+        new_file = session.finalize()
+        return Response(FileSerializer(new_file).data, status=status.HTTP_201_CREATED)
 
     @action(detail=False, methods=['patch'], url_path='move-files',
             url_name='move-files', permission_classes=[IsAuthenticatedOwnerFolderFileUser])
@@ -75,7 +362,7 @@ class FileVS(ModelViewSet):
                 status=status.HTTP_412_PRECONDITION_FAILED
             )
 
-        if File.get_all_files_names_by_user_and_list_ids(self.request.user, files_to_move) & new_parent_folder.get_all_files_name():
+        if File.get_conflicting_names(files_to_move, new_parent_folder):
             return Response(
                 {'message': 'The new folder to be moved to must be different name of the children folder'},
                 status=status.HTTP_412_PRECONDITION_FAILED
@@ -116,7 +403,8 @@ class FileVS(ModelViewSet):
 
             if File.disabled_many_files(files_to_disable) is True:
                 return Response(
-                    {'message': 'Files moved to recycle bin. Will be delete in 3 days'},
+                    {'message': 'Files moved to recycle bin. '
+                                f'Will be delete in {settings.RECYCLE_BIN_RETENTION_DAYS} days'},
                     status=status.HTTP_200_OK
                 )
             else:
@@ -151,7 +439,20 @@ class FileVS(ModelViewSet):
                     status=status.HTTP_403_FORBIDDEN
                 )
 
-            if File.recover_many_files(files_to_recover) is True:
+            # The files in the recycle bin do not use quota, the space is reserved until they are recovered
+            trashed_size = File.get_trashed_size(files_to_recover)
+            if trashed_size and not StorageQuota.reserve(self.request.user.pk, trashed_size):
+                return Response(
+                    {'message': 'The storage quota does not have space for the files.'},
+                    status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+                )
+
+            try:
+                recovered = File.recover_many_files(files_to_recover)
+            finally:
+                StorageQuota.release(self.request.user.pk, trashed_size)
+
+            if recovered is True:
                 return Response(
                     {'message': 'Files arecover successfully'},
                     status=status.HTTP_200_OK
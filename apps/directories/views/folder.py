@@ -1,23 +1,40 @@
+from django.conf import settings
+
 from rest_framework import status
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import action
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 
-from apps.directories.models import Folder
+from apps.directories.models import Folder, File
 
-from ..serializers import FolderCreateSerializer
+from ..pagination import KeysetPagination
+from ..projections import get_files_rows, project_files, project_folders
+from ..renderers import FastJSONRenderer
+from ..serializers import FolderCreateSerializer, TrashedFolderSerializer, TrashedFileSerializer
 from ..permissions import IsAuthenticatedOwnerFolderUser
+from ..utils.download import get_folder_zip_response
+from ..utils.search import search_by_name
+from ..utils.storage_quota import StorageQuota
 
 
 class FolderVS(ModelViewSet):
 
     serializer_class = FolderCreateSerializer
     permission_classes = [IsAuthenticatedOwnerFolderUser]
+    pagination_class = KeysetPagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     http_method_names = ['get', 'patch', 'post', 'delete']
 
     def get_queryset(self):
         return self.request.user.own_entity_directories.all()
 
+    def list(self, request, *args, **kwargs):
+        """ List the folders of the user from a projection of his columns """
+
+        page = self.paginate_queryset(project_folders(self.get_queryset()))
+        return self.get_paginated_response(page)
+
     @action(detail=True, methods=['post'], url_path='create-folder',
             url_name='create-folder', permission_classes=[IsAuthenticatedOwnerFolderUser])
     def create_new_folder(self, request, pk):
@@ -43,9 +60,64 @@ class FolderVS(ModelViewSet):
 
         parent_folder = self.get_object()
 
-        serializer = FolderCreateSerializer(parent_folder.get_children(), many=True)
+        page = self.paginate_queryset(project_folders(parent_folder.get_children()))
 
-        return Response(serializer.data)
+        return self.get_paginated_response(page)
+
+    @action(detail=True, methods=['get'], url_path='contents',
+            url_name='contents', permission_classes=[IsAuthenticatedOwnerFolderUser])
+    def list_contents(self, request, pk):
+        """ List in one page the children folders and then the files of the folder """
+
+        parent_folder = self.get_object()
+
+        folders, files = self.paginator.paginate_folder_contents(
+            project_folders(parent_folder.get_children()),
+            project_files(parent_folder.get_all_files()),
+            request
+        )
+
+        return self.paginator.get_paginated_response({
+            'folders': folders,
+            'files': get_files_rows(files, request),
+            'next': self.paginator.next_link,
+        })
+
+    @action(detail=True, methods=['get'], url_path='download',
+            url_name='download', permission_classes=[IsAuthenticatedOwnerFolderUser])
+    def download(self, request, pk):
+        """ Download the folder and all his content like a zip archive """
+
+        return get_folder_zip_response(self.get_object())
+
+    @action(detail=False, methods=['get'], url_path='search',
+            url_name='search', permission_classes=[IsAuthenticatedOwnerFolderUser])
+    def search(self, request):
+        """ Search by name the folders and files of the user, or only the ones inside a folder """
+
+        query = request.query_params.get('q', '')
+        if not query:
+            return Response({'message': 'The q parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        subtree = None
+        id_folder = request.query_params.get('folder', None)
+        if id_folder is not None:
+            subtree = request.user.get_folder_by_id(id_folder) if request.user.is_owner_folder(id_folder) else None
+            if subtree is None:
+                return Response(
+                    {'message': 'The folder does not exists. Check it and try again'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+        folders, files = search_by_name(
+            request.user,
+            query,
+            prefix=request.query_params.get('mode', None) == 'prefix',
+            subtree=subtree,
+            limit=self.paginator.get_page_size(request)
+        )
+
+        return Response({'folders': folders, 'files': get_files_rows(files, request)})
 
     @action(detail=False, methods=['post'], url_path='move-folder',
             url_name='move-folder', permission_classes=[IsAuthenticatedOwnerFolderUser])
@@ -79,7 +151,7 @@ class FolderVS(ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        if self.request.user.get_all_folders_by_list_ids(folders_to_move).count() != len(folders_to_move):
+        if not self.request.user.is_owner_folders(folders_to_move):
             return Response(
                 {'message': 'You do not have the right permissions to move the folders'},
                 status=status.HTTP_403_FORBIDDEN
@@ -131,7 +203,7 @@ class FolderVS(ModelViewSet):
 
             folders_to_disable = list(map(int, list_of_ids_to_disable))
 
-            if self.request.user.get_all_folders_by_list_ids(folders_to_disable).count() != len(folders_to_disable):
+            if not self.request.user.is_owner_folders(folders_to_disable):
                 return Response(
                     {'message': 'You do not have the right permissions to move the folders'},
                     status=status.HTTP_403_FORBIDDEN
@@ -139,7 +211,8 @@ class FolderVS(ModelViewSet):
 
             if Folder.disabled_many_folder_and_children(folders_to_disable) is True:
                 return Response(
-                    {'message': 'Folder and children moved to recycle bin. Will be delete in 3 days'},
+                    {'message': 'Folder and children moved to recycle bin. '
+                                f'Will be delete in {settings.RECYCLE_BIN_RETENTION_DAYS} days'},
                     status=status.HTTP_200_OK
                 )
             else:
@@ -168,13 +241,26 @@ class FolderVS(ModelViewSet):
 
             folders_to_recover = list(map(int, list_of_ids_to_recover))
 
-            if self.request.user.get_all_folders_by_list_ids(folders_to_recover).count() != len(folders_to_recover):
+            if not self.request.user.is_owner_folders(folders_to_recover):
                 return Response(
                     {'message': 'You do not have the right permissions to move the folders'},
                     status=status.HTTP_403_FORBIDDEN
                 )
 
-            if Folder.recover_many_folder_and_children(folders_to_recover) is True:
+            # The files in the recycle bin do not use quota, the space is reserved until they are recovered
+            trashed_size = Folder.get_trashed_size(folders_to_recover)
+            if trashed_size and not StorageQuota.reserve(self.request.user.pk, trashed_size):
+                return Response(
+                    {'message': 'The storage quota does not have space for the folders.'},
+                    status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+                )
+
+            try:
+                recovered = Folder.recover_many_folder_and_children(folders_to_recover)
+            finally:
+                StorageQuota.release(self.request.user.pk, trashed_size)
+
+            if recovered is True:
                 return Response(
                     {'message': 'Folder and children recover successfully'},
                     status=status.HTTP_200_OK
@@ -188,6 +274,16 @@ class FolderVS(ModelViewSet):
         except Exception:
             return Response({'message': 'An error has occurred'}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['get'], url_path='recycle-bin',
+            url_name='recycle-bin', permission_classes=[IsAuthenticatedOwnerFolderUser])
+    def list_recycle_bin(self, request):
+        """ List the folders and files moved by the user to the recycle bin """
+
+        folders_serializer = TrashedFolderSerializer(Folder.get_trashed_folders_by_user(request.user), many=True)
+        files_serializer = TrashedFileSerializer(File.get_trashed_files_by_user(request.user), many=True)
+
+        return Response({'folders': folders_serializer.data, 'files': files_serializer.data})
+
     @action(detail=False, methods=['delete'], url_path='delete-folder',
             url_name='delete-folder', permission_classes=[IsAuthenticatedOwnerFolderUser])
     def delete_folder(self, request):
@@ -210,7 +306,7 @@ class FolderVS(ModelViewSet):
                     status=status.HTTP_403_FORBIDDEN
                 )
 
-            if self.request.user.get_all_folders_by_list_ids(folders_to_delete).count() != len(folders_to_delete):
+            if not self.request.user.is_owner_folders(folders_to_delete):
                 return Response(
                     {'message': 'You do not have the right permissions to delete the folders'},
                     status=status.HTTP_403_FORBIDDEN
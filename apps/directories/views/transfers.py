@@ -0,0 +1,147 @@
+from typing import Callable, List, Optional, Tuple
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseNotAllowed, JsonResponse
+
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from ..models import File, UploadSession
+from ..serializers import FileSerializer
+from ..utils.async_executor import io_executor, orm_executor
+from ..utils.download import get_download_response
+from ..utils.storage_quota import StorageQuota
+
+import functools
+
+
+def authenticate(request: HttpRequest):
+    """ Return the user authenticated by the authentication classes of the api, or None """
+    api_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        user = api_request.user
+    except APIException:
+        return None
+    return user if user.is_authenticated else None
+
+
+def async_api_view(methods: List[str]) -> Callable:
+    """
+        Decorator of the async views of the transfers. The methods and the authentication are
+        checked like in the api views, running the authentication in the pool of the queries
+    """
+
+    def decorator(view: Callable) -> Callable:
+
+        @functools.wraps(view)
+        async def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+
+            user = await orm_executor.run(authenticate, request)
+            if user is None:
+                return JsonResponse(
+                    {'message': 'Authentication credentials were not provided or are not valid.'},
+                    status=401
+                )
+
+            request.user = user
+            return await view(request, *args, **kwargs)
+
+        # The clients authenticate with tokens, not with the session
+        wrapper.csrf_exempt = True  # type: ignore
+        return wrapper
+
+    return decorator
+
+
+def _get_file(user, pk: int) -> Optional[File]:
+    return File.get_all_files_by_user(user).select_related('details', 'blob').filter(pk=pk).first()
+
+
+def _create_file(user, id_parent_folder: str, content) -> Tuple[dict, int]:
+    if not user.is_owner_folder(id_parent_folder):
+        return {'message': 'The destination folder does not exists. Check it and try again'}, 404
+
+    serializer = FileSerializer(data={'parent_folder': id_parent_folder, 'file': content})
+    if not serializer.is_valid():
+        return serializer.errors, 400
+
+    serializer.save()
+    return serializer.data, 201
+
+
+@async_api_view(['GET'])
+async def download_file(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+        Send the content of the file like the download action of the files. The response is
+        prepared in the pools, and StreamingASGIHandler (config.asgi) reads every block of the
+        file in the pool of the reads and sends it awaiting the client, so a slow client does
+        not keep a thread
+    """
+    file = await orm_executor.run(_get_file, request.user, pk)
+    if file is None:
+        return JsonResponse({'message': 'The file does not exists'}, status=404)
+
+    return await io_executor.run(get_download_response, request, file)
+
+
+@async_api_view(['POST'])
+async def upload_file(request: HttpRequest) -> HttpResponse:
+    """
+        Create a file in the folder received in the parent_folder field. The server receives
+        the whole body before calling the view without keeping a thread, and the pools parse
+        it and save the file. The space of the body is reserved in the quota of the user before
+        parse it.
+
+        Django 4.0 buffers the whole body, in memory up to FILE_UPLOAD_MAX_MEMORY_SIZE and then
+        in a temporary file, so the big files must be sent by chunks with the upload sessions
+    """
+    length = request.META.get('CONTENT_LENGTH', '')
+    if not length.isdigit():
+        return JsonResponse({'message': 'The Content-Length header is required.'}, status=411)
+
+    if not await orm_executor.run(StorageQuota.reserve, request.user.pk, int(length)):
+        return JsonResponse({'message': 'The storage quota does not have space for the file.'}, status=413)
+
+    try:
+        files = await io_executor.run(lambda: request.FILES)
+        content = files.get('file', None)
+        id_parent_folder = request.POST.get('parent_folder', None)
+
+        if content is None or id_parent_folder is None:
+            return JsonResponse({'message': 'The parent_folder and file fields are required.'}, status=400)
+
+        data, status = await orm_executor.run(_create_file, request.user, id_parent_folder, content)
+    finally:
+        await orm_executor.run(StorageQuota.release, request.user.pk, int(length))
+    return JsonResponse(data, status=status)
+
+
+@async_api_view(['PATCH'])
+async def upload_chunk(request: HttpRequest, session_pk: int) -> HttpResponse:
+    """ Write the body of the request in the offset received in the Upload-Offset header of a session """
+    session = await orm_executor.run(UploadSession.get_by_user_and_id, request.user, session_pk)
+    if session is None:
+        return JsonResponse({'message': 'The upload session does not exists'}, status=404)
+
+    offset = request.META.get('HTTP_UPLOAD_OFFSET', '')
+    length = request.META.get('CONTENT_LENGTH', '')
+    if not offset.isdigit() or not length.isdigit():
+        return JsonResponse({'message': 'The Upload-Offset and Content-Length headers are required.'}, status=400)
+
+    if int(length) > settings.UPLOAD_SESSIONS_MAX_CHUNK_SIZE:
+        return JsonResponse(
+            {'message': f'The chunks can not be bigger than {settings.UPLOAD_SESSIONS_MAX_CHUNK_SIZE} bytes'},
+            status=413
+        )
+
+    try:
+        written = await io_executor.run(session.write_bytes, int(offset), request, int(length))
+    except ValueError as error:
+        return JsonResponse({'message': str(error)}, status=416)
+
+    await orm_executor.run(session.register_chunk, int(offset), written)
+    received_ranges = await orm_executor.run(session.get_received_ranges)
+    return JsonResponse({'written': written, 'received_ranges': received_ranges})
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.4 on 2026-10-18 13:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='storage_quota',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='Bytes that can be stored'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='storage_reserved',
+            field=models.BigIntegerField(default=0, verbose_name='Bytes reserved by the uploads'),
+        ),
+    ]
@@ -7,6 +7,7 @@ from django.contrib.auth.models import PermissionsMixin, AbstractUser
 
 from apps.core.models import BaseProjectModel
 from apps.directories.models import Folder
+from apps.directories.utils.ownership_index import OwnershipIndex
 
 from typing import Optional, List, Set
 
@@ -15,6 +16,9 @@ class User(AbstractUser, PermissionsMixin, BaseProjectModel):
     username = models.CharField(db_index=True, max_length=255, unique=True)
     email = models.EmailField(db_index=True, unique=True)
     is_active = models.BooleanField(default=True)
+    # Without quota the user has the quota STORAGE_QUOTA_BYTES of the settings
+    storage_quota = models.BigIntegerField(verbose_name='Bytes that can be stored', null=True, blank=True)
+    storage_reserved = models.BigIntegerField(verbose_name='Bytes reserved by the uploads', default=0)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
@@ -57,6 +61,18 @@ class User(AbstractUser, PermissionsMixin, BaseProjectModel):
         """
         return self.own_entity_directories.all()
 
+    def get_ownership_index(self) -> OwnershipIndex:
+        """
+            Return the index of the folders of the user. It is loaded once by request
+            and shared between requests through the cache
+
+            Return:
+                index(OwnershipIndex): folders of the user
+        """
+        if not hasattr(self, '_ownership_index'):
+            self._ownership_index = OwnershipIndex.load(self.pk)
+        return self._ownership_index
+
     def is_owner_folder(self, id_folder: int) -> bool:
         """
             Return if the user is owner of the folder
@@ -67,7 +83,19 @@ class User(AbstractUser, PermissionsMixin, BaseProjectModel):
             Return:
                 owner(bool): is owner
         """
-        return self.own_entity_directories.filter(pk=id_folder).exists()
+        return self.get_ownership_index().owns_folder(id_folder)
+
+    def is_owner_folders(self, list_ids: List[int]) -> bool:
+        """
+            Return if the user is owner of all the folders
+
+            Parameter:
+                list_ids(List[int]): ids of the folders to validate
+
+            Return:
+                owner(bool): is owner
+        """
+        return self.get_ownership_index().owns_folders(list_ids)
 
     def is_owner_file(self, id_file: int) -> bool:
         """
@@ -7,10 +7,13 @@ For more information on this file, see
 https://docs.djangoproject.com/en/3.1/howto/deployment/asgi/
 """
 
+import django
 import os
 
-from django.core.asgi import get_asgi_application
+from apps.directories.utils.async_executor import StreamingASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.base')
 
-application = get_asgi_application()
+# Like get_asgi_application, with the blocks of the streaming responses read outside the event loop
+django.setup(set_prefix=False)
+application = StreamingASGIHandler()
@@ -0,0 +1,69 @@
+"""
+Gunicorn config of the production server.
+
+    gunicorn --config config/gunicorn.py
+
+The application is loaded once in the master and the workers are forked from it, so a
+worker starts without importing django again. SERVER_INTERFACE=asgi serves config.asgi
+with uvicorn workers instead of config.wsgi.
+
+The migrations are not applied here, run `./start.sh migrate` before starting the server.
+Every worker applies the operations pending in the journal of the media when it starts.
+
+Signals of the master:
+    HUP: start new workers with the config reloaded and stop the old ones after their
+    current requests. The code is the code preloaded, set GUNICORN_PRELOAD=0 to reload it
+    USR2 and then QUIT to the old master: start a new master with the new code
+"""
+from django.conf import settings
+from django.db import connections
+
+import multiprocessing
+import os
+
+SERVER_INTERFACE = os.environ.get('SERVER_INTERFACE', 'wsgi')
+
+if SERVER_INTERFACE == 'asgi':
+    wsgi_app = 'config.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'config.wsgi:application'
+    worker_class = 'gthread'
+    # The threads wait the disk and the database while other request runs
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+pidfile = os.environ.get('GUNICORN_PIDFILE', '/tmp/qstorage-gunicorn.pid')
+
+# The downloads and uploads of big files keep a worker busy for a long time
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+# Every worker is replaced after a number of requests to free the memory fragmented
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def pre_fork(server, worker):
+    # The connections opened while the app was preloaded cannot be shared with the workers.
+    # Without the preload the master never loads the settings and has no connections
+    if settings.configured:
+        connections.close_all()
+
+
+def post_worker_init(worker):
+    # The operations of the journal left by a stopped server are applied by the threads of the
+    # worker, the lanes are claimed by one worker at a time
+    from apps.directories.utils.filesystem_queue import filesystem_queue
+
+    try:
+        filesystem_queue.replay_pending()
+    except Exception:
+        worker.log.exception('The operations pending in the journal of the media could not be replayed')
@@ -54,6 +54,26 @@ DATABASES = {
     'default': get_secret('DATABASE_DEFAULT'),
 }
 
+# Cache shared by all the processes and nodes of the servers, a Redis server like redis://cache:6379/0.
+# Without it every process keeps his own cache in memory
+CACHE_REDIS_URL = secrets.get('CACHE_REDIS_URL', None)
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+# The data that must be the same in every process, like the indexes of the folders of the users,
+# is only kept in the cache when it is shared by the processes
+CACHE_SHARED = secrets.get('CACHE_SHARED', CACHE_REDIS_URL is not None)
+
 #DATABASE_ROUTERS = (
 #    'django_tenants.routers.TenantSyncRouter',
 #)
@@ -159,10 +179,97 @@ MEDIA_ROOT_TEST = f'{MEDIA_ROOT}/test/'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'apps.auth_user.authentication.CachedTokenAuthentication',
+        'apps.auth_user.authentication.SignedTokenAuthentication',
     ]
 }
 
 
 # Settings for storage
-ROOT_NAME_FOLDER = get_secret('ROOT_NAME_FOLDER')
\ No newline at end of file
+ROOT_NAME_FOLDER = get_secret('ROOT_NAME_FOLDER')
+RECYCLE_BIN_RETENTION_DAYS = 3
+# Operations over the media folder are journaled and applied after the commit by these workers
+FILESYSTEM_QUEUE_ENABLED = True
+FILESYSTEM_QUEUE_WORKERS = 4
+# Threads that apply the operations of a bulk operation, like the moves of the files of a bulk move
+FILESYSTEM_QUEUE_PARALLEL_OPERATIONS = 16
+# Seconds that a process holds the lane of a user while it applies his operations, it is renewed while they are applied
+FILESYSTEM_QUEUE_LEASE_SECONDS = 300
+# The uploaded contents wait inside this folder of the media until the lane moves them to their paths,
+# the contents of the transactions rolled back are removed after these seconds
+FILESYSTEM_QUEUE_STAGING_FOLDER = '.staging'
+FILESYSTEM_QUEUE_STAGING_EXPIRATION_SECONDS = 60 * 60
+# Files with the same content share a blob stored by his hash inside this folder of the media
+CONTENT_ADDRESSED_STORAGE = False
+CONTENT_ADDRESSED_STORAGE_FOLDER = 'blobs'
+# Physical store of the folders and files. The uploads are written through the backend and the
+# lanes of the filesystem queue
+STORAGE_BACKEND = 'apps.directories.utils.storage_backends.LocalStorageBackend'
+DEFAULT_FILE_STORAGE = 'apps.directories.utils.storage_backends.BackendMediaStorage'
+STORAGE_S3_BUCKET = secrets.get('STORAGE_S3_BUCKET', 'qstorage')
+STORAGE_S3_ENDPOINT_URL = secrets.get('STORAGE_S3_ENDPOINT_URL', None)
+STORAGE_S3_REGION = secrets.get('STORAGE_S3_REGION', None)
+STORAGE_S3_ACCESS_KEY = secrets.get('STORAGE_S3_ACCESS_KEY', None)
+STORAGE_S3_SECRET_KEY = secrets.get('STORAGE_S3_SECRET_KEY', None)
+STORAGE_S3_MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+STORAGE_S3_MAX_CONCURRENCY = 10
+# Resumable uploads: the chunks are assembled inside this folder of the media
+UPLOAD_SESSIONS_FOLDER = '.upload_sessions'
+UPLOAD_SESSIONS_EXPIRATION_HOURS = 24
+UPLOAD_SESSIONS_BLOCK_SIZE = 64 * 1024
+UPLOAD_SESSIONS_MAX_CHUNK_SIZE = 64 * 1024 * 1024
+# Uploads of many files in one request: files accepted by request and threads that write them
+UPLOAD_MANY_MAX_FILES = 1000
+UPLOAD_MANY_PARALLEL_WRITES = 16
+# Bytes that every user can store when he does not have his own quota, None is without limit
+STORAGE_QUOTA_BYTES = secrets.get('STORAGE_QUOTA_BYTES', None)
+# Downloads: 'stream' sends the file from django, 'x-accel-redirect' (nginx) and 'x-sendfile'
+# (apache, lighttpd) only authorize the download and let the web server send the bytes
+FILE_DOWNLOADS_MODE = 'stream'
+FILE_DOWNLOADS_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+FILE_DOWNLOADS_BLOCK_SIZE = 64 * 1024
+FILE_DOWNLOADS_MAX_RANGES = 16
+# Types already compressed that are stored without compression inside the zip archives
+ZIP_STORED_TYPES = {
+    'zip', 'gz', 'tgz', 'bz2', 'xz', '7z', 'rar', 'jpg', 'jpeg', 'png', 'gif', 'webp',
+    'mp3', 'mp4', 'm4a', 'mkv', 'mov', 'avi', 'webm', 'ogg', 'pdf', 'docx', 'xlsx', 'pptx',
+}
+# Elements by page of the listings of folders and files
+DIRECTORIES_PAGE_SIZE = 100
+DIRECTORIES_MAX_PAGE_SIZE = 1000
+# Seconds that the index of the folders of a user is kept in the cache. Without CACHE_SHARED every
+# process keeps his own index less time and looks in the database for the folders that are not in it
+OWNERSHIP_INDEX_TIMEOUT = 60 * 60
+OWNERSHIP_INDEX_LOCAL_TIMEOUT = 60
+# Seconds that a token and his user are kept in the cache by the authentication. Without CACHE_SHARED
+# a logout in other process takes effect after the local timeout
+AUTH_TOKEN_CACHE_TIMEOUT = 5 * 60
+AUTH_TOKEN_CACHE_LOCAL_TIMEOUT = 10
+AUTH_TOKEN_CACHE_ALIAS = 'default'
+# 'database' gives a token stored in the database by user, 'signed' gives signed access and
+# refresh tokens verified without the database. The denylist of the signed tokens is kept in
+# the cache of AUTH_TOKEN_CACHE_ALIAS, so the signed tokens need a cache shared between the nodes
+AUTH_TOKEN_MODE = secrets.get('AUTH_TOKEN_MODE', 'database')
+if AUTH_TOKEN_MODE == 'signed' and not CACHE_SHARED:
+    raise ImproperlyConfigured('The signed tokens need a cache shared by the servers, define CACHE_REDIS_URL')
+AUTH_ACCESS_TOKEN_LIFETIME = timedelta(minutes=5)
+AUTH_REFRESH_TOKEN_LIFETIME = timedelta(days=7)
+# Threads of the async views of the transfers: the queries use at most ASYNC_ORM_WORKERS
+# connections to the database by process
+ASYNC_ORM_WORKERS = 8
+ASYNC_IO_WORKERS = 32
+# Seconds that a process keeps the index of the names of a user when the database is not PostgreSQL,
+# and users whose indexes are kept by the process. Only with CACHE_SHARED
+NAME_INDEX_TIMEOUT = 5 * 60
+NAME_INDEX_MAX_USERS = 100
+# Thumbnails and previews of the images and PDFs (Pillow, and pypdfium2 for the PDFs), generated
+# by a pool of PREVIEWS_WORKERS processes, or by the request with 0, and cached in this folder of
+# the media evicting the least recently used
+PREVIEWS_FOLDER = '.previews'
+PREVIEWS_WORKERS = 2
+PREVIEWS_SIZES = {'thumbnail': 256, 'preview': 1024}
+PREVIEWS_QUALITY = 80
+PREVIEWS_CACHE_MAX_BYTES = 512 * 1024 * 1024
+PREVIEWS_GENERATE_ON_UPLOAD = True
+PREVIEWS_TIMEOUT = 30
+PREVIEWS_MAX_AGE = 7 * 24 * 60 * 60
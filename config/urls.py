@@ -13,15 +13,14 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 
+# The media is not served like static files, the files are only sent by the authorized downloads
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('users/', include("apps.users.urls", namespace='users')),
     path('auth/', include("apps.auth_user.urls", namespace='auth')),
     path('directories/', include('apps.directories.urls', namespace='directories')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
 
@@ -1,7 +1,21 @@
 #!/usr/bin/env bash
+# Usage:
+#   start.sh migrate   apply the migrations, run it once before starting or updating the servers
+#   start.sh web       start the production server (config/gunicorn.py), his workers apply the
+#                      operations pending in the media journal
+set -e
 
-python manage.py makemigrations
-python manage.py migrate
-echo "server running at port 8000"
-echo "Author = QuatumSoftlutions"
-python manage.py runserver 0.0.0.0:8000
+case "${1:-web}" in
+    migrate)
+        exec python manage.py migrate --noinput
+        ;;
+    web)
+        echo "server running at ${GUNICORN_BIND:-0.0.0.0:8000}"
+        echo "Author = QuatumSoftlutions"
+        exec gunicorn --config config/gunicorn.py
+        ;;
+    *)
+        echo "Unknown command: $1" >&2
+        exit 1
+        ;;
+esac